@@ -0,0 +1,134 @@
+"""
+Agent Factory Module
+
+Multi-tenant entry point for the retrieval and insertion agents. The DB engine, embedding model,
+cross-encoder, LLM client, ReAct agents and compiled LangGraphs are built once per process;
+serving another elderly profile only creates a tiny `TenantAgent` handle that passes its
+`elderly_id` through the graph state.
+
+Usage:
+    from RAG.agent_factory import get_agent_factory
+
+    agent = get_agent_factory().for_elderly("87654321-4321-4321-4321-019876543210")
+    agent.open_session()  # optional: preload memory while the user is still typing
+    result = agent.process("What medications am I taking now?")
+"""
+
+import threading
+from typing import List, Optional, Tuple
+
+from RAG.utils.shared_resources import SharedResources
+
+
+class AgentFactory:
+    """
+    Lazily builds one tenant-agnostic `HybridRetrievalAgent` and `InsertionAgent` on top of a
+    single `SharedResources` and hands out per-elderly handles.
+    """
+
+    def __init__(self, resources: Optional[SharedResources] = None):
+        self._resources = resources
+        self._retrieval_agent = None
+        self._insertion_agent = None
+        self._lock = threading.Lock()
+
+    @property
+    def resources(self) -> SharedResources:
+        if self._resources is None:
+            with self._lock:
+                if self._resources is None:
+                    self._resources = SharedResources()
+        return self._resources
+
+    @property
+    def retrieval_agent(self):
+        if self._retrieval_agent is None:
+            resources = self.resources
+            with self._lock:
+                if self._retrieval_agent is None:
+                    from RAG.retrieval_agent_hybrid import HybridRetrievalAgent
+                    self._retrieval_agent = HybridRetrievalAgent(resources=resources)
+        return self._retrieval_agent
+
+    @property
+    def insertion_agent(self):
+        if self._insertion_agent is None:
+            resources = self.resources
+            with self._lock:
+                if self._insertion_agent is None:
+                    from RAG.insertion_agent import InsertionAgent
+                    self._insertion_agent = InsertionAgent(resources=resources)
+        return self._insertion_agent
+
+    def retrieve_batch(self, requests: List[Tuple[str, str]], mode: str = "long-term", **kwargs) -> List[List[dict]]:
+        """Many (elderly_id, query) pairs in one batched retrieval (offline jobs, evaluation runs)"""
+        return self.retrieval_agent.retrieve_rerank_batch(requests, mode, **kwargs)
+
+    def close(self) -> None:
+        """Release the retrieval agent's session-start subscription and executors"""
+        with self._lock:
+            agent, self._retrieval_agent = self._retrieval_agent, None
+        if agent is not None:
+            agent.close()
+
+    def for_elderly(self, elderly_id: str) -> "TenantAgent":
+        """Bind an elderly profile; costs one small object, never a model load"""
+        return TenantAgent(self, elderly_id)
+
+
+class TenantAgent:
+    """Per-elderly view over the shared agents"""
+
+    __slots__ = ("factory", "elderly_id")
+
+    def __init__(self, factory: AgentFactory, elderly_id: str):
+        if not elderly_id:
+            raise ValueError("elderly_id is required")
+        self.factory = factory
+        self.elderly_id = str(elderly_id)
+
+    def open_session(self):
+        """
+        A conversation is starting: preload this elderly's LTM / health memory and warm the
+        query path in the background. Returns the preload Future.
+        """
+        return self.factory.retrieval_agent.schedule_preload(self.elderly_id)
+
+    def end_conversation(self, conversation_id: str) -> None:
+        """The conversation is over: drop the candidates its turns cached for follow-ups"""
+        self.factory.retrieval_agent.end_conversation(conversation_id)
+
+    def process(self, user_input: str, conversation_id: Optional[str] = None) -> dict:
+        return self.factory.retrieval_agent.process(user_input, elderly_id=self.elderly_id,
+                                                    conversation_id=conversation_id)
+
+    async def aprocess(self, user_input: str, conversation_id: Optional[str] = None) -> dict:
+        return await self.factory.retrieval_agent.aprocess(user_input, elderly_id=self.elderly_id,
+                                                           conversation_id=conversation_id)
+
+    def retrieve_context(self, query: str, categories: Optional[List[str]] = None,
+                         conversation_id: Optional[str] = None) -> dict:
+        return self.factory.retrieval_agent.retrieve_context(query, categories, elderly_id=self.elderly_id,
+                                                             conversation_id=conversation_id)
+
+    async def aretrieve_context(self, query: str, categories: Optional[List[str]] = None,
+                                conversation_id: Optional[str] = None) -> dict:
+        return await self.factory.retrieval_agent.aretrieve_context(query, categories, elderly_id=self.elderly_id,
+                                                                    conversation_id=conversation_id)
+
+    def insert(self, user_input: str) -> dict:
+        return self.factory.insertion_agent.process(user_input, elderly_id=self.elderly_id)
+
+
+_factory: Optional[AgentFactory] = None
+_factory_lock = threading.Lock()
+
+
+def get_agent_factory() -> AgentFactory:
+    """Process-wide factory shared by every caller"""
+    global _factory
+    if _factory is None:
+        with _factory_lock:
+            if _factory is None:
+                _factory = AgentFactory()
+    return _factory
@@ -0,0 +1,179 @@
+'''
+Per-turn candidate overhead: dict-per-row pipeline vs `CandidateSet`
+
+    python -m RAG.benchmarks.candidate_overhead [--turns 200] [--candidates 25] [--dim 768]
+
+Feeds synthetic ANN / BM25 SQL rows (pgvector embedding text of `--dim` floats) through the
+fusion -> cascade -> recency -> MMR steps twice:
+- `legacy`: the previous implementation, one dict per candidate copied at every step and each
+  embedding string parsed with a per-float Python loop
+- `compact`: `CandidateSet.from_legs` + `HybridRetrievalAgent._rerank_set` + `to_dicts()`
+
+The cross-encoder is a constant-time stand-in, so only the representation overhead is measured.
+Reports microseconds per turn, the tracemalloc peak of a turn and the memory blocks a turn
+leaves allocated (its result rows).
+'''
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from RAG.benchmarks.common import offline_agent
+from RAG.utils.candidates import CandidateSet
+from RAG.utils.cascade import cascade_cutoff
+from RAG.utils.recency_score import compute_recency_score
+
+QUERY = "what did my son tell me last week"
+SCORE_KEYS = {"embedding", "emb_score", "bm25_score", "hybrid_score", "recency_score", "cross_encoder_score",
+              "mmr_score"}
+
+
+class StubCrossEncoder:
+    def predict(self, pairs, batch_size: int = 32):
+        return np.array([len(text) % 17 for _, text in pairs], dtype=np.float32)
+
+
+def synthetic_legs(n: int, dim: int, seed: int):
+    """ANN and BM25 rows for one long-term query, half of them returned by both legs"""
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    rows = [
+        SimpleNamespace(
+            id=f"00000000-0000-0000-0000-{i:012d}", category="family", key=f"key {i}",
+            value=f"remembered fact number {i} " * 3, last_updated=now - timedelta(days=int(rng.integers(0, 30))),
+            embedding="[" + ",".join(f"{x:.6f}" for x in rng.normal(size=dim)) + "]",
+            similarity=float(rng.random()), bm25_score=float(rng.random() * 10),
+        )
+        for i in range(n + n // 2)
+    ]
+    emb_rows = sorted(rows[:n], key=lambda r: -r.similarity)
+    bm25_rows = sorted(rows[n // 2:], key=lambda r: -r.bm25_score)
+    return emb_rows, bm25_rows
+
+
+def cascade_select(candidates: List[Dict[str, Any]], min_keep: int, max_keep: int,
+                   min_gap: float = 0.05) -> List[Dict[str, Any]]:
+    """The dict cascade `CandidateSet.cascade` replaced: adaptive head by hybrid score"""
+    if len(candidates) <= min_keep or not all("hybrid_score" in c for c in candidates):
+        return candidates
+    ranked = sorted(candidates, key=lambda c: c["hybrid_score"], reverse=True)
+    return ranked[:cascade_cutoff([c["hybrid_score"] for c in ranked], min_keep, max_keep, min_gap)]
+
+
+def legacy_turn(emb_rows, bm25_rows, top_k: int, top_k_mmr: int, encoder) -> List[Dict[str, Any]]:
+    """Dict pipeline as it was before `CandidateSet` (fusion, cascade, recency, MMR, strip)"""
+    def decode(r):
+        return {"id": str(r.id), "category": r.category, "key": r.key, "value": r.value,
+                "last_updated": r.last_updated, "embedding": r.embedding}
+
+    emb_results = {}
+    for r in emb_rows:
+        row = decode(r)
+        row["emb_score"] = float(r.similarity)
+        emb_results[row["id"]] = row
+    max_bm25 = max((float(r.bm25_score) for r in bm25_rows), default=1.0)
+    bm25_results = {}
+    for r in bm25_rows:
+        row = decode(r)
+        row["bm25_score"] = float(r.bm25_score) / max_bm25
+        bm25_results[row["id"]] = row
+    combined = {}
+    for id_, r in {**emb_results, **bm25_results}.items():
+        emb_score = emb_results.get(id_, {}).get("emb_score", 0.0)
+        bm25_score = bm25_results.get(id_, {}).get("bm25_score", 0.0)
+        combined[id_] = {**r, "emb_score": emb_score, "bm25_score": bm25_score,
+                         "hybrid_score": round(0.5 * bm25_score + 0.5 * emb_score, 4)}
+    candidates = sorted(combined.values(), key=lambda x: x["hybrid_score"], reverse=True)[:top_k]
+
+    candidates = cascade_select(candidates, min_keep=top_k_mmr, max_keep=2 * top_k_mmr)
+    candidates = compute_recency_score(candidates, QUERY)
+    texts = [r["value"] for r in candidates]
+    embeddings = np.array([[float(x) for x in r.pop("embedding").strip("[]").split(",")] for r in candidates],
+                          dtype=np.float32)
+    recency = np.array([r["recency_score"] for r in candidates], dtype=np.float32)
+    ce_raw = encoder.predict([[QUERY, t] for t in texts])
+    ce = (ce_raw - ce_raw.min()) / (ce_raw.max() - ce_raw.min()) if ce_raw.max() != ce_raw.min() else np.ones_like(ce_raw)
+
+    sims = cosine_similarity(embeddings)
+    selected, remaining = [], list(range(len(candidates)))
+    while len(selected) < top_k_mmr and remaining:
+        best_score, best_idx = -float("inf"), None
+        for idx in remaining:
+            max_sim = max((sims[idx][s] for s in selected), default=0.0)
+            score = 0.75 * ce[idx] - 0.25 * max_sim + 0.1 * recency[idx]
+            if score > best_score:
+                best_score, best_idx = score, idx
+        selected.append(best_idx)
+        remaining.remove(best_idx)
+    ranked = [candidates[i] for i in selected]
+    for i, r in zip(selected, ranked):
+        r["embedding"] = embeddings[i]
+        r["cross_encoder_score"] = float(ce[i])
+    return [{k: v for k, v in r.items() if k not in SCORE_KEYS} for r in ranked]
+
+
+def compact_turn(agent, emb_rows, bm25_rows, top_k: int, top_k_mmr: int, encoder) -> List[Dict[str, Any]]:
+    candidates = CandidateSet.from_legs("long-term", emb_rows, bm25_rows, top_k, 0.5)
+    window = agent._query_window(None, agent._temporal_filters("long-term", QUERY, None))
+    return agent._rerank_set(QUERY, candidates, encoder, alpha_MMR=0.75, beta_recency=0.1,
+                             top_k_MMR=top_k_mmr, window=window).to_dicts()
+
+
+def measure(turn, legs) -> Dict[str, float]:
+    turn(*legs[0])  # warm caches (temporal parser, numpy dispatch)
+
+    start = time.perf_counter()
+    for emb_rows, bm25_rows in legs:
+        turn(emb_rows, bm25_rows)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    peaks, blocks = [], 0
+    for emb_rows, bm25_rows in legs:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        turn(emb_rows, bm25_rows)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        after = tracemalloc.take_snapshot()
+        blocks += sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno"))
+    tracemalloc.stop()
+
+    return {
+        "us_per_turn": seconds / len(legs) * 1e6,
+        "peak_kib": float(np.mean(peaks)) / 1024,
+        "blocks_per_turn": blocks / len(legs),
+    }
+
+
+def run(turns: int, n_candidates: int, dim: int, top_k_mmr: int) -> None:
+    agent = offline_agent()
+    encoder = StubCrossEncoder()
+    legs = [synthetic_legs(n_candidates, dim, seed) for seed in range(turns)]
+
+    results = {
+        "legacy": measure(lambda e, b: legacy_turn(e, b, n_candidates, top_k_mmr, encoder), legs),
+        "compact": measure(lambda e, b: compact_turn(agent, e, b, n_candidates, top_k_mmr, encoder), legs),
+    }
+
+    print(f"turns: {turns}  fused candidates: {n_candidates}  dim: {dim}  top_k_MMR: {top_k_mmr}")
+    print(f"{'':10}{'us/turn':>10}{'peak KiB':>10}{'blocks/turn':>13}")
+    for name, r in results.items():
+        print(f"{name:10}{r['us_per_turn']:>10.0f}{r['peak_kib']:>10.1f}{r['blocks_per_turn']:>13.0f}")
+    legacy, compact = results["legacy"], results["compact"]
+    print(f"time saved: {1 - compact['us_per_turn'] / legacy['us_per_turn']:.1%}  "
+          f"peak memory saved: {1 - compact['peak_kib'] / legacy['peak_kib']:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=25)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--top-k-mmr", type=int, default=8)
+    args = parser.parse_args()
+    run(args.turns, args.candidates, args.dim, args.top_k_mmr)
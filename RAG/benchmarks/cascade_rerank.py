@@ -0,0 +1,82 @@
+'''
+Cascade reranking benchmark: cross-encoder work saved vs recall
+
+    python -m RAG.benchmarks.cascade_rerank [--top-k-mmr 8]
+
+Runs every query of `111025_augmented_test_cases.json` through the offline hybrid candidates
+twice: once cross-encoding every fused candidate (previous behaviour) and once through the
+cascade in `rerank_with_mmr_and_recency`. Reports cross-encoded pairs, estimated reranker
+FLOPs (2 x encoder parameters x tokens per pair) and recall@top_k_MMR of the expected documents.
+'''
+import argparse
+import time
+
+from RAG.benchmarks.common import BUCKETS, OfflineCorpus, expected_ids, load_test_cases, offline_agent, recall
+from RAG.utils.embedder import CrossEmbedder, Embedder
+
+# bge-reranker-base is XLM-R base: ~86M parameters outside the (lookup-only) embedding matrix
+ENCODER_PARAMS = 86e6
+
+
+class CountingCrossEncoder:
+    """Wraps a `CrossEmbedder` and counts the pairs and tokens it scores"""
+
+    def __init__(self, encoder: CrossEmbedder):
+        self.encoder = encoder
+        self.pairs = 0
+        self.tokens = 0
+        self.seconds = 0.0
+
+    def predict(self, pairs):
+        tokenizer = self.encoder.model.tokenizer
+        self.pairs += len(pairs)
+        self.tokens += sum(len(tokenizer(q, t, truncation=True)["input_ids"]) for q, t in pairs)
+        start = time.perf_counter()
+        scores = self.encoder.predict(pairs)
+        self.seconds += time.perf_counter() - start
+        return scores
+
+    @property
+    def flops(self) -> float:
+        return 2 * ENCODER_PARAMS * self.tokens
+
+
+def run(top_k_mmr: int) -> None:
+    embedder = Embedder()
+    encoder = CrossEmbedder("BAAI/bge-reranker-base")
+    corpus = OfflineCorpus(embedder)
+    agent = offline_agent()
+    cases = load_test_cases()
+
+    counters = {"baseline": CountingCrossEncoder(encoder), "cascade": CountingCrossEncoder(encoder)}
+    recalls = {name: [] for name in counters}
+    fused = 0
+
+    for case in cases:
+        for bucket, ids in expected_ids(case).items():
+            _, mode = BUCKETS[bucket]
+            for name, counter in counters.items():
+                candidates = corpus.candidates(bucket, case["query"])
+                fused += len(candidates) if name == "baseline" else 0
+                results = agent.rerank_with_mmr_and_recency(
+                    case["query"], candidates, counter, alpha_MMR=0.75, beta_recency=0.1,
+                    top_k_MMR=top_k_mmr, cascade=name == "cascade"
+                )
+                recalls[name].append(recall(ids, results))
+
+    print(f"queries: {len(recalls['baseline'])}  fused candidates: {fused}  top_k_MMR: {top_k_mmr}")
+    print(f"{'':10}{'pairs':>8}{'GFLOPs':>10}{'CE s':>8}{'recall':>8}")
+    for name, counter in counters.items():
+        mean_recall = sum(recalls[name]) / len(recalls[name])
+        print(f"{name:10}{counter.pairs:>8}{counter.flops / 1e9:>10.1f}{counter.seconds:>8.2f}{mean_recall:>8.3f}")
+
+    base, casc = counters["baseline"], counters["cascade"]
+    saved = 1 - casc.flops / base.flops if base.flops else 0.0
+    delta = (sum(recalls["cascade"]) - sum(recalls["baseline"])) / len(recalls["baseline"])
+    print(f"reranker FLOPs saved: {saved:.1%}  recall change: {delta:+.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k-mmr", type=int, default=8)
+    run(parser.parse_args().top_k_mmr)
@@ -0,0 +1,115 @@
+'''
+Shared fixtures for the offline retrieval benchmarks in `RAG.benchmarks`
+
+
+The benchmarks run without Postgres: the augmented knowledge base in `RAG/test_cases` is embedded
+once, and `OfflineCorpus.candidates` reproduces the two SQL legs of `HybridRetrievalAgent`
+(ANN by cosine similarity, TF-IDF cosine standing in for ParadeDB BM25) and the same
+`alpha_retrieval` fusion, so candidate dicts have the shape `rerank_with_mmr_and_recency` expects.
+'''
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+TEST_CASES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "test_cases")
+KB_PATH = os.path.join(TEST_CASES_DIR, "111025_augmented_kb.json")
+CASES_PATH = os.path.join(TEST_CASES_DIR, "111025_augmented_test_cases.json")
+
+# test-case bucket -> (knowledge-base section, agent mode)
+BUCKETS = {
+    "ltm": ("LTM_data", "long-term"),
+    "hcm": ("HCM_data", "healthcare"),
+    "stm": ("STM_data", "short-term"),
+}
+
+
+def load_test_cases() -> List[Dict[str, Any]]:
+    with open(CASES_PATH) as f:
+        return json.load(f)
+
+
+def _row(bucket: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Knowledge-base entry -> the columns `_decode_row` would return for that bucket"""
+    now = datetime.now(timezone(timedelta(hours=8)))
+    if bucket == "ltm":
+        return {"id": doc["document_id"], "category": doc["category"], "key": doc["key"],
+                "value": doc["value"], "last_updated": now}
+    if bucket == "hcm":
+        return {"id": doc["document_id"], "record_type": doc["type"], "description": doc["description"],
+                "diagnosis_date": None if doc["date"] == "None" else doc["date"],
+                "last_updated": now.isoformat()}
+    return {"id": doc["document_id"], "content": doc["content"], "created_at": doc["timestamp"].replace("Z", "+00:00")}
+
+
+def row_text(row: Dict[str, Any]) -> str:
+    return row.get("content") or row.get("value") or row.get("description")
+
+
+class OfflineCorpus:
+    """Embedded knowledge base with an in-memory stand-in for the hybrid SQL retrieval"""
+
+    def __init__(self, embedder):
+        with open(KB_PATH) as f:
+            kb = json.load(f)
+
+        self.embedder = embedder
+        self.rows: Dict[str, List[Dict[str, Any]]] = {}
+        self.embeddings: Dict[str, np.ndarray] = {}
+        self.tfidf: Dict[str, Tuple[TfidfVectorizer, Any]] = {}
+        for bucket, (section, _) in BUCKETS.items():
+            rows = [_row(bucket, doc) for doc in kb[section]]
+            texts = [row_text(r) for r in rows]
+            self.rows[bucket] = rows
+            self.embeddings[bucket] = np.asarray(embedder.embed_batch(texts), dtype=np.float32)
+            vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+            self.tfidf[bucket] = (vectorizer, vectorizer.fit_transform(texts))
+
+    def candidates(self, bucket: str, query: str, top_k_retrieval: int = 25, sim_threshold: float = 0.3,
+                   alpha_retrieval: float = 0.5) -> List[Dict[str, Any]]:
+        """Fused candidates sorted by hybrid score, as `CandidateSet.from_legs` fuses them (as dicts)"""
+        rows, embeddings = self.rows[bucket], self.embeddings[bucket]
+        sims = embeddings @ np.asarray(self.embedder.embed(query), dtype=np.float32)
+        ann = [i for i in np.argsort(-sims)[:top_k_retrieval] if sims[i] >= sim_threshold]
+
+        vectorizer, matrix = self.tfidf[bucket]
+        lexical = (matrix @ vectorizer.transform([query]).T).toarray().ravel()
+        bm25 = [i for i in np.argsort(-lexical)[:top_k_retrieval] if lexical[i] > 0]
+        max_lexical = max((lexical[i] for i in bm25), default=1.0)
+
+        fused = []
+        for i in set(ann) | set(bm25):
+            emb_score = float(sims[i]) if i in ann else 0.0
+            bm25_score = float(lexical[i] / max_lexical) if i in bm25 else 0.0
+            fused.append({
+                **rows[i],
+                "embedding": "[" + ",".join(f"{x:.6f}" for x in embeddings[i]) + "]",
+                "emb_score": emb_score,
+                "bm25_score": bm25_score,
+                "hybrid_score": round(alpha_retrieval * bm25_score + (1 - alpha_retrieval) * emb_score, 4),
+            })
+        return sorted(fused, key=lambda x: x["hybrid_score"], reverse=True)[:top_k_retrieval]
+
+
+def recall(expected_ids: List[str], results: List[Dict[str, Any]]) -> float:
+    if not expected_ids:
+        return 1.0
+    returned = {r["id"] for r in results}
+    return sum(doc_id in returned for doc_id in expected_ids) / len(expected_ids)
+
+
+def offline_agent():
+    """`HybridRetrievalAgent` without DB / LLM setup; enough for its pure reranking methods"""
+    from RAG.retrieval_agent_hybrid import HybridRetrievalAgent
+    from RAG.utils.load_controller import DegradationConfig, LoadController
+
+    agent = HybridRetrievalAgent.__new__(HybridRetrievalAgent)
+    agent.load_controller = LoadController(DegradationConfig(enabled=False))
+    return agent
+
+
+def expected_ids(case: Dict[str, Any]) -> Dict[str, List[str]]:
+    return {bucket: [doc["document_id"] for doc in docs] for bucket, docs in case["expected_retrieval"].items()}
@@ -0,0 +1,58 @@
+'''
+Import cost of the memory router (`python -X importtime`)
+
+    python -m RAG.benchmarks.import_time [--module RAG.memory_router.graph_flow] [--top 10] [--budget-ms 300]
+
+Imports `--module` in a fresh interpreter with `-X importtime` and reports the cumulative import
+time of the module, the heaviest modules it pulled in, and whether LangGraph, the Gemini client,
+sentence-transformers / torch or scipy were imported (they should not be: models and the graph
+are built on first use or by `graph_flow.warmup()`).
+
+Exits non-zero when the import takes longer than `--budget-ms`, so it can guard CI.
+'''
+import argparse
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+HEAVY_PACKAGES = ("langgraph", "langchain_google_genai", "sentence_transformers", "torch", "scipy", "sklearn")
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every module the import loaded"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+def run(module: str, top: int, budget_ms: float) -> int:
+    rows = import_times(module)
+    total_ms = next(cumulative for name, _, cumulative in reversed(rows) if name == module) / 1000.0
+    loaded = {name.split(".")[0] for name, _, _ in rows}
+    heavy = [package for package in HEAVY_PACKAGES if package in loaded]
+
+    print(f"module: {module}  cumulative import: {total_ms:.1f} ms  modules loaded: {len(rows)}")
+    print(f"{'self ms':>9}{'cumul ms':>10}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: -r[1])[:top]:
+        print(f"{self_us / 1000.0:>9.1f}{cumulative_us / 1000.0:>10.1f}  {name}")
+    print(f"heavy packages imported: {', '.join(heavy) if heavy else 'none'}")
+
+    within = total_ms <= budget_ms and not heavy
+    print(f"budget {budget_ms:.0f} ms: {'ok' if within else 'EXCEEDED'}")
+    return 0 if within else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="RAG.memory_router.graph_flow")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=300.0)
+    args = parser.parse_args()
+    sys.exit(run(args.module, args.top, args.budget_ms))
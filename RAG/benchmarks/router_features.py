@@ -0,0 +1,68 @@
+'''
+Offline memory-router latency: separate vs shared feature pass
+
+    python -m RAG.benchmarks.router_features [--sentences 200]
+
+Classifies sentences of the router's augmented training data with `QAClassifier` and
+`TopicClassifier` twice:
+- `separate`: each classifier builds its own TF-IDF and SBERT features (previous behaviour)
+- `shared`: both read one `RouterFeatures`, as the offline graph flow now does
+
+Reports milliseconds per utterance, SBERT encode calls and whether the labels agree.
+'''
+import argparse
+import csv
+import os
+import time
+from typing import List
+
+from RAG.memory_router.qa_classifier_class import QAClassifier
+from RAG.memory_router.router_features import RouterFeatures
+from RAG.memory_router.topic_classifier_class import TopicClassifier
+from RAG.utils.metrics import metrics
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "memory_router", "data_augmentation",
+                         "elderly_topical_conversational_sentences.csv")
+
+
+def load_sentences(n: int) -> List[str]:
+    with open(DATA_PATH, newline="", encoding="utf-8") as f:
+        return [row["text"] for row, _ in zip(csv.DictReader(f), range(n))]
+
+
+def encode_calls() -> float:
+    return sum(v for k, v in metrics.snapshot()["counters"].items() if k.startswith("router_sbert_encode_total"))
+
+
+def run(n_sentences: int) -> None:
+    qa_model, topic_model = QAClassifier(), TopicClassifier()
+    sentences = load_sentences(n_sentences)
+
+    # Warm-up: first SBERT call pays lazy initialisation
+    qa_model.classify_text_qa({"text": sentences[0]})
+
+    labels, report = {}, {}
+    for name in ("separate", "shared"):
+        calls = encode_calls()
+        start = time.perf_counter()
+        labels[name] = []
+        for text in sentences:
+            features = RouterFeatures([text]) if name == "shared" else None
+            qa = qa_model.classify_text_qa({"text": text, "features": features})["qa"]
+            topic = topic_model.classify_text_topic({"text": text, "features": features})["topic"]
+            labels[name].append((qa, tuple(topic)))
+        report[name] = ((time.perf_counter() - start) / len(sentences) * 1000.0, encode_calls() - calls)
+
+    print(f"sentences: {len(sentences)}  SBERT: {qa_model.sbert_model_name} / {topic_model.sbert_model_name}")
+    print(f"{'':10}{'ms/utt':>10}{'encodes':>10}")
+    for name, (ms, calls) in report.items():
+        print(f"{name:10}{ms:>10.2f}{calls:>10.0f}")
+    print(f"latency saved: {1 - report['shared'][0] / report['separate'][0]:.1%}  "
+          f"labels identical: {labels['separate'] == labels['shared']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=200)
+    args = parser.parse_args()
+    run(args.sentences)
@@ -0,0 +1,116 @@
+'''
+Fused memory router vs the current classifier stack: held-out parity and latency
+
+    python -m RAG.benchmarks.router_fused [--qa-model PATH] [--fused PATH] [--single 200] [--repeats 5]
+
+Needs `model_weights/fused_router.npz` (`python -m RAG.memory_router.train_fused_router`).
+Compares on the held-out rows of `calibrate_router.py` (never seen by either model):
+- `stack`: `QAClassifier` (`--qa-model`) + the three `TopicClassifier` OvA models, each on its
+  own features (QA / topic TF-IDF, regex keyword counts), sharing one `RouterFeatures`
+- `fused`: `FusedRouter.score_batch`, one feature pass and one matrix multiply for all heads
+
+Parity: accuracy of each head on its held-out rows and how often the two agree on the label.
+Latency: milliseconds per batch (the topic held-out rows) and per single utterance
+(`--single` texts). SBERT embeddings are computed once up front and excluded: both sides
+encode each text once with the same model.
+'''
+import argparse
+import os
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from RAG.memory_router.calibrate_router import TOPIC_DATA, held_out, qa_held_out, read_rows
+from RAG.memory_router.fused_router import FUSED_PATH, load_fused_router
+from RAG.memory_router.qa_classifier_class import QAClassifier
+from RAG.memory_router.router_features import RouterFeatures
+from RAG.memory_router.topic_classifier_class import TopicClassifier
+
+DEFAULT_QA_MODEL = "RAG/memory_router/model_weights/qa_stacked_hybrid_model.pkl"
+
+
+class PrecomputedFeatures(RouterFeatures):
+    """RouterFeatures whose SBERT embeddings come from a lookup (TF-IDF is still computed)"""
+
+    def __init__(self, texts: List[str], embeddings: Dict[str, np.ndarray]):
+        super().__init__(texts)
+        self.lookup = embeddings
+
+    def embeddings(self, model_name: str) -> np.ndarray:
+        return np.vstack([self.lookup[text] for text in self.texts])
+
+
+def timed(score: Callable[[], object], repeats: int) -> float:
+    score()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        score()
+    return (time.perf_counter() - start) / repeats * 1000.0
+
+
+def run(qa_model_path: str, fused_path: str, n_single: int, repeats: int) -> None:
+    if not os.path.exists(fused_path):
+        raise SystemExit(f"{fused_path} not found: run python -m RAG.memory_router.train_fused_router first")
+    qa_model, topic_model, fused = QAClassifier(model_path=qa_model_path), TopicClassifier(), load_fused_router(fused_path)
+
+    qa_texts, qa_y = qa_held_out()
+    topic_texts, topic_labels = read_rows(TOPIC_DATA)
+    splits = {label: held_out(np.array([int(l == label) for l in topic_labels])) for label in fused.topic_labels}
+    union = np.unique(np.concatenate(list(splits.values())))
+    texts = [topic_texts[i] for i in union]
+
+    all_texts = list(dict.fromkeys(qa_texts + texts))
+    vectors = RouterFeatures(all_texts).embeddings(fused.sbert_model_name)
+    embeddings = dict(zip(all_texts, vectors))
+
+    def stack(batch: List[str]):
+        features = PrecomputedFeatures(batch, embeddings)
+        qa, _ = qa_model.score_batch_qa(batch, features)
+        _, topic_p = topic_model.score_batch_topic(batch, features)
+        return qa, topic_p
+
+    def fused_scores(batch: List[str]):
+        qa, _, _, topic_p = fused.score_batch(batch, PrecomputedFeatures(batch, embeddings))
+        return qa, topic_p
+
+    # Parity on the held-out rows
+    rows = []
+    (stack_qa, _), (fused_qa, _) = stack(qa_texts), fused_scores(qa_texts)
+    truth = qa_y == 1
+    stack_q, fused_q = np.array(stack_qa) == "question", np.array(fused_qa) == "question"
+    rows.append(("qa", len(truth), (stack_q == truth).mean(), (fused_q == truth).mean(), (stack_q == fused_q).mean()))
+    (_, stack_topic), (_, fused_topic) = stack(texts), fused_scores(texts)
+    for label, idx in splits.items():
+        pos = np.searchsorted(union, idx)
+        truth = np.array([topic_labels[i] == label for i in idx])
+        s, f = stack_topic[label][pos] > 0.5, fused_topic[label][pos] > 0.5
+        rows.append((f"topic/{label}", len(idx), (s == truth).mean(), (f == truth).mean(), (s == f).mean()))
+
+    print(f"QA model: {os.path.basename(qa_model_path)}  fused heads: {fused.heads}  "
+          f"fused features: {fused.coef_.shape[1]}")
+    print(f"{'head':22}{'n':>6}{'stack acc':>11}{'fused acc':>11}{'agree':>9}")
+    for name, n, stack_acc, fused_acc, agree in rows:
+        print(f"{name:22}{n:>6}{stack_acc:>11.1%}{fused_acc:>11.1%}{agree:>9.1%}")
+
+    # Latency (SBERT excluded)
+    single = texts[:n_single]
+    latency = {
+        name: (timed(lambda: score(texts), repeats), timed(lambda: [score([t]) for t in single], 1) / len(single))
+        for name, score in (("stack", stack), ("fused", fused_scores))
+    }
+    print(f"{'':8}{f'ms/batch of {len(texts)}':>20}{'ms/utterance':>15}")
+    for name, (batch_ms, single_ms) in latency.items():
+        print(f"{name:8}{batch_ms:>20.2f}{single_ms:>15.3f}")
+    print(f"batch time saved: {1 - latency['fused'][0] / latency['stack'][0]:.1%}  "
+          f"per-utterance time saved: {1 - latency['fused'][1] / latency['stack'][1]:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qa-model", default=DEFAULT_QA_MODEL)
+    parser.add_argument("--fused", default=FUSED_PATH)
+    parser.add_argument("--single", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    run(args.qa_model, args.fused, args.single, args.repeats)
@@ -0,0 +1,113 @@
+'''
+Memory-router graph latency: sequential vs fan-out classifiers, invoke vs ainvoke
+
+    python -m RAG.benchmarks.router_graph [--sentences 200] [--concurrency 8] [--llm-ms 400]
+
+Offline flow, per utterance (sentences of the router's augmented training data):
+- `sequential`: FeatureExtractor -> QAClassifier -> TopicClassifier (previous graph)
+- `fan-out`: FeatureExtractor -> (QAClassifier | TopicClassifier) -> JoinClassifiers (`graph_flow.app`)
+Reports mean / p95 milliseconds per `invoke`, and the throughput of `--concurrency` concurrent
+`ainvoke` calls as the async FastAPI endpoint issues them.
+
+Online flow, one multi-sentence utterance (`--concurrency` sentences) against a Gemini
+stand-in answering in `--llm-ms`: `invoke` per sentence (previous endpoint) vs the
+endpoint's `asyncio.gather` of `ainvoke`.
+'''
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+import numpy as np
+from langgraph.graph import END, START, StateGraph
+
+from RAG.benchmarks.router_features import load_sentences
+from RAG.memory_router import graph_flow
+
+LLM_REPLY = '{"topic": ["short-term"], "qa": "statement"}'
+
+
+class StubGemini:
+    """Gemini stand-in with a fixed round trip"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def invoke(self, messages):
+        time.sleep(self.seconds)
+        return SimpleNamespace(content=LLM_REPLY)
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.seconds)
+        return SimpleNamespace(content=LLM_REPLY)
+
+
+def sequential_graph():
+    graph = StateGraph(graph_flow.ClassificationState)
+    graph.add_node("FeatureExtractor", graph_flow.features_node)
+    graph.add_node("QAClassifier", graph_flow.qa_node)
+    graph.add_node("TopicClassifier", graph_flow.topic_node)
+    graph.add_edge(START, "FeatureExtractor")
+    graph.add_edge("FeatureExtractor", "QAClassifier")
+    graph.add_edge("QAClassifier", "TopicClassifier")
+    graph.add_edge("TopicClassifier", END)
+    return graph.compile()
+
+
+def latency(invoke: Callable[[str], Dict], sentences: List[str]) -> Dict[str, float]:
+    invoke(sentences[0])  # warm-up
+    timings, labels = [], []
+    for text in sentences:
+        start = time.perf_counter()
+        result = invoke(text)
+        timings.append((time.perf_counter() - start) * 1000.0)
+        labels.append((result["qa"], tuple(result["topic"])))
+    return {"mean": float(np.mean(timings)), "p95": float(np.percentile(timings, 95)), "labels": labels}
+
+
+async def throughput(app, sentences: List[str], concurrency: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(sentences), concurrency):
+        await asyncio.gather(*(app.ainvoke({"text": text, "flow_type": "offline"})
+                               for text in sentences[i:i + concurrency]))
+    return len(sentences) / (time.perf_counter() - start)
+
+
+async def online_gather(sentences: List[str]) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(graph_flow.app.ainvoke({"text": text, "flow_type": "online"}) for text in sentences))
+    return (time.perf_counter() - start) * 1000.0
+
+
+def run(n_sentences: int, concurrency: int, llm_ms: float) -> None:
+    sentences = load_sentences(n_sentences)
+    graphs = {"sequential": sequential_graph(), "fan-out": graph_flow.app}
+
+    print(f"offline flow, sentences: {len(sentences)}")
+    print(f"{'':12}{'mean ms':>10}{'p95 ms':>10}{f'ainvoke x{concurrency} utt/s':>22}")
+    results = {}
+    for name, app in graphs.items():
+        results[name] = latency(lambda text: app.invoke({"text": text, "flow_type": "offline"}), sentences)
+        rate = asyncio.run(throughput(app, sentences, concurrency))
+        print(f"{name:12}{results[name]['mean']:>10.2f}{results[name]['p95']:>10.2f}{rate:>22.1f}")
+    print(f"labels identical: {results['sequential']['labels'] == results['fan-out']['labels']}")
+
+    graph_flow.gemini_client = StubGemini(llm_ms / 1000.0)
+    utterance = sentences[:concurrency]
+    start = time.perf_counter()
+    for text in utterance:
+        graph_flow.app.invoke({"text": text, "flow_type": "online"})
+    sequential_ms = (time.perf_counter() - start) * 1000.0
+    gathered_ms = asyncio.run(online_gather(utterance))
+    print(f"online flow, {len(utterance)}-sentence utterance, LLM {llm_ms:.0f} ms: "
+          f"invoke loop {sequential_ms:.0f} ms, ainvoke gather {gathered_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-ms", type=float, default=400.0)
+    args = parser.parse_args()
+    run(args.sentences, args.concurrency, args.llm_ms)
@@ -0,0 +1,76 @@
+'''
+Offline memory-router batch scoring: dense hstack vs sparse TF-IDF features
+
+    python -m RAG.benchmarks.router_sparse [--sentences 2000] [--repeats 5]
+
+Takes a batch of sentences of the router's augmented training data, encodes them once (SBERT is
+the same cost on both sides and is excluded) and scores them with the classifiers' models twice:
+- `dense`: `.toarray()` of the TF-IDF rows, `np.hstack` with the dense block, `model.predict`
+  (previous behaviour)
+- `sparse`: `predict_blocks` on the sparse TF-IDF block and the dense block
+
+Reports milliseconds per batch, the tracemalloc peak of a batch and whether the predictions of
+every model (topic OvA logistic regressions and the QA model) are identical.
+'''
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from RAG.benchmarks.router_features import load_sentences
+from RAG.memory_router.qa_classifier_class import QAClassifier
+from RAG.memory_router.router_features import RouterFeatures, predict_blocks
+from RAG.memory_router.topic_classifier_class import TopicClassifier
+
+
+def measure(score: Callable[[], List[np.ndarray]], repeats: int) -> Dict[str, float]:
+    score()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        score()
+    seconds = (time.perf_counter() - start) / repeats
+
+    tracemalloc.start()
+    score()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"ms": seconds * 1000.0, "peak_kib": peak / 1024}
+
+
+def run(n_sentences: int, repeats: int) -> None:
+    qa_model, topic_model = QAClassifier(), TopicClassifier()
+    sentences = load_sentences(n_sentences)
+    features = RouterFeatures(sentences)
+    qa_blocks = qa_model._feature_blocks(sentences, features)
+    topic_blocks = topic_model.feature_blocks_topic(sentences, features)
+    models = [(qa_model.model, qa_blocks)] + [(clf, topic_blocks) for clf in topic_model.models_ova.values()]
+
+    def dense() -> List[np.ndarray]:
+        return [clf.predict(np.hstack([X_tfidf.toarray(), X_dense])) for clf, (X_tfidf, X_dense) in models]
+
+    def sparse() -> List[np.ndarray]:
+        return [predict_blocks(clf, X_tfidf, X_dense) for clf, (X_tfidf, X_dense) in models]
+
+    results = {"dense": measure(dense, repeats), "sparse": measure(sparse, repeats)}
+    identical = all(np.array_equal(a, b) for a, b in zip(dense(), sparse()))
+
+    X_tfidf = topic_blocks[0]
+    print(f"sentences: {len(sentences)}  TF-IDF vocab: {X_tfidf.shape[1]}  "
+          f"density: {X_tfidf.nnz / (X_tfidf.shape[0] * X_tfidf.shape[1]):.2%}  "
+          f"QA model: {type(qa_model.model).__name__}")
+    print(f"{'':10}{'ms/batch':>10}{'peak KiB':>12}")
+    for name, r in results.items():
+        print(f"{name:10}{r['ms']:>10.2f}{r['peak_kib']:>12.1f}")
+    print(f"time saved: {1 - results['sparse']['ms'] / results['dense']['ms']:.1%}  "
+          f"peak memory saved: {1 - results['sparse']['peak_kib'] / results['dense']['peak_kib']:.1%}  "
+          f"predictions identical: {identical}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sentences, args.repeats)
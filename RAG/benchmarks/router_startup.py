@@ -0,0 +1,78 @@
+'''
+Memory-router startup: pickled artifacts vs the memory-mapped router bundle
+
+    python -m RAG.benchmarks.router_startup [--qa-model PATH] [--repeats 20]
+
+Builds `QAClassifier` + `TopicClassifier` `--repeats` times each way:
+- `pickle`: the nine `.pkl` artifacts (previous startup)
+- `bundle`: `load_bundle` + `from_bundle` on `router_bundle.npz` (exported to a temporary file
+  from the same pickles, with `--qa-model` as the QA model)
+
+SBERT is loaded once up front (the same for both) and excluded. Reports milliseconds per load
+and the Python heap a loaded pair keeps (tracemalloc); memory-mapped arrays are file-backed
+pages shared between worker processes and do not count towards it.
+'''
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+import warnings
+from typing import Callable, Dict
+
+from RAG.memory_router.qa_classifier_class import QAClassifier
+from RAG.memory_router.router_bundle import load_bundle, write_bundle
+from RAG.memory_router.topic_classifier_class import TopicClassifier
+
+DEFAULT_QA_MODEL = "RAG/memory_router/model_weights/qa_stacked_hybrid_model.pkl"
+
+
+def measure(load: Callable[[], object], repeats: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        load()
+    ms = (time.perf_counter() - start) / repeats * 1000.0
+
+    gc.collect()
+    tracemalloc.start()
+    loaded = load()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del loaded
+    return {"ms": ms, "heap_kib": retained / 1024}
+
+
+def run(qa_model_path: str, repeats: int) -> None:
+    warnings.filterwarnings("ignore", message="Trying to unpickle estimator")
+    qa, topic = QAClassifier(model_path=qa_model_path), TopicClassifier()  # also loads SBERT once
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_path = os.path.join(tmp, "router_bundle.npz")
+        write_bundle(bundle_path, qa.model, qa.tfidf_vectorizer, qa.sbert_model_name, topic.models_ova,
+                     topic.tfidf_vectorizer_topic, topic.sbert_model_name, topic.CATEGORY_KEYWORDS)
+
+        def from_bundle():
+            bundle = load_bundle(bundle_path)
+            return QAClassifier.from_bundle(bundle), TopicClassifier.from_bundle(bundle)
+
+        results = {
+            "pickle": measure(lambda: (QAClassifier(model_path=qa_model_path), TopicClassifier()), repeats),
+            "bundle": measure(from_bundle, repeats),
+        }
+        bundle_kib = os.path.getsize(bundle_path) / 1024
+
+    print(f"QA model: {os.path.basename(qa_model_path)}  bundle size: {bundle_kib:.0f} KiB  repeats: {repeats}")
+    print(f"{'':8}{'ms/load':>10}{'heap KiB':>11}")
+    for name, r in results.items():
+        print(f"{name:8}{r['ms']:>10.2f}{r['heap_kib']:>11.1f}")
+    print(f"startup saved: {1 - results['bundle']['ms'] / results['pickle']['ms']:.1%}  "
+          f"private heap saved: {1 - results['bundle']['heap_kib'] / results['pickle']['heap_kib']:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qa-model", default=DEFAULT_QA_MODEL)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    run(args.qa_model, args.repeats)
@@ -0,0 +1,95 @@
+'''
+Temporal scoping of hybrid retrieval: pinned query -> SQL bound check, and parser cost
+
+    python -m RAG.benchmarks.temporal_filters [--repeats 2000]
+
+Runs fixed queries through `HybridRetrievalAgent._temporal_filters`, `_normalize_filters` and
+`_filter_clause` at a pinned reference time (Wednesday 2026-10-14 09:30 Singapore time) and
+checks the bound `start_filter` / `end_filter`:
+- short-term `created_at` (TIMESTAMP, stored as naive UTC): the SGT window shifted to UTC;
+  forward-looking windows ("next appointment", "upcoming", "later") leave it unscoped
+- healthcare `diagnosis_date` (DATE): whole SGT calendar days; a bare "on Monday" is the
+  coming Monday unless the query is in the past tense
+
+and that `recency_scores` on the resolved window puts naive-UTC `created_at` values inside
+or outside it as the SQL bounds do. Then reports microseconds per `parse_time_window` call.
+Exits non-zero on any mismatch.
+'''
+import argparse
+import sys
+import time
+from datetime import date, datetime
+
+from RAG.retrieval_agent_hybrid import HybridRetrievalAgent
+from RAG.utils.recency_score import recency_scores
+from RAG.utils.temporal_parser import parse_time_window
+
+NOW = datetime(2026, 10, 14, 9, 30)  # SGT, a Wednesday
+
+# (mode, query, expected start_filter, expected end_filter)
+CASES = [
+    ("short-term", "What did I eat yesterday?", datetime(2026, 10, 12, 16), datetime(2026, 10, 13, 16)),
+    ("short-term", "ytd morning I went where ah", datetime(2026, 10, 12, 21), datetime(2026, 10, 13, 4)),
+    ("short-term", "What did I say last night?", datetime(2026, 10, 13, 10), datetime(2026, 10, 13, 22)),
+    ("short-term", "What did I do on Monday?", datetime(2026, 10, 11, 16), datetime(2026, 10, 12, 16)),
+    ("short-term", "What did I have this morning?", datetime(2026, 10, 13, 21), datetime(2026, 10, 14, 4)),
+    ("short-term", "When is my next appointment?", None, None),
+    ("short-term", "Anything upcoming I should know?", None, None),
+    ("short-term", "What do I need to do later?", None, None),
+    ("healthcare", "When is my next appointment?", date(2026, 10, 14), None),
+    ("healthcare", "When is my appointment on Monday?", date(2026, 10, 19), date(2026, 10, 20)),
+    ("healthcare", "What did the doctor say on Monday?", date(2026, 10, 12), date(2026, 10, 13)),
+    ("healthcare", "Did I see the doctor yesterday?", date(2026, 10, 13), date(2026, 10, 14)),
+]
+
+# (mode, query, created_at as stored (naive UTC), inside the window)
+RECENCY_CASES = [
+    ("short-term", "What did I eat yesterday?", datetime(2026, 10, 12, 17), True),   # 13th 01:00 SGT
+    ("short-term", "What did I eat yesterday?", datetime(2026, 10, 13, 17), False),  # 14th 01:00 SGT
+    ("short-term", "What did I have this morning?", datetime(2026, 10, 14, 0, 30), True),
+    ("short-term", "When is my next appointment?", datetime(2026, 10, 1), False),    # no window: decay
+]
+
+
+def window(mode: str, query: str):
+    return HybridRetrievalAgent._query_window(None, HybridRetrievalAgent._temporal_filters(mode, query, None, now=NOW))
+
+
+def bounds(mode: str, query: str):
+    filters = HybridRetrievalAgent._temporal_filters(mode, query, None, now=NOW)
+    _, params = HybridRetrievalAgent._filter_clause(mode, HybridRetrievalAgent._normalize_filters(mode, filters))
+    return params.get("start_filter"), params.get("end_filter")
+
+
+def run(repeats: int) -> int:
+    failures = 0
+    print(f"reference time: {NOW:%Y-%m-%d %H:%M} SGT ({NOW:%A})")
+    for mode, query, start, end in CASES:
+        got = bounds(mode, query)
+        ok = got == (start, end)
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':5}{mode:12}{query!r:40} -> [{got[0]}, {got[1]})"
+              + ("" if ok else f"  expected [{start}, {end})"))
+
+    for mode, query, created_at, inside in RECENCY_CASES:
+        score = recency_scores([created_at], window(mode, query))[0]
+        ok = (score == 1.0) == inside
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':5}{mode:12}{query!r:40} -> created_at {created_at} UTC scores {score}"
+              + ("" if ok else f"  expected {'in' if inside else 'outside'} the window"))
+
+    queries = [query for _, query, _, _ in CASES]
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for query in queries:
+            parse_time_window(query, now=NOW)
+    us = (time.perf_counter() - started) / (repeats * len(queries)) * 1e6
+    print(f"parse_time_window: {us:.1f} us/query  mismatches: {failures}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+    sys.exit(run(args.repeats))
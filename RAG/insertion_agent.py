@@ -20,31 +20,31 @@ from enum import Enum
 from datetime import datetime
 
 # Core dependencies
-from dotenv import load_dotenv
 import psycopg2
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from pydantic import BaseModel, Field
 
 # LangChain dependencies
 from langchain_core.messages import AnyMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode, create_react_agent
 from langgraph.graph.message import add_messages
 
-# Import embedder
-from elder_companion.RAG.utils.embedder import Embedder
-
 from RAG.shared.schemas.schema_stm import InsertShortTermSchema
 from RAG.shared.schemas.schema_ltm import InsertLongTermSchema, LTMCategories
 from RAG.shared.schemas.schema_hcm import InsertHealthSchema, HealthRecordTypes
+from RAG.utils.change_feed import change_feed
+from RAG.utils.healthcare_index import healthcare_index
+from RAG.utils.shared_resources import SharedResources
 
 
 class AgentState(TypedDict):
     """State schema for the insertion agent workflow"""
     user_input: str
+    elderly_id: str
     messages: Annotated[List[AnyMessage], add_messages]
     has_context: bool
     final_answer: str
@@ -55,8 +55,11 @@ class InsertionAgent:
     """
     Agent for processing user input and storing relevant information in appropriate memory buckets.
 
+    Like the retrieval agent it is tenant-agnostic: the elderly profile travels in the graph
+    state and tool-call config, so one instance serves every profile.
+
     Attributes:
-        elderly_id: Default elderly profile ID to use for insertions
+        elderly_id: Optional default elderly profile ID to use for insertions
         graph: Compiled LangGraph workflow
         embedder: Embedder instance for generating embeddings
         engine: SQLAlchemy database engine
@@ -110,26 +113,23 @@ class InsertionAgent:
     - Only store what's explicitly shared and matches a bucket.
     """
 
-    def __init__(self, elderly_id: str):
+    def __init__(self, elderly_id: Optional[str] = None, resources: Optional[SharedResources] = None):
         """
         Initialize the Insertion Agent
 
         Args:
-            elderly_id: UUID of the elderly profile to use for insertions
+            elderly_id: Optional default UUID of the elderly profile to use for insertions
+            resources: Shared engine/models/LLM; a private set is created when omitted
         """
         self.elderly_id = elderly_id
 
-        # Load environment variables
-        load_dotenv()
-
-        # Initialize database connection
-        self._setup_database()
-
-        # Setup embedding model using Embedder class
-        self.embedder = Embedder(model_name="google/embeddinggemma-300m")
-
-        # Initialize LLM
-        self._setup_llm()
+        # Heavy resources (DB engine, embedder, LLM) are shared across agents
+        self.resources = resources if resources is not None else SharedResources()
+        self.connection_string = self.resources.connection_string
+        self.secret_key = self.resources.secret_key
+        self.engine = self.resources.engine
+        self.embedder = self.resources.embedder
+        self.llm = self.resources.llm
 
         # Setup tools and workflow
         self._setup_tools()
@@ -138,38 +138,10 @@ class InsertionAgent:
         # Ensure elderly profile exists
         self._ensure_elderly_profile()
 
-    def _setup_database(self):
-        """Setup database connection and engine"""
-        self.connection_string = os.getenv("DATABASE_URL")
-        self.secret_key = os.getenv("DATABASE_ENCRYPTION_KEY")
-
-        if not self.connection_string:
-            raise ValueError("DATABASE_URL environment variable is required")
-        if not self.secret_key:
-            raise ValueError("DATABASE_ENCRYPTION_KEY environment variable is required")
-
-        self.engine = create_engine(
-            self.connection_string,
-            pool_size=5,
-            max_overflow=10,
-            pool_pre_ping=True,
-            pool_recycle=3600,
-            connect_args={
-                "keepalives": 1,
-                "keepalives_idle": 30,
-                "keepalives_interval": 10,
-                "tcp_user_timeout": 60000,
-            },
-            echo=False
-        )
-
-    def _setup_llm(self):
-        """Setup language model"""
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            temperature=0,
-            max_output_tokens=1000
-        )
+    @staticmethod
+    def _config_elderly_id(config: Optional[RunnableConfig]) -> Optional[str]:
+        """Elderly profile carried in the tool-call config by the insertion node"""
+        return ((config or {}).get("configurable") or {}).get("elderly_id")
 
     def insert_elderly_profile(self, profile_data:dict, elderly_id:str=None):
         """Insert a new elderly profile into the database"""
@@ -275,6 +247,7 @@ class InsertionAgent:
                     "created_at": created_at
                 }).fetchone()
                 conn.commit()
+                change_feed.publish("short_term_memory", elderly_id.strip(), str(result.id))
 
                 return {
                     "success": True,
@@ -318,6 +291,7 @@ class InsertionAgent:
                     "embedding": str(embedding)
                 }).fetchone()
                 conn.commit()
+                change_feed.publish("short_term_memory", elderly_id.strip(), str(result.id))
 
                 return {
                     "success": True,
@@ -367,6 +341,7 @@ class InsertionAgent:
                     "embedding": str(embedding)
                 }).fetchone()
                 conn.commit()
+                change_feed.publish("long_term_memory", elderly_id.strip(), str(result.id))
 
                 return {
                     "success": True,
@@ -421,6 +396,15 @@ class InsertionAgent:
                     "embedding": str(embedding) if embedding else None
                 }).fetchone()
                 conn.commit()
+                # Keep the medication / appointment index current without a reload (also
+                # publishes the write on the change feed)
+                healthcare_index.apply(elderly_id.strip(), {
+                    "id": str(result.id),
+                    "record_type": record_type.strip(),
+                    "description": description.strip(),
+                    "diagnosis_date": diagnosis_date,
+                    "last_updated": result.last_updated,
+                })
 
                 return {
                     "success": True,
@@ -442,21 +426,25 @@ class InsertionAgent:
         """Setup LangChain tools for the insertion functions"""
 
         @tool(args_schema=InsertShortTermSchema)
-        def insert_short_term_tool(content: str) -> str:
+        def insert_short_term_tool(content: str, config: RunnableConfig) -> str:
             """Insert a short-term memory item."""
-            result = self.insert_short_term(content=content)
+            result = self.insert_short_term(content=content, elderly_id=self._config_elderly_id(config))
             return str(result)
 
         @tool(args_schema=InsertLongTermSchema)
-        def insert_long_term_tool(category: LTMCategories, key: str, value: str) -> str:
+        def insert_long_term_tool(category: LTMCategories, key: str, value: str, config: RunnableConfig) -> str:
             """Insert a long-term memory fact (stable traits, demographics, preferences)."""
-            result = self.insert_long_term(category=category, key=key, value=value)
+            result = self.insert_long_term(category=category, key=key, value=value,
+                                           elderly_id=self._config_elderly_id(config))
             return str(result)
 
         @tool(args_schema=InsertHealthSchema)
-        def insert_health_tool(record_type: HealthRecordTypes, description: str, diagnosis_date: Optional[str] = None) -> str:
+        def insert_health_tool(record_type: HealthRecordTypes, description: str, config: RunnableConfig,
+                               diagnosis_date: Optional[str] = None) -> str:
             """Insert a healthcare record (conditions, medications, appointments)."""
-            result = self.insert_health_record(record_type=record_type, description=description, diagnosis_date=diagnosis_date)
+            result = self.insert_health_record(record_type=record_type, description=description,
+                                               diagnosis_date=diagnosis_date,
+                                               elderly_id=self._config_elderly_id(config))
             return str(result)
         self.insertion_tools = [insert_long_term_tool, insert_health_tool, insert_short_term_tool]
 
@@ -469,10 +457,14 @@ class InsertionAgent:
     def _setup_workflow(self):
         """Setup the LangGraph workflow"""
 
-        def react_insertion_node(state: AgentState):
+        def react_insertion_node(state: AgentState, config: RunnableConfig):
             system = SystemMessage(content=self.INSERTION_SYSTEM)
             input_msg = HumanMessage(content=state["user_input"])
-            react_result = self.react_insertion_agent.invoke({"messages": [system, input_msg]})
+            # Tools read the elderly profile from the config, not from the agent instance
+            configurable = {**(config.get("configurable") or {}), "elderly_id": state["elderly_id"]}
+            react_result = self.react_insertion_agent.invoke(
+                {"messages": [system, input_msg]}, config={**config, "configurable": configurable}
+            )
 
             last_ai = next(m for m in reversed(react_result["messages"]) if isinstance(m, AIMessage))
 
@@ -493,7 +485,7 @@ class InsertionAgent:
         workflow = StateGraph(AgentState)
 
         # Add nodes
-        workflow.add_node("Insertion_Agent", react_insertion_node)
+        workflow.add_node("Insertion_Agent", RunnableLambda(react_insertion_node))
         workflow.add_node("execute_insertion", ToolNode(self.insertion_tools))
 
         # Add edges
@@ -511,18 +503,24 @@ class InsertionAgent:
         # Compile graph
         self.graph = workflow.compile()
 
-    def process(self, user_input: str) -> dict:
+    def process(self, user_input: str, elderly_id: Optional[str] = None) -> dict:
         """
         Process user input and store relevant information in appropriate memory buckets.
 
         Args:
             user_input: The user's input text to process
+            elderly_id: Elderly profile to store for (defaults to the agent's elderly_id)
 
         Returns:
             dict: Result containing processing information and any stored data
         """
+        elderly_id = elderly_id or self.elderly_id
+        if not elderly_id:
+            return {"success": False, "error": "elderly_id is required", "user_input": user_input}
+
         initial_state = {
             "user_input": user_input,
+            "elderly_id": elderly_id,
             "messages": [],
             "final_answer": "",
             "insertion_agent_message": None,
@@ -530,7 +528,7 @@ class InsertionAgent:
         }
 
         try:
-            result = self.graph.invoke(initial_state)
+            result = self.graph.invoke(initial_state, config={"configurable": {"elderly_id": elderly_id}})
 
             # Extract tool call results from messages
             tool_results = []
@@ -0,0 +1,178 @@
+'''
+Calibrate the confidence gate of the "auto" router flow
+
+    python -m RAG.memory_router.calibrate_router [--target-accuracy 0.97] [--router stack|fused] [--output PATH]
+
+Rebuilds the held-out test split of the training notebooks (test_size=0.2, random_state=42,
+stratified; one split per topic OvA model, as each was trained on its own) from the CSVs in
+`data_augmentation`, scores it with the shipped `QAClassifier` / `TopicClassifier` and, per
+model, picks the smallest margin |2p - 1| at which the inputs the model keeps are at least
+`--target-accuracy` accurate. Inputs below the margin are escalated to the LLM.
+
+Writes the thresholds (and the held-out report) to `model_weights/router_thresholds.json`,
+which `graph_flow` loads on first use, and prints the expected escalation rate per model and
+of the whole gate (`escalation_reason`: QA and every topic margin) on the topic held-out
+sentences. Needs the SBERT model the classifiers were trained with (`google/embeddinggemma-300m`).
+
+`--router fused` calibrates the fused router (`fused_router.py`) instead, whose probabilities
+are not calibrated like the stack's, into `model_weights/fused_router_thresholds.json`
+(`train_fused_router.py` also writes it after training).
+'''
+import argparse
+import csv
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from RAG.memory_router.fused_router import FUSED_PATH, load_fused_router
+from RAG.memory_router.qa_classifier_class import QAClassifier
+from RAG.memory_router.router_confidence import (FUSED_THRESHOLDS_PATH, THRESHOLDS_PATH, calibrate_threshold,
+                                                 escalation_reason, margins)
+from RAG.memory_router.router_features import RouterFeatures
+from RAG.memory_router.topic_classifier_class import TopicClassifier
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data_augmentation")
+QA_DATA = os.path.join(DATA_DIR, "elderly_conversational_sentences.csv")
+TOPIC_DATA = os.path.join(DATA_DIR, "elderly_topical_conversational_sentences.csv")
+SEED = 42
+
+
+def held_out(y: np.ndarray) -> np.ndarray:
+    """Row indices of the notebooks' test split (depends only on the labels and the seed)"""
+    _, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=SEED, stratify=y)
+    return np.sort(test_idx)
+
+
+def read_rows(path: str) -> Tuple[List[str], List[str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return [row["text"] for row in rows], [row["label"] for row in rows]
+
+
+def qa_rows() -> Tuple[List[str], np.ndarray]:
+    """QA sentences and labels (1 = question) as trained on"""
+    texts, labels = read_rows(QA_DATA)
+    y = np.array([int(label == "1") for label in labels])
+    # Same augmentation as training: half of the questions lose their '?' (seeded here)
+    question_idx = [i for i, text in enumerate(texts) if text.endswith("?")]
+    for i in np.random.default_rng(SEED).choice(question_idx, size=len(question_idx) // 2, replace=False):
+        texts[i] = texts[i].rstrip("?")
+    return texts, y
+
+
+def qa_held_out() -> Tuple[List[str], np.ndarray]:
+    texts, y = qa_rows()
+    idx = held_out(y)
+    return [texts[i] for i in idx], y[idx]
+
+
+def report(margin: np.ndarray, correct: np.ndarray, target_accuracy: float) -> Dict[str, Any]:
+    threshold = calibrate_threshold(margin, correct, target_accuracy)
+    kept = margin >= threshold
+    return {
+        "threshold": threshold,
+        "n": int(len(margin)),
+        "accuracy": float(correct.mean()),
+        "kept_accuracy": float(correct[kept].mean()) if kept.any() else None,
+        "escalation_rate": float(1.0 - kept.mean()),
+    }
+
+
+def router_scorers(router: str, fused_path: str = FUSED_PATH):
+    """
+    (QA scorer, topic scorer, topic labels, SBERT model names) of the router the auto flow gates:
+    the QA / topic classifier stack, or the fused router (graph_flow's MEMORY_ROUTER_FUSED=1)
+    """
+    if router == "fused":
+        fused = load_fused_router(fused_path)
+
+        def fused_qa(texts, features):
+            labels, positive, _, _ = fused.score_batch(texts, features)
+            return labels, positive
+
+        def fused_topic(texts, features):
+            _, _, labels, positive = fused.score_batch(texts, features)
+            return labels, positive
+
+        return fused_qa, fused_topic, fused.topic_labels, {"fused": fused.sbert_model_name}
+    qa_model, topic_model = QAClassifier(), TopicClassifier()
+    return (qa_model.score_batch_qa, topic_model.score_batch_topic, list(topic_model.models_ova),
+            {"qa": qa_model.sbert_model_name, "topic": topic_model.sbert_model_name})
+
+
+def calibrate(router: str, target_accuracy: float, fused_path: str = FUSED_PATH) -> Dict[str, Any]:
+    """Thresholds of one router's heads on the held-out rows, with the held-out report"""
+    score_qa, score_topic, topic_label_names, sbert_models = router_scorers(router, fused_path)
+
+    texts, y = qa_held_out()
+    labels, positive = score_qa(texts, RouterFeatures(texts))
+    correct = np.array([label == "question" for label in labels]) == (y == 1)
+    results = {"qa": report(margins(positive), correct, target_accuracy)}
+
+    topic_texts, topic_labels = read_rows(TOPIC_DATA)
+    targets = {label: np.array([l == label for l in topic_labels]) for label in topic_label_names}
+    splits = {label: held_out(y.astype(int)) for label, y in targets.items()}
+    # Score the union of the three test splits once
+    union = np.unique(np.concatenate(list(splits.values())))
+    texts = [topic_texts[i] for i in union]
+    features = RouterFeatures(texts)
+    _, topic_positive = score_topic(texts, features)
+    results["topic"] = {}
+    for label, idx in splits.items():
+        positive = topic_positive[label][np.searchsorted(union, idx)]
+        correct = (positive > 0.5) == targets[label][idx]
+        results["topic"][label] = report(margins(positive), correct, target_accuracy)
+
+    thresholds = {
+        "router": router,
+        "qa": results["qa"]["threshold"],
+        "topic": {label: r["threshold"] for label, r in results["topic"].items()},
+        "target_accuracy": target_accuracy,
+        "sbert_model": sbert_models,
+        "held_out": results,
+    }
+
+    # Whole gate, as the auto flow applies it, on the topic held-out sentences
+    _, qa_positive = score_qa(texts, features)
+    qa_margin, topic_margin = margins(qa_positive), {label: margins(p) for label, p in topic_positive.items()}
+    escalated = [
+        escalation_reason({"qa": qa_margin[i], "topic": {label: m[i] for label, m in topic_margin.items()}},
+                          thresholds) is not None
+        for i in range(len(texts))
+    ]
+    results["auto_escalation_rate"] = float(np.mean(escalated))
+    results["auto_n"] = len(texts)
+    return thresholds
+
+
+def write_thresholds(thresholds: Dict[str, Any], output: str) -> None:
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(thresholds, f, indent=2)
+
+    results = thresholds["held_out"]
+    print(f"{thresholds['router']} router, target accuracy of kept inputs: {thresholds['target_accuracy']:.1%}")
+    print(f"{'model':14}{'n':>7}{'accuracy':>10}{'threshold':>11}{'kept acc':>10}{'escalated':>11}")
+    rows = [("qa", results["qa"])] + [(f"topic/{k}", r) for k, r in results["topic"].items()]
+    for name, r in rows:
+        kept = f"{r['kept_accuracy']:.1%}" if r["kept_accuracy"] is not None else "-"
+        print(f"{name:14}{r['n']:>7}{r['accuracy']:>10.1%}{r['threshold']:>11.3f}{kept:>10}{r['escalation_rate']:>11.1%}")
+    print(f"auto flow escalation rate on {results['auto_n']} topic held-out sentences: "
+          f"{results['auto_escalation_rate']:.1%}")
+    print(f"thresholds written to {output}")
+
+
+def run(target_accuracy: float, output: Optional[str], router: str) -> None:
+    output = output or (FUSED_THRESHOLDS_PATH if router == "fused" else THRESHOLDS_PATH)
+    write_thresholds(calibrate(router, target_accuracy), output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-accuracy", type=float, default=0.97)
+    parser.add_argument("--router", choices=("stack", "fused"), default="stack")
+    parser.add_argument("--output", help=f"default: {THRESHOLDS_PATH} (stack) / {FUSED_THRESHOLDS_PATH} (fused)")
+    args = parser.parse_args()
+    run(args.target_accuracy, args.output, args.router)
@@ -0,0 +1,69 @@
+'''
+Export the router's pickled model weights to the pickle-free `router_bundle.npz`
+
+    python -m RAG.memory_router.export_router_bundle [--qa-model PATH] [--output PATH]
+
+Unpickles the artifacts the classifiers were trained into (`qa_stacked_hybrid_model.pkl`,
+`qa_tfidf_vectorizer.pkl`, `log_reg_ova_*.pkl`, `topic_tfidf_vectorizer.pkl`,
+`topic_category_keywords.pkl`, `*_sbert_model_name.pkl`) once, offline, and writes them as one
+versioned `.npz` of plain arrays (see `router_bundle.py`). Exporting the stacked QA model needs
+xgboost and lightgbm installed; `--qa-model` can point at a linear QA model instead.
+
+Then reloads the bundle and checks that both classifiers predict and score exactly as the
+pickled ones on a sample of the training sentences.
+'''
+import argparse
+import csv
+import os
+
+import numpy as np
+
+from RAG.memory_router.qa_classifier_class import QAClassifier
+from RAG.memory_router.router_bundle import BUNDLE_PATH, load_bundle, write_bundle
+from RAG.memory_router.router_features import RouterFeatures
+from RAG.memory_router.topic_classifier_class import TopicClassifier
+
+DEFAULT_QA_MODEL = "RAG/memory_router/model_weights/qa_stacked_hybrid_model.pkl"
+CHECK_DATA = os.path.join(os.path.dirname(__file__), "data_augmentation", "elderly_topical_conversational_sentences.csv")
+CHECK_SENTENCES = 500
+
+
+def check_parity(pickled_qa: QAClassifier, pickled_topic: TopicClassifier, bundle_path: str) -> bool:
+    bundle = load_bundle(bundle_path)
+    bundled_qa, bundled_topic = QAClassifier.from_bundle(bundle), TopicClassifier.from_bundle(bundle)
+    with open(CHECK_DATA, newline="", encoding="utf-8") as f:
+        sentences = [row["text"] for row, _ in zip(csv.DictReader(f), range(CHECK_SENTENCES))]
+    features = RouterFeatures(sentences)
+
+    qa_labels, qa_proba = pickled_qa.score_batch_qa(sentences, features)
+    bundled_qa_labels, bundled_qa_proba = bundled_qa.score_batch_qa(sentences, features)
+    topic_labels, topic_proba = pickled_topic.score_batch_topic(sentences, features)
+    bundled_topic_labels, bundled_topic_proba = bundled_topic.score_batch_topic(sentences, features)
+
+    identical = qa_labels == bundled_qa_labels and topic_labels == bundled_topic_labels
+    max_diff = max([float(np.abs(qa_proba - bundled_qa_proba).max())]
+                   + [float(np.abs(topic_proba[k] - bundled_topic_proba[k]).max()) for k in topic_proba])
+    print(f"parity on {len(sentences)} sentences: labels identical: {identical}  max probability diff: {max_diff:.2e}")
+    return identical
+
+
+def run(qa_model_path: str, output: str) -> None:
+    qa, topic = QAClassifier(model_path=qa_model_path), TopicClassifier()
+    meta = write_bundle(
+        output,
+        qa_model=qa.model, qa_tfidf=qa.tfidf_vectorizer, qa_sbert_name=qa.sbert_model_name,
+        topic_models=topic.models_ova, topic_tfidf=topic.tfidf_vectorizer_topic,
+        topic_sbert_name=topic.sbert_model_name, keywords=topic.CATEGORY_KEYWORDS,
+    )
+    print(f"wrote {output} ({os.path.getsize(output) / 1024:.0f} KiB): format {meta['format']} v{meta['version']}, "
+          f"QA model {meta['qa']['kind']}, topic labels {meta['topic']['labels']}")
+    if not check_parity(qa, topic, output):
+        raise SystemExit("bundle does not reproduce the pickled models")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qa-model", default=DEFAULT_QA_MODEL)
+    parser.add_argument("--output", default=BUNDLE_PATH)
+    args = parser.parse_args()
+    run(args.qa_model, args.output)
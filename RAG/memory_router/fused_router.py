@@ -0,0 +1,138 @@
+'''
+Entry class is `FusedRouter`
+
+
+The offline router as one model: QA and the three topic OvA heads share a single feature
+pass and are scored by one matrix multiply (`model_weights/fused_router.npz`, trained by
+`train_fused_router.py`). Features per text, the same for every head:
+- TF-IDF of one vectorizer fitted on the QA and topic sentences together (sparse)
+- SBERT embedding (`google/embeddinggemma-300m`, shared with the other classifiers)
+- category keyword counts: one `CountVectorizer` over the keyword vocabulary times a
+  keyword -> category matrix (`KeywordCounter`), instead of a regex loop per category
+- the QA classifier's two question cues (ends with '?', starts with a question word)
+
+`score_batch` returns what `QAClassifier.score_batch_qa` + `TopicClassifier.score_batch_topic`
+return, so the graph can use either. Stored with the router bundle's pickle-free .npz layer.
+'''
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.special import expit
+from sklearn.feature_extraction.text import CountVectorizer
+
+from RAG.memory_router.router_bundle import load_tfidf, mmap_npz, save_npz, tfidf_arrays, tfidf_params
+from RAG.memory_router.router_features import RouterFeatures, linear_decision, load_sbert
+
+FUSED_PATH = "RAG/memory_router/model_weights/fused_router.npz"
+FUSED_FORMAT = "memory-router-fused"
+FUSED_VERSION = 1
+
+# Topic head -> key of its keyword list in topic_category_keywords.pkl
+KEYWORD_CATEGORIES = {"healthcare": "healthcare", "long-term": "longterm", "short-term": "shortterm"}
+QUESTION_WORDS = ('who', 'what', 'where', 'when', 'why', 'how', 'which')
+
+
+class KeywordCounter:
+    """
+    Per-category keyword counts of many texts in one sparse product. Matches
+    `TopicClassifier.count_category_words_topic`: lower-cased `\\b\\w+\\b` tokens, so only
+    single-word keywords can match.
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]], categories: List[str]):
+        self.keywords = keywords
+        self.categories = categories
+        vocabulary = sorted({w for category in categories for w in keywords[category]})
+        self.vectorizer = CountVectorizer(vocabulary=vocabulary, token_pattern=r"(?u)\b\w+\b", lowercase=True)
+        membership = np.array([[w in keywords[category] for category in categories] for w in vocabulary], dtype=float)
+        self.membership = sparse.csr_matrix(membership)
+
+    def counts(self, texts: List[str]) -> np.ndarray:
+        return np.asarray((self.vectorizer.transform(texts) @ self.membership).todense())
+
+
+def question_cues(texts: List[str]) -> np.ndarray:
+    """`QAClassifier._extract_simple_nlp_features` of every text"""
+    lowered = [t.lower() for t in texts]
+    return np.array([[t.endswith('?'), t.split()[0] in QUESTION_WORDS if t.split() else False] for t in lowered],
+                    dtype=float).reshape(len(texts), 2)
+
+
+class FusedRouter:
+    """
+    QA + multi-label topic router with shared features and stacked linear heads.
+    `coef_` (heads x features) / `intercept_` are laid out like a sklearn linear model, so
+    `linear_decision` scores all heads at once with the TF-IDF block kept sparse.
+    """
+
+    def __init__(self, tfidf_vectorizer, sbert_model_name: str, keywords: Dict[str, List[str]],
+                 topic_labels: List[str], coef: np.ndarray, intercept: np.ndarray):
+        self.tfidf_vectorizer = tfidf_vectorizer
+        self.sbert_model_name = sbert_model_name
+        self.topic_labels = list(topic_labels)
+        self.heads = ["qa"] + self.topic_labels
+        self.keyword_counter = KeywordCounter(keywords, [KEYWORD_CATEGORIES[label] for label in self.topic_labels])
+        self.coef_, self.intercept_ = coef, intercept
+        # Shared with the QA / topic classifiers when they use the same model
+        self.sbert_model = load_sbert(self.sbert_model_name)
+
+    def feature_blocks(self, texts: List[str], features: Optional[RouterFeatures] = None):
+        """Sparse TF-IDF block and dense (SBERT + keyword counts + question cues) block"""
+        if features is None or not features.matches(texts):
+            features = RouterFeatures(texts)
+        X_tfidf = features.tfidf(self.tfidf_vectorizer)
+        X_sbert = features.embeddings(self.sbert_model_name)
+        return X_tfidf, np.hstack([X_sbert, self.keyword_counter.counts(texts), question_cues(texts)])
+
+    def logits(self, texts: List[str], features: Optional[RouterFeatures] = None) -> np.ndarray:
+        """(texts x heads) logits: column 0 is QA (question), then one column per topic label"""
+        X_tfidf, X_dense = self.feature_blocks(list(texts), features)
+        return linear_decision(self, X_tfidf, X_dense).reshape(len(texts), len(self.heads))
+
+    def score_batch(self, texts: List[str], features: Optional[RouterFeatures] = None
+                    ) -> Tuple[List[str], np.ndarray, List[List[str]], Dict[str, np.ndarray]]:
+        """QA labels, P(question), topic labels and each topic head's positive probability"""
+        if not texts:
+            return [], np.zeros(0), [], {label: np.zeros(0) for label in self.topic_labels}
+        proba = expit(self.logits(texts, features))
+        qa_labels = ["question" if p > 0.5 else "statement" for p in proba[:, 0]]
+        topic_labels = [[label for label, p in zip(self.topic_labels, row) if p > 0.5] for row in proba[:, 1:]]
+        return qa_labels, proba[:, 0], topic_labels, {label: proba[:, i + 1] for i, label in enumerate(self.topic_labels)}
+
+    def classify_batch(self, texts: List[str], features: Optional[RouterFeatures] = None
+                       ) -> Tuple[List[str], List[List[str]]]:
+        qa_labels, _, topic_labels, _ = self.score_batch(texts, features)
+        return qa_labels, topic_labels
+
+    def save(self, path: str = FUSED_PATH) -> Dict[str, Any]:
+        meta = {
+            "format": FUSED_FORMAT,
+            "version": FUSED_VERSION,
+            "sbert_model": self.sbert_model_name,
+            "tfidf": tfidf_params(self.tfidf_vectorizer),
+            "heads": self.heads,
+            "keywords": {category: list(words) for category, words in self.keyword_counter.keywords.items()},
+        }
+        save_npz(path, {**tfidf_arrays("fused", self.tfidf_vectorizer), "fused.coef": self.coef_,
+                        "fused.intercept": self.intercept_}, meta)
+        return meta
+
+
+def load_fused_router(path: str = FUSED_PATH) -> FusedRouter:
+    arrays = mmap_npz(path)
+    meta = json.loads(bytes(arrays["meta"]).decode("utf-8"))
+    if meta.get("format") != FUSED_FORMAT or meta.get("version") != FUSED_VERSION:
+        raise ValueError(
+            f"{path}: unsupported fused router {meta.get('format')} v{meta.get('version')}, "
+            f"expected {FUSED_FORMAT} v{FUSED_VERSION} (re-run train_fused_router.py)"
+        )
+    return FusedRouter(
+        tfidf_vectorizer=load_tfidf(meta["tfidf"], arrays["fused.tfidf.vocab"], arrays["fused.tfidf.idf"]),
+        sbert_model_name=meta["sbert_model"],
+        keywords=meta["keywords"],
+        topic_labels=meta["heads"][1:],
+        coef=arrays["fused.coef"],
+        intercept=arrays["fused.intercept"],
+    )
@@ -1,63 +1,249 @@
-from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel
-from typing import TypedDict, Literal, Optional, List
-from RAG.memory_router.qa_classifier_class import QAClassifier
-from RAG.memory_router.topic_classifier_class import TopicClassifier
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import HumanMessage
-import os, re
-
-from dotenv import load_dotenv
-
-# Load API key
-load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-
-gemini_client = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0,
-    max_output_tokens=1000,
-    api_key=api_key
-)
+from typing import TypedDict, Literal, Optional, List, Dict, Any
+from RAG.utils.metrics import metrics
+from RAG.memory_router.router_cache import RouterCache, normalize_text
+import asyncio, logging, os, re, threading, time
+from functools import lru_cache
+
+# Import stays cheap: LangGraph, the Gemini client, the classifier pickles / SBERT (and the
+# numpy / scipy stack behind them) are imported and built on first use or by warmup().
+# `app`, `qa_model`, `topic_model`, `fused_router`, `gemini_client` and `AUTO_THRESHOLDS` resolve lazily
+# through the module-level __getattr__ at the bottom of this file.
+_lazy_lock = threading.RLock()
+
+def _lazy(name: str, build):
+    """Module global `name`, built once (thread-safe) on first access."""
+    value = globals().get(name)
+    if value is None:
+        with _lazy_lock:
+            value = globals().get(name)
+            if value is None:
+                value = globals()[name] = build()
+    return value
+
+def _build_gemini_client():
+    from dotenv import load_dotenv
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    # Load API key
+    load_dotenv()
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        temperature=0,
+        max_output_tokens=1000,
+        api_key=os.getenv("GOOGLE_API_KEY")
+    )
+
+@lru_cache(maxsize=None)
+def _router_bundle():
+    """Pickle-free RouterBundle shared by both classifiers; None until export_router_bundle.py has run."""
+    from RAG.memory_router.router_bundle import BUNDLE_PATH, load_bundle
+    if not os.path.exists(BUNDLE_PATH):
+        logging.warning(f"❌ Router bundle not found at {BUNDLE_PATH}, loading the pickled models (run export_router_bundle.py)")
+        return None
+    return load_bundle(BUNDLE_PATH)
+
+def _build_qa_model():
+    from RAG.memory_router.qa_classifier_class import QAClassifier
+    bundle = _router_bundle()
+    return QAClassifier.from_bundle(bundle) if bundle is not None else QAClassifier()
+
+def _build_topic_model():
+    from RAG.memory_router.topic_classifier_class import TopicClassifier
+    bundle = _router_bundle()
+    return TopicClassifier.from_bundle(bundle) if bundle is not None else TopicClassifier()
+
+# Opt-in: serve the offline / auto flows with the fused router (fused_router.py) instead of the
+# QA + topic classifier stack; needs model_weights/fused_router.npz from train_fused_router.py,
+# and the auto flow also its own fused_router_thresholds.json (written by the same script)
+USE_FUSED_ROUTER = os.getenv("MEMORY_ROUTER_FUSED", "0") == "1"
+
+def _build_fused_router():
+    from RAG.memory_router.fused_router import load_fused_router
+    return load_fused_router()
+
+def _build_thresholds():
+    from RAG.memory_router.router_confidence import FUSED_THRESHOLDS_PATH, load_thresholds
+    # The fused router's margins are gated by its own calibration, never the stack's
+    if USE_FUSED_ROUTER:
+        return load_thresholds(FUSED_THRESHOLDS_PATH, router="fused")
+    return load_thresholds()
+
+def get_gemini_client():
+    return _lazy("gemini_client", _build_gemini_client)
+
+def get_qa_model():
+    return _lazy("qa_model", _build_qa_model)
+
+def get_topic_model():
+    return _lazy("topic_model", _build_topic_model)
+
+def get_fused_router():
+    """FusedRouter when MEMORY_ROUTER_FUSED=1, else None (the QA / topic classifiers are used)"""
+    return _lazy("fused_router", _build_fused_router) if USE_FUSED_ROUTER else None
+
+def get_thresholds() -> Dict[str, Any]:
+    """Margin thresholds of the auto flow's confidence gate for the active router, calibrated by calibrate_router.py"""
+    return _lazy("AUTO_THRESHOLDS", _build_thresholds)
 
 # Unified state definition
 class ClassificationState(TypedDict):
     text: str
-    flow_type: Literal["online", "offline"]
+    flow_type: Literal["online", "offline", "auto"]
     qa: Optional[str]
     topic: Optional[List[str]]  # now multi-label
+    features: Optional[Any]  # RouterFeatures: shared TF-IDF / SBERT pass of the offline flow
+    qa_confidence: Optional[float]  # QA margin |2p - 1| (offline / auto flows)
+    topic_confidence: Optional[Dict[str, float]]  # margin of each topic OvA model
+    escalated: Optional[bool]  # auto flow: local classifiers were unsure, LLM answered
 
-# Define nodes
-qa_model = QAClassifier()
-topic_model = TopicClassifier()
+# Repeated utterances (router_cache.py): local classifier results per normalized text, and
+# Gemini answers, which expire (the LLM is not deterministic and its prompt may change)
+CLASSIFICATION_CACHE_SIZE = int(os.getenv("MEMORY_ROUTER_CACHE_SIZE", "4096"))
+LLM_CACHE_SIZE = int(os.getenv("MEMORY_ROUTER_LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("MEMORY_ROUTER_LLM_CACHE_TTL", "3600"))
+classification_cache = RouterCache("classification", CLASSIFICATION_CACHE_SIZE)
+llm_cache = RouterCache("llm", LLM_CACHE_SIZE, LLM_CACHE_TTL_SECONDS)
 
-def qa_node(state: ClassificationState) -> ClassificationState:
-    """Run offline QA classifier."""
-    result = qa_model.classify_text_qa({
-        "text": state["text"],
-        "qa": state.get("qa", "")
-    })
-    state["qa"] = result["qa"]
+# Offline topic when no OvA model fires
+DEFAULT_TOPICS = ["short-term"]
+# Texts per feature pass in classify_offline_batch (bounds SBERT / feature memory of backfills)
+OFFLINE_BATCH_SIZE = 256
+
+def features_node(state: ClassificationState) -> ClassificationState:
+    """Start the offline flow's shared feature pass (SBERT encodes once for both classifiers)."""
+    from RAG.memory_router.router_features import RouterFeatures
+    state["features"] = RouterFeatures([state["text"]])
     return state
 
-def topic_node(state: ClassificationState) -> ClassificationState:
+# QA and topic run in parallel branches, so each returns only the keys it owns
+def qa_node(state: ClassificationState) -> Dict[str, Any]:
+    """Run offline QA classifier."""
+    from RAG.memory_router.router_confidence import margins
+    labels, positive = get_qa_model().score_batch_qa([state["text"]], state.get("features"))
+    return {"qa": labels[0], "qa_confidence": float(margins(positive)[0])}
+
+def topic_node(state: ClassificationState) -> Dict[str, Any]:
     """Run offline topic classifier (multi-label)."""
-    result = topic_model.classify_text_topic({
-        "text": state["text"],
-        "topic": state.get("topic", [])
-    })
-    topics = result.get("topic") or []
-    if not topics:
-        topics = ["short-term"]
-    
-    state["topic"] = topics
+    from RAG.memory_router.router_confidence import margins
+    labels, positive = get_topic_model().score_batch_topic([state["text"]], state.get("features"))
+    return {
+        "topic": labels[0] or list(DEFAULT_TOPICS),
+        "topic_confidence": {label: float(margins(p)[0]) for label, p in positive.items()},
+    }
+
+def fused_node(state: ClassificationState) -> Dict[str, Any]:
+    """Offline QA + topic from the fused router: one feature pass, one matrix multiply."""
+    from RAG.memory_router.router_confidence import margins
+    qas, qa_positive, topics, topic_positive = get_fused_router().score_batch([state["text"]], state.get("features"))
+    return {
+        "qa": qas[0], "qa_confidence": float(margins(qa_positive)[0]),
+        "topic": topics[0] or list(DEFAULT_TOPICS),
+        "topic_confidence": {label: float(margins(p)[0]) for label, p in topic_positive.items()},
+    }
+
+def join_node(state: ClassificationState) -> Dict[str, Any]:
+    """Barrier after the QA / topic fan-out; both branches' updates are merged into the state by now."""
+    return {}
+
+def needs_llm(qa_confidence: float, topic_confidence: Dict[str, float]) -> bool:
+    """Auto flow gate: True when a local classifier is below its calibrated margin."""
+    from RAG.memory_router.router_confidence import escalation_reason
+    reason = escalation_reason({"qa": qa_confidence, "topic": topic_confidence}, get_thresholds())
+    metrics.incr("router_auto_total")
+    if reason is None:
+        return False
+    metrics.incr("router_auto_escalated_total")
+    metrics.incr("router_auto_escalated_reason_total", reason=reason)
+    return True
+
+def confidence_gate_node(state: ClassificationState) -> ClassificationState:
+    state["escalated"] = needs_llm(state["qa_confidence"], state["topic_confidence"])
     return state
 
+def classify_offline_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """Offline flow for many texts: cached results for repeated texts, the rest scored in batches."""
+    cached = [classification_cache.get(text) for text in texts]
+    # Each distinct uncached text is scored once
+    missing = list({normalize_text(t): t for t, entry in zip(texts, cached) if entry is None}.values())
+    scored = {}
+    for result in _score_offline_batch(missing):
+        classification_cache.set(result["text"], result)
+        scored[normalize_text(result["text"])] = result
+    results = []
+    for text, entry in zip(texts, cached):
+        entry = entry or scored[normalize_text(text)]
+        # Fresh dicts: callers (the auto flow) update qa / topic in place
+        results.append({**entry, "text": text, "topic": list(entry["topic"]),
+                        "topic_confidence": dict(entry["topic_confidence"])})
+    return results
+
+def _score_offline_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """Local classifiers on many texts: one shared feature pass and one predict per model per chunk."""
+    from RAG.memory_router.router_confidence import margins
+    from RAG.memory_router.router_features import RouterFeatures
+    fused = get_fused_router()
+    if fused is None:
+        qa_model, topic_model = get_qa_model(), get_topic_model()
+    results = []
+    for start in range(0, len(texts), OFFLINE_BATCH_SIZE):
+        chunk = texts[start:start + OFFLINE_BATCH_SIZE]
+        features = RouterFeatures(chunk)
+        if fused is not None:
+            qas, qa_positive, topics, topic_positive = fused.score_batch(chunk, features)
+        else:
+            qas, qa_positive = qa_model.score_batch_qa(chunk, features)
+            topics, topic_positive = topic_model.score_batch_topic(chunk, features)
+        qa_margins = margins(qa_positive)
+        topic_margins = {label: margins(p) for label, p in topic_positive.items()}
+        results.extend(
+            {
+                "text": text, "qa": qa, "topic": topic or list(DEFAULT_TOPICS),
+                "qa_confidence": float(qa_margins[i]),
+                "topic_confidence": {label: float(m[i]) for label, m in topic_margins.items()},
+            }
+            for i, (text, qa, topic) in enumerate(zip(chunk, qas, topics))
+        )
+    return results
+
+def _escalations(results: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Gate every result; the unsure ones grouped by normalized text, so each is asked once."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        result["escalated"] = needs_llm(result["qa_confidence"], result["topic_confidence"])
+        if result["escalated"]:
+            groups.setdefault(normalize_text(result["text"]), []).append(result)
+    return groups
+
+def _llm_state(result: Dict[str, Any]) -> ClassificationState:
+    return {"text": result["text"], "qa": result["qa"], "topic": result["topic"], "escalated": True}
+
+def _apply_answer(group: List[Dict[str, Any]], answer: ClassificationState) -> None:
+    for result in group:
+        result["qa"], result["topic"] = answer["qa"], list(answer["topic"])
+
+def classify_auto_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """Auto flow for many texts: batched local classifiers, the LLM once per distinct unsure text."""
+    results = classify_offline_batch(texts)
+    for group in _escalations(results).values():
+        _apply_answer(group, llm_node(_llm_state(group[0])))
+    return results
+
+async def aclassify_auto_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """`classify_auto_batch` for async callers: local pass in a worker thread, escalations awaited concurrently."""
+    results = await asyncio.to_thread(classify_offline_batch, texts)
+    groups = list(_escalations(results).values())
+    answers = await asyncio.gather(*(allm_node(_llm_state(group[0])) for group in groups))
+    for group, answer in zip(groups, answers):
+        _apply_answer(group, answer)
+    return results
+
 class ClassificationResult(BaseModel):
     topic: List[str]
     qa: str
 
-def llm_node(state: ClassificationState) -> ClassificationState:
+def _llm_prompt(state: ClassificationState) -> List[Any]:
+    from langchain.schema import HumanMessage
     prompt = (
         f"Classify the following text into topic(s) and QA type.\n\n"
         f"Text: {state['text']}\n\n"
@@ -66,8 +252,9 @@ def llm_node(state: ClassificationState) -> ClassificationState:
         f"Allowed topics: healthcare, long-term, short-term. QA type: question or statement.\n"
         f"Reply ONLY with JSON, no extra text or Markdown."
     )
-    
-    llm_response = gemini_client.invoke([HumanMessage(content=prompt)])
+    return [HumanMessage(content=prompt)]
+
+def _apply_llm_response(state: ClassificationState, llm_response) -> ClassificationState:
     content = llm_response.content.strip()
 
     # Remove triple backticks if present
@@ -78,46 +265,135 @@ def llm_node(state: ClassificationState) -> ClassificationState:
     try:
         result = ClassificationResult.parse_raw(content)
     except Exception as e:
+        if state.get("escalated"):
+            # Auto flow: keep the local classifiers' answer rather than the defaults
+            print("LLM output parsing failed, keeping local labels:", repr(content))
+            return state
         print("LLM output parsing failed, using defaults:", repr(content))
         result = ClassificationResult(topic=["short-term"], qa="unknown")
 
     # Update state
     state["topic"] = result.topic
     state["qa"] = result.qa
+    llm_cache.set(state["text"], (result.qa, tuple(result.topic)))
 
     return state
 
-# Build LangGraph
-graph = StateGraph(ClassificationState)
+def _from_llm_cache(state: ClassificationState) -> bool:
+    """Fill qa / topic from a cached Gemini answer for the same text; False on a miss."""
+    cached = llm_cache.get(state["text"])
+    if cached is None:
+        return False
+    state["qa"], state["topic"] = cached[0], list(cached[1])
+    return True
+
+def llm_node(state: ClassificationState) -> ClassificationState:
+    if _from_llm_cache(state):
+        return state
+    return _apply_llm_response(state, get_gemini_client().invoke(_llm_prompt(state)))
 
-graph.add_node("QAClassifier", qa_node)
-graph.add_node("TopicClassifier", topic_node)
-graph.add_node("LLMClassifier", llm_node)
+async def allm_node(state: ClassificationState) -> ClassificationState:
+    """`llm_node` for `app.ainvoke`: awaits Gemini instead of blocking a worker thread."""
+    if _from_llm_cache(state):
+        return state
+    return _apply_llm_response(state, await get_gemini_client().ainvoke(_llm_prompt(state)))
 
 # Conditional branch from START
 def choose_flow(state: ClassificationState):
     if state["flow_type"] == "online":
         return "LLMClassifier"
-    elif state["flow_type"] == "offline":
-        return "QAClassifier"
+    elif state["flow_type"] in ("offline", "auto"):
+        return "FeatureExtractor"
     else:
-        raise ValueError(f"Invalid flow_type, please select offline or online: {state['flow_type']}")
-
-graph.add_conditional_edges(
-    START,
-    choose_flow,
-    {
-        "LLMClassifier": "LLMClassifier",
-        "QAClassifier": "QAClassifier"
-    }
-)
+        raise ValueError(f"Invalid flow_type, please select offline, online or auto: {state['flow_type']}")
+
+# langgraph.graph.END, spelled out so routing does not import LangGraph
+_END = "__end__"
+
+# Auto flow: the gate sends low-confidence inputs on to the LLM
+def after_local(state: ClassificationState):
+    return "ConfidenceGate" if state["flow_type"] == "auto" else _END
+
+def after_gate(state: ClassificationState):
+    return "LLMClassifier" if state["escalated"] else _END
+
+def _build_app():
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph, START, END
+
+    # Build LangGraph
+    graph = StateGraph(ClassificationState)
+
+    graph.add_node("FeatureExtractor", features_node)
+    graph.add_node("JoinClassifiers", join_node)
+    graph.add_node("ConfidenceGate", confidence_gate_node)
+    graph.add_node("LLMClassifier", RunnableLambda(llm_node, afunc=allm_node))
+
+    graph.add_conditional_edges(
+        START,
+        choose_flow,
+        {
+            "LLMClassifier": "LLMClassifier",
+            "FeatureExtractor": "FeatureExtractor"
+        }
+    )
+
+    if USE_FUSED_ROUTER:
+        # Offline flow: one fused model scores QA and topic together
+        graph.add_node("FusedClassifier", fused_node)
+        graph.add_edge("FeatureExtractor", "FusedClassifier")
+        graph.add_edge("FusedClassifier", "JoinClassifiers")
+    else:
+        # Offline flow: QA and topic fan out from the shared features and run concurrently
+        graph.add_node("QAClassifier", qa_node)
+        graph.add_node("TopicClassifier", topic_node)
+        graph.add_edge("FeatureExtractor", "QAClassifier")
+        graph.add_edge("FeatureExtractor", "TopicClassifier")
+        graph.add_edge(["QAClassifier", "TopicClassifier"], "JoinClassifiers")
+
+    graph.add_conditional_edges("JoinClassifiers", after_local, {"ConfidenceGate": "ConfidenceGate", END: END})
+    graph.add_conditional_edges("ConfidenceGate", after_gate, {"LLMClassifier": "LLMClassifier", END: END})
+
+    # LLM flow ends directly
+    graph.add_edge("LLMClassifier", END)
+
+    # Compile
+    return graph.compile()
+
+def get_app():
+    """Compiled LangGraph router (built on first use)."""
+    return _lazy("app", _build_app)
+
+def warmup(text: str = "When do I take my medicine?", online: bool = True) -> Dict[str, float]:
+    """
+    Load everything the router uses and run one offline classification, so the first request
+    does not pay for it. `online=False` skips the Gemini client (no API key needed).
+    Returns milliseconds per stage.
+    """
+    models = [("fused_router", get_fused_router)] if USE_FUSED_ROUTER else [("qa_model", get_qa_model),
+                                                                             ("topic_model", get_topic_model)]
+    stages = models + [("thresholds", get_thresholds), ("graph", get_app)]
+    if online:
+        stages.append(("gemini_client", get_gemini_client))
+    stages.append(("offline_invoke", lambda: get_app().invoke({"text": text, "flow_type": "offline"})))
 
-# Offline flow chain
-graph.add_edge("QAClassifier", "TopicClassifier")
-graph.add_edge("TopicClassifier", END)
+    timings = {}
+    for stage, load in stages:
+        started = time.perf_counter()
+        load()
+        timings[stage] = round((time.perf_counter() - started) * 1000.0, 1)
+    return timings
 
-# LLM flow ends directly
-graph.add_edge("LLMClassifier", END)
+_LAZY_ATTRIBUTES = {
+    "app": get_app,
+    "qa_model": get_qa_model,
+    "topic_model": get_topic_model,
+    "fused_router": get_fused_router,
+    "gemini_client": get_gemini_client,
+    "AUTO_THRESHOLDS": get_thresholds,
+}
 
-# Compile
-app = graph.compile()
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
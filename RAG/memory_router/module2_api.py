@@ -1,46 +1,198 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from RAG.memory_router.graph_flow import app as compiled_graph 
 from typing import Literal, List, Optional, Dict, Any
-from moduel_1.module1 import NaturalLanguageToJSONPipeline
+
+from RAG.utils.metrics import metrics
 
 # Request model
 class FlowRequest(BaseModel):
     text: str
-    flow_type: Literal["offline", "online"]
+    flow_type: Literal["offline", "online", "auto"]
+
+# Batch request model (offline backfills): every text is classified as given
+class BatchFlowRequest(BaseModel):
+    texts: List[str]
+    flow_type: Literal["offline", "online", "auto"] = "offline"
+
+# Per-sentence / per-text classification
+class SentenceResult(BaseModel):
+    text: str
+    qa: Optional[str]
+    topic: List[str]
+    escalated: Optional[bool] = None  # auto flow: answered by the LLM
 
-# Response model
+# Response model; qa / topic cover the whole utterance, sentences has each sentence's labels
 class FlowResponse(BaseModel):
     qa: Optional[str]
     topic: Optional[List[str]]
     module1_output: Optional[Dict[str, Any]]
+    sentences: List[SentenceResult] = []
+
+class BatchFlowResponse(BaseModel):
+    results: List[SentenceResult]
+
+
+class RouterModels:
+    """
+    Module 1 pipeline (spaCy en_core_web_lg + Gemini client), QA / topic classifiers and the
+    compiled LangGraph, loaded once per process by the lifespan handler
+    """
+
+    # Offline (classifier-only) warm-up input: exercises spaCy, SBERT and both classifiers
+    # without a Gemini call
+    WARMUP_TEXT = "When do I take my medicine?"
+
+    def __init__(self):
+        self.status = "loading"  # loading -> ready | failed
+        self.error: Optional[str] = None
+        self.load_ms: Dict[str, float] = {}
+        self.pipeline = None
+        self.graph = None
+        self.classify_offline_batch = None
+        self.aclassify_auto_batch = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def _timed(self, stage: str, started: float) -> None:
+        self.load_ms[stage] = round((time.perf_counter() - started) * 1000.0, 1)
+
+    def load(self) -> None:
+        try:
+            from RAG.memory_router import graph_flow
+            # Classifiers, SBERT, Gemini client and the compiled graph, plus one offline invoke
+            self.load_ms.update(graph_flow.warmup(self.WARMUP_TEXT))
+            self.graph = graph_flow.get_app()
+            self.classify_offline_batch = graph_flow.classify_offline_batch
+            self.aclassify_auto_batch = graph_flow.aclassify_auto_batch
+
+            started = time.perf_counter()
+            from moduel_1.module1 import NaturalLanguageToJSONPipeline
+            self.pipeline = NaturalLanguageToJSONPipeline()
+            self._timed("pipeline", started)
+
+            started = time.perf_counter()
+            prep = self.pipeline.pre.process(self.WARMUP_TEXT)
+            self.pipeline.extractor.extract(prep["cleaned"], prep["sentences"])
+            self._timed("pipeline_warmup", started)
+
+            self.status = "ready"
+            logging.info(f"Module 2 models ready: {self.load_ms}")
+
+        except Exception as e:
+            self.status, self.error = "failed", str(e)
+            logging.warning(f"❌ Module 2 model loading failed: {str(e)}")
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "error": self.error,
+            "load_ms": self.load_ms,
+            "pipeline_loaded": self.pipeline is not None,
+            "graph_loaded": self.graph is not None,
+            "auto_escalation_rate": metrics.ratio("router_auto_escalated_total", "router_auto_total"),
+            "cache_hit_rate": {
+                cache: metrics.ratio("router_cache_hits_total", "router_cache_lookups_total", cache=cache)
+                for cache in ("classification", "llm")
+            },
+        }
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models load in a worker thread so /healthz answers (and /readyz reports 'loading')
+    # while spaCy and the SBERT models come up
+    models = RouterModels()
+    app.state.models = models
+    loading = asyncio.create_task(asyncio.to_thread(models.load))
+    yield
+    if not loading.done():
+        await loading
+
 
 # Initialize FastAPI
-app = FastAPI(title="Module 2 API")
+app = FastAPI(title="Module 2 API", lifespan=lifespan)
+
+
+def _models(request: Request) -> RouterModels:
+    models: RouterModels = request.app.state.models
+    if not models.ready:
+        raise HTTPException(status_code=503, detail=f"Models not ready: {models.status}")
+    return models
+
+
+@app.get("/healthz")
+def healthz(request: Request):
+    """Liveness: the process is up; reports model load state without gating on it."""
+    return request.app.state.models.describe()
+
+
+@app.get("/readyz")
+def readyz(request: Request):
+    """Readiness: 200 once the pipeline, classifiers and graph are loaded and warmed up."""
+    models: RouterModels = request.app.state.models
+    return JSONResponse(status_code=200 if models.ready else 503, content=models.describe())
+
+
+def _topics(topic) -> List[str]:
+    # Ensure topic is always a list
+    if not isinstance(topic, list):
+        return [topic] if topic else []
+    return topic
+
+
+async def _classify(models: RouterModels, texts: List[str], flow_type: str) -> List[Dict[str, Any]]:
+    """
+    Offline: one batched feature pass over all texts (worker thread). Online: the graph's
+    `ainvoke` per text, LLM calls awaited concurrently. Auto: both, LLM only when unsure.
+    """
+    if flow_type == "offline":
+        return await asyncio.to_thread(models.classify_offline_batch, texts)
+    if flow_type == "auto":
+        return await models.aclassify_auto_batch(texts)
+    results = await asyncio.gather(*(models.graph.ainvoke({"text": text, "flow_type": flow_type}) for text in texts))
+    return [
+        {"text": text, "qa": result.get("qa"), "topic": _topics(result.get("topic"))}
+        for text, result in zip(texts, results)
+    ]
+
 
 @app.post("/invoke", response_model=FlowResponse)
-def invoke_flow(request: FlowRequest):
-    """Invoke the compiled LangGraph workflow safely via FastAPI."""
-    
+async def invoke_flow(request: FlowRequest, http_request: Request):
+    """Invoke the compiled LangGraph workflow safely via FastAPI, for every sentence of the text."""
+    models = _models(http_request)
+
     input_data = request.model_dump()
-    
+
     # Validate flow_type
-    if input_data["flow_type"] not in ("offline", "online"):
+    if input_data["flow_type"] not in ("offline", "online", "auto"):
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid flow_type: {input_data['flow_type']}. Must be 'offline' or 'online'."
+            detail=f"Invalid flow_type: {input_data['flow_type']}. Must be 'offline', 'online' or 'auto'."
         )
 
-    pipeline = NaturalLanguageToJSONPipeline()
-    module1_output = pipeline.run(input_data['text'])
+    module1_output = await asyncio.to_thread(models.pipeline.run, input_data['text'])
 
-    # Need to change for multiple sentences?
-    input_data['text'] = module1_output["sentences"][0]
+    # Module 1 returns an error payload (no sentences) when its schema validation fails
+    sentences = module1_output.get("sentences") or models.pipeline.pre.process(input_data['text'])["sentences"]
+    results = await _classify(models, sentences, input_data["flow_type"])
 
-    result = compiled_graph.invoke(input_data)
+    # Utterance level: a question if any sentence is one; topics of all sentences, first seen first
+    qa = "question" if any(r["qa"] == "question" for r in results) else results[0]["qa"]
+    topic = list(dict.fromkeys(t for r in results for t in r["topic"]))
+
+    return {"qa": qa, "topic": topic, "module1_output": module1_output, "sentences": results}
 
-    # Ensure topic is always a list
-    if not isinstance(result.get("topic"), list):
-        result["topic"] = [result["topic"]] if result.get("topic") else []
 
-    return {"qa": result.get("qa"), "topic": result.get("topic"), "module1_output": module1_output}
+@app.post("/invoke_batch", response_model=BatchFlowResponse)
+async def invoke_batch(request: BatchFlowRequest, http_request: Request):
+    """Classify many texts (offline backfills) without Module 1; offline runs one batched feature pass."""
+    models = _models(http_request)
+    return {"results": await _classify(models, request.texts, request.flow_type)}
@@ -1,15 +1,18 @@
-from sentence_transformers import SentenceTransformer
-from typing import TypedDict, List, Literal, Optional
+from typing import TypedDict, List, Literal, Optional, Tuple
 import numpy as np
 import pickle
 import warnings
 
+from RAG.memory_router.router_bundle import RouterBundle
+from RAG.memory_router.router_features import RouterFeatures, load_sbert, predict_blocks, predict_proba_blocks
+
 
 class ClassificationState(TypedDict):
     text: str
-    flow_type: Literal["online", "offline"]
+    flow_type: Literal["online", "offline", "auto"]
     qa: Optional[str]
     topic: Optional[str]
+    features: Optional[RouterFeatures]
 
 
 class QAClassifier:
@@ -23,14 +26,28 @@ class QAClassifier:
         tfidf_path: str = "RAG/memory_router/model_weights/qa_tfidf_vectorizer.pkl",
         sbert_name_path: str = "RAG/memory_router/model_weights/qa_sbert_model_name.pkl",
     ):
-        # Load trained components
+        # Load trained components (pickles; `from_bundle` loads the same from router_bundle.npz)
         with open(model_path, "rb") as f:
-            self.model = pickle.load(f)
+            model = pickle.load(f)
         with open(tfidf_path, "rb") as f:
-            self.tfidf_vectorizer = pickle.load(f)
+            tfidf_vectorizer = pickle.load(f)
         with open(sbert_name_path, "rb") as f:
             sbert_model_name = pickle.load(f)
-        self.sbert_model = SentenceTransformer(sbert_model_name)
+        self._init_components(model, tfidf_vectorizer, sbert_model_name)
+
+    @classmethod
+    def from_bundle(cls, bundle: RouterBundle) -> "QAClassifier":
+        """Builds the classifier from a pickle-free `RouterBundle` (see router_bundle.py)."""
+        classifier = cls.__new__(cls)
+        classifier._init_components(bundle.qa_model, bundle.qa_tfidf, bundle.qa_sbert_name)
+        return classifier
+
+    def _init_components(self, model, tfidf_vectorizer, sbert_model_name: str) -> None:
+        self.model = model
+        self.tfidf_vectorizer = tfidf_vectorizer
+        self.sbert_model_name = sbert_model_name
+        # Shared with the topic classifier when both use the same model
+        self.sbert_model = load_sbert(self.sbert_model_name)
 
         # Define question-related words for heuristic features
         self.question_words = ['who', 'what', 'where', 'when', 'why', 'how', 'which']
@@ -43,19 +60,43 @@ class QAClassifier:
             int(words[0] in self.question_words if words else 0)
         ])
 
-    def _prepare_features(self, texts: List[str]) -> np.ndarray:
-        """Combines TF-IDF, SBERT, and simple NLP features into a single feature matrix."""
-        X_tfidf = self.tfidf_vectorizer.transform(texts).toarray()
-        X_sbert = self.sbert_model.encode(texts, show_progress_bar=False)
+    def _feature_blocks(self, texts: List[str], features: Optional[RouterFeatures] = None):
+        """Sparse TF-IDF block and dense (SBERT + simple NLP) block of the feature matrix."""
+        if features is None or not features.matches(texts):
+            features = RouterFeatures(texts)
+        X_tfidf = features.tfidf(self.tfidf_vectorizer)
+        X_sbert = features.embeddings(self.sbert_model_name)
         X_nlp = np.array([self._extract_simple_nlp_features(t) for t in texts])
-        return np.hstack([X_tfidf, X_sbert, X_nlp])
+        return X_tfidf, np.hstack([X_sbert, X_nlp])
+
+    def _prepare_features(self, texts: List[str], features: Optional[RouterFeatures] = None) -> np.ndarray:
+        """Combines TF-IDF, SBERT, and simple NLP features into a single (dense) feature matrix."""
+        X_tfidf, X_dense = self._feature_blocks(texts, features)
+        return np.hstack([X_tfidf.toarray(), X_dense])
+
+    def classify_batch_qa(self, texts: List[str], features: Optional[RouterFeatures] = None) -> List[str]:
+        """Question / statement label of every text, from one feature pass and one predict."""
+        if not texts:
+            return []
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        X_tfidf, X_dense = self._feature_blocks(list(texts), features)
+        preds = predict_blocks(self.model, X_tfidf, X_dense)
+        return ["question" if pred == 1 else "statement" for pred in preds]
+
+    def score_batch_qa(self, texts: List[str], features: Optional[RouterFeatures] = None) -> Tuple[List[str], np.ndarray]:
+        """Labels (as `classify_batch_qa`) and P(question) of every text, from one predict_proba."""
+        if not texts:
+            return [], np.zeros(0)
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        X_tfidf, X_dense = self._feature_blocks(list(texts), features)
+        proba = predict_proba_blocks(self.model, X_tfidf, X_dense)
+        preds = self.model.classes_[proba.argmax(axis=1)]
+        labels = ["question" if pred == 1 else "statement" for pred in preds]
+        return labels, proba[:, list(self.model.classes_).index(1)]
 
     def classify_text_qa(self, state: ClassificationState) -> ClassificationState:
         """Predicts whether the text is a question or statement."""
-        warnings.filterwarnings("ignore", message="X does not have valid feature names")
-        X_features = self._prepare_features([state["text"]])
-        pred = self.model.predict(X_features)
-        state["qa"] = "question" if pred[0] == 1 else "statement"
+        state["qa"] = self.classify_batch_qa([state["text"]], state.get("features"))[0]
         return state
 
 '''
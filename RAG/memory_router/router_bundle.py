@@ -0,0 +1,242 @@
+'''
+Entry functions are `load_bundle` and `write_bundle`; `save_npz` / `mmap_npz` are the
+storage layer (also used by the fused router, fused_router.py)
+
+
+One versioned, pickle-free artifact for the offline memory router (`model_weights/router_bundle.npz`,
+written by `export_router_bundle.py`). Plain arrays only (`allow_pickle=False`):
+- `meta`: UTF-8 JSON: format version, SBERT model names, TF-IDF settings, topic labels,
+  category keyword sets, the QA model kind and the dtype / shape of every array
+- `{qa,topic}.tfidf.vocab` / `.idf`: TF-IDF vocabulary (term per column) and IDF vector
+- `topic.<label>.{coef,intercept,classes}`: the topic OvA logistic regressions
+- QA `linear`: `qa.{coef,intercept,classes}`; QA `stacked` (LR + XGBoost + LightGBM -> LR,
+  as trained in qa_training.ipynb): the base / final LR coefficients plus the boosters in
+  their own formats (`qa.xgb`: XGBoost UBJSON, `qa.lgbm`: LightGBM model text) as bytes
+
+np.savez stores members uncompressed, so `load_bundle` memory-maps every array straight out of
+the zip: the pages are shared by all worker processes reading the same file.
+'''
+import json
+import zipfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+BUNDLE_PATH = "RAG/memory_router/model_weights/router_bundle.npz"
+BUNDLE_FORMAT = "memory-router-bundle"
+BUNDLE_VERSION = 1
+
+# TfidfVectorizer settings kept in `meta` (the rest are the library defaults, or callables
+# the shipped vectorizers do not use)
+TFIDF_PARAMS = ("analyzer", "binary", "lowercase", "max_df", "max_features", "min_df", "ngram_range", "norm",
+                "smooth_idf", "stop_words", "strip_accents", "sublinear_tf", "token_pattern", "use_idf")
+
+
+def mmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """
+    Read-only views of every array in the bundle over one memory map of the file. The .npy
+    headers are not parsed: dtype / shape / order come from the index in `meta`.
+    """
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+    data: Dict[str, Tuple[int, int]] = {}  # member -> (offset, size) of its array data
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} is compressed and cannot be memory-mapped")
+            # Local file header: 30 fixed bytes + file name + extra field, then the .npy file:
+            # magic (6) + version (2) + header length (2 bytes in v1, 4 in v2/v3) + header
+            start = info.header_offset + 30 + int(mapped[info.header_offset + 26:info.header_offset + 30].view("<u2").sum())
+            if mapped[start + 6] == 1:
+                offset = start + 10 + int(mapped[start + 8:start + 10].view("<u2")[0])
+            else:
+                offset = start + 12 + int(mapped[start + 8:start + 12].view("<u4")[0])
+            key = info.filename[:-len(".npy")] if info.filename.endswith(".npy") else info.filename
+            data[key] = (offset, start + info.file_size - offset)
+
+    offset, size = data.pop("meta")
+    arrays = {"meta": mapped[offset:offset + size]}
+    index = json.loads(_text(arrays["meta"]))["arrays"]
+    for key, (offset, _) in data.items():
+        entry = index[key]
+        arrays[key] = np.ndarray(tuple(entry["shape"]), dtype=np.dtype(entry["dtype"]), buffer=mapped,
+                                 offset=offset, order="F" if entry["fortran"] else "C")
+    return arrays
+
+
+def _text(array: np.ndarray) -> str:
+    return bytes(array).decode("utf-8")
+
+
+def _bytes(data) -> np.ndarray:
+    return np.frombuffer(data.encode("utf-8") if isinstance(data, str) else bytes(data), dtype=np.uint8)
+
+
+def _linear(coef: np.ndarray, intercept: np.ndarray, classes: np.ndarray) -> LogisticRegression:
+    """Fitted-state LogisticRegression (predict / predict_proba / split scoring) from its parameters"""
+    model = LogisticRegression()
+    model.coef_, model.intercept_, model.classes_ = coef, intercept, np.asarray(classes)
+    model.n_features_in_ = coef.shape[1]
+    return model
+
+
+def load_tfidf(params: Dict[str, Any], vocab: np.ndarray, idf: np.ndarray) -> TfidfVectorizer:
+    vectorizer = TfidfVectorizer(**{**params, "ngram_range": tuple(params["ngram_range"])})
+    vectorizer.vocabulary_ = dict(zip(vocab.tolist(), range(len(vocab))))
+    vectorizer.idf_ = idf
+    return vectorizer
+
+
+class StackedHybridModel:
+    """
+    The QA StackingClassifier (LR, XGBoost, LightGBM -> LR, passthrough) rebuilt from the
+    bundle; predict_proba / predict match the sklearn estimator on dense input
+    """
+
+    def __init__(self, base_lr: LogisticRegression, xgb_model: bytes, lgbm_model: str,
+                 final_lr: LogisticRegression, classes: np.ndarray, passthrough: bool):
+        # Imported here: only the stacked QA model needs the boosting libraries
+        import lightgbm
+        import xgboost
+
+        self.base_lr, self.final_lr = base_lr, final_lr
+        self.xgb = xgboost.Booster()
+        self.xgb.load_model(bytearray(xgb_model))
+        self.lgbm = lightgbm.Booster(model_str=lgbm_model)
+        # An early-stopped XGBClassifier predicts with the trees up to its best iteration only
+        best_iteration = self.xgb.attr("best_iteration")
+        self.xgb_iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+        self.classes_ = np.asarray(classes)
+        self.passthrough = passthrough
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        # Binary stacking keeps the positive-class column of each base model, then (passthrough) X
+        meta = [
+            self.base_lr.predict_proba(X)[:, 1:],
+            np.asarray(self.xgb.inplace_predict(X, iteration_range=self.xgb_iteration_range, missing=np.nan)).reshape(-1, 1),
+            np.asarray(self.lgbm.predict(X)).reshape(-1, 1),
+        ]
+        if self.passthrough:
+            meta.append(X)
+        return self.final_lr.predict_proba(np.hstack(meta))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class RouterBundle:
+    """Everything `QAClassifier.from_bundle` / `TopicClassifier.from_bundle` need"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], path: Optional[str] = None):
+        self.path = path
+        self.meta: Dict[str, Any] = json.loads(_text(arrays["meta"]))
+        if self.meta.get("format") != BUNDLE_FORMAT or self.meta.get("version") != BUNDLE_VERSION:
+            raise ValueError(
+                f"{path}: unsupported router bundle {self.meta.get('format')} v{self.meta.get('version')}, "
+                f"expected {BUNDLE_FORMAT} v{BUNDLE_VERSION} (re-run export_router_bundle.py)"
+            )
+
+        qa, topic = self.meta["qa"], self.meta["topic"]
+        self.qa_sbert_name: str = qa["sbert_model"]
+        self.qa_tfidf = load_tfidf(qa["tfidf"], arrays["qa.tfidf.vocab"], arrays["qa.tfidf.idf"])
+        if qa["kind"] == "linear":
+            self.qa_model = _linear(arrays["qa.coef"], arrays["qa.intercept"], arrays["qa.classes"])
+        elif qa["kind"] == "stacked":
+            self.qa_model = StackedHybridModel(
+                base_lr=_linear(arrays["qa.lr.coef"], arrays["qa.lr.intercept"], arrays["qa.classes"]),
+                xgb_model=bytes(arrays["qa.xgb"]),
+                lgbm_model=_text(arrays["qa.lgbm"]),
+                final_lr=_linear(arrays["qa.final.coef"], arrays["qa.final.intercept"], arrays["qa.classes"]),
+                classes=arrays["qa.classes"],
+                passthrough=qa["passthrough"],
+            )
+        else:
+            raise ValueError(f"{path}: unknown QA model kind {qa['kind']}")
+
+        self.topic_sbert_name: str = topic["sbert_model"]
+        self.topic_tfidf = load_tfidf(topic["tfidf"], arrays["topic.tfidf.vocab"], arrays["topic.tfidf.idf"])
+        self.topic_models = {
+            label: _linear(arrays[f"topic.{label}.coef"], arrays[f"topic.{label}.intercept"],
+                           arrays[f"topic.{label}.classes"])
+            for label in topic["labels"]
+        }
+        self.keywords: Dict[str, List[str]] = topic["keywords"]
+
+
+def load_bundle(path: str = BUNDLE_PATH) -> RouterBundle:
+    return RouterBundle(mmap_npz(path), path)
+
+
+def tfidf_arrays(prefix: str, vectorizer) -> Dict[str, np.ndarray]:
+    vocab = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    return {f"{prefix}.tfidf.vocab": np.array(vocab, dtype=str), f"{prefix}.tfidf.idf": np.asarray(vectorizer.idf_)}
+
+
+def tfidf_params(vectorizer) -> Dict[str, Any]:
+    params = vectorizer.get_params()
+    for name in ("preprocessor", "tokenizer", "vocabulary"):
+        if params[name] is not None:
+            raise ValueError(f"TF-IDF {name} cannot be exported to the router bundle")
+    return {name: list(params[name]) if name == "ngram_range" else params[name] for name in TFIDF_PARAMS}
+
+
+def _linear_arrays(prefix: str, model) -> Dict[str, np.ndarray]:
+    return {f"{prefix}.coef": model.coef_, f"{prefix}.intercept": model.intercept_, f"{prefix}.classes": model.classes_}
+
+
+def write_bundle(path: str, qa_model, qa_tfidf, qa_sbert_name: str, topic_models: Dict[str, Any], topic_tfidf,
+                 topic_sbert_name: str, keywords: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Writes the bundle from the fitted (unpickled) router components; returns its `meta`"""
+    arrays = {**tfidf_arrays("qa", qa_tfidf), **tfidf_arrays("topic", topic_tfidf)}
+    qa_meta: Dict[str, Any] = {"sbert_model": qa_sbert_name, "tfidf": tfidf_params(qa_tfidf)}
+
+    if type(qa_model).__name__ == "LogisticRegression":
+        qa_meta["kind"] = "linear"
+        arrays.update(_linear_arrays("qa", qa_model))
+    elif type(qa_model).__name__ == "StackingClassifier":
+        kinds = [type(e).__name__ for e in qa_model.estimators_]
+        if (kinds != ["LogisticRegression", "XGBClassifier", "LGBMClassifier"]
+                or set(qa_model.stack_method_) != {"predict_proba"}
+                or type(qa_model.final_estimator_).__name__ != "LogisticRegression"):
+            raise ValueError(f"Unsupported stacked QA model: {kinds} -> {type(qa_model.final_estimator_).__name__}")
+        base_lr, xgb_model, lgbm_model = qa_model.estimators_
+        qa_meta.update(kind="stacked", passthrough=bool(qa_model.passthrough))
+        arrays.update({
+            "qa.lr.coef": base_lr.coef_, "qa.lr.intercept": base_lr.intercept_,
+            "qa.xgb": _bytes(xgb_model.get_booster().save_raw("ubj")),
+            "qa.lgbm": _bytes(lgbm_model.booster_.model_to_string()),
+            "qa.final.coef": qa_model.final_estimator_.coef_,
+            "qa.final.intercept": qa_model.final_estimator_.intercept_,
+            "qa.classes": qa_model.classes_,
+        })
+    else:
+        raise ValueError(f"Unsupported QA model: {type(qa_model).__name__}")
+
+    for label, model in topic_models.items():
+        arrays.update(_linear_arrays(f"topic.{label}", model))
+
+    meta = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "qa": qa_meta,
+        "topic": {
+            "sbert_model": topic_sbert_name,
+            "tfidf": tfidf_params(topic_tfidf),
+            "labels": list(topic_models),
+            "keywords": {category: list(words) for category, words in keywords.items()},
+        },
+    }
+    save_npz(path, arrays, meta)
+    return meta
+
+
+def save_npz(path: str, arrays: Dict[str, Any], meta: Dict[str, Any]) -> None:
+    """Writes `arrays` + the JSON `meta` (and the array index `mmap_npz` reads) as an uncompressed .npz"""
+    # dtype / shape / order of every array, so loading does not parse the .npy headers
+    meta["arrays"] = {
+        key: {"dtype": array.dtype.str, "shape": list(array.shape),
+              "fortran": bool(array.flags.f_contiguous and not array.flags.c_contiguous)}
+        for key, array in ((key, np.asarray(value)) for key, value in arrays.items())
+    }
+    np.savez(path, **arrays, meta=_bytes(json.dumps(meta)))
@@ -0,0 +1,75 @@
+'''
+Entry class is `RouterCache`
+
+
+Bounded LRU cache of router results keyed by normalized text (`normalize_text`), for users
+who repeat the same phrases and questions:
+- `graph_flow` keeps one for the local classifiers' results (offline / auto flows) and a
+  separate one with a TTL for Gemini answers (online flow and auto escalations)
+- entries optionally expire after `ttl_seconds` (None: only LRU eviction)
+- every lookup is counted in `metrics`: `router_cache_lookups_total{cache=...}` and
+  `router_cache_hits_total{cache=...}` (`hit_rate()`), plus `router_cache_evictions_total`
+'''
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from RAG.utils.metrics import metrics
+
+
+def normalize_text(text: str) -> str:
+    """Cache key: case-folded, whitespace collapsed; punctuation kept ('?' matters for QA)"""
+    return " ".join(text.split()).casefold()
+
+
+class RouterCache:
+
+    def __init__(self, name: str, max_entries: int = 4096, ttl_seconds: Optional[float] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # normalized text -> (expires_at, value), kept in LRU order
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text: str, default: Any = None) -> Any:
+        key = normalize_text(text)
+        metrics.incr("router_cache_lookups_total", cache=self.name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+        metrics.incr("router_cache_hits_total", cache=self.name)
+        return value
+
+    def set(self, text: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        key = normalize_text(text)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            metrics.incr("router_cache_evictions_total", evicted, cache=self.name)
+
+    def hit_rate(self) -> float:
+        return metrics.ratio("router_cache_hits_total", "router_cache_lookups_total", cache=self.name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
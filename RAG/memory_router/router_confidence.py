@@ -0,0 +1,78 @@
+'''
+Entry function is `escalation_reason`
+
+
+Confidence gate of the "auto" router flow: the local QA and topic classifiers answer unless one
+of their margins is below its calibrated threshold, in which case the text goes to the LLM.
+
+Margin of a binary classifier with positive-class probability p is |2p - 1| (0 = coin flip,
+1 = certain); there is one for the QA model and one per topic OvA model. The thresholds are
+calibrated on the held-out test split of the training data by `calibrate_router.py` and saved
+to `model_weights/router_thresholds.json`. The fused router (`fused_router.py`) is a different
+model with its own probability calibration, so it gets its own file,
+`model_weights/fused_router_thresholds.json` (`calibrate_router.py --router fused`), and has no
+defaults: the auto flow refuses to gate it with the stack's thresholds.
+'''
+import copy
+import json
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+THRESHOLDS_PATH = "RAG/memory_router/model_weights/router_thresholds.json"
+FUSED_THRESHOLDS_PATH = "RAG/memory_router/model_weights/fused_router_thresholds.json"
+
+# Used until calibrate_router.py has been run: escalate when p is within [0.25, 0.75]
+DEFAULT_THRESHOLDS: Dict[str, Any] = {
+    "qa": 0.5,
+    "topic": {"healthcare": 0.5, "long-term": 0.5, "short-term": 0.5},
+}
+
+
+def margins(positive: np.ndarray) -> np.ndarray:
+    return np.abs(2.0 * np.asarray(positive, dtype=np.float64) - 1.0)
+
+
+def load_thresholds(path: str = THRESHOLDS_PATH, router: str = "stack") -> Dict[str, Any]:
+    """Calibrated thresholds of `router` ("stack" or "fused"); only the stack falls back to defaults"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        if router != "stack":
+            raise FileNotFoundError(
+                f"{path}: no calibrated thresholds for the {router} router; the auto flow cannot gate it "
+                f"(run python -m RAG.memory_router.calibrate_router --router {router})"
+            )
+        logging.warning(f"❌ Router thresholds not found at {path}, using defaults (run calibrate_router.py)")
+        return copy.deepcopy(DEFAULT_THRESHOLDS)
+    if data.get("router", "stack") != router:
+        raise ValueError(f"{path}: thresholds were calibrated for the {data.get('router')} router, not {router}")
+    return {"qa": float(data["qa"]), "topic": {k: float(v) for k, v in data["topic"].items()}}
+
+
+def escalation_reason(confidence: Dict[str, Any], thresholds: Dict[str, Any]) -> Optional[str]:
+    """'qa' / 'topic' when that classifier is not confident enough, None when the local answer stands"""
+    if confidence["qa"] < thresholds["qa"]:
+        return "qa"
+    for label, margin in confidence["topic"].items():
+        if margin < thresholds["topic"].get(label, 0.0):
+            return "topic"
+    return None
+
+
+def calibrate_threshold(margin: np.ndarray, correct: np.ndarray, target_accuracy: float) -> float:
+    """
+    Smallest margin threshold whose confident subset (margin >= threshold) is at least
+    `target_accuracy` accurate, i.e. the one escalating the fewest held-out inputs
+    """
+    order = np.argsort(-margin, kind="stable")  # most confident first
+    sorted_margin = margin[order]
+    accuracy = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+    # A threshold keeps every input with an equal margin, so only the end of a tie group counts
+    group_end = np.append(sorted_margin[:-1] != sorted_margin[1:], True)
+    feasible = np.nonzero((accuracy >= target_accuracy) & group_end)[0]
+    if not len(feasible):
+        return float(np.nextafter(sorted_margin[0], np.inf))  # escalate everything
+    return float(sorted_margin[feasible[-1]])
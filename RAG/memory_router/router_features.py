@@ -0,0 +1,111 @@
+'''
+Entry class is `RouterFeatures`
+
+
+Shared feature pass of the offline memory router. `QAClassifier` and `TopicClassifier` both
+build TF-IDF + SBERT (+ handcrafted) features for the same text; with a `RouterFeatures` for
+that text they share the expensive parts:
+- `embeddings(model_name)`: SBERT encode once per model name (both classifiers ship with
+  `google/embeddinggemma-300m`, so once in total)
+- `tfidf(vectorizer)`: one transform per fitted vectorizer (QA and topic have their own)
+
+`load_sbert(model_name)` keeps one SentenceTransformer per model name per process, so the two
+classifiers also share the model weights instead of loading the same model twice.
+
+TF-IDF stays sparse (`predict_blocks`): a vocabulary-sized dense row per text is never built.
+- linear models (the topic OvA logistic regressions) are scored split: sparse TF-IDF block
+  times its coefficients plus the dense (SBERT + handcrafted) block times the rest
+- other models (the stacked QA model with tree learners, which treat absent sparse entries as
+  missing rather than 0) get dense rows, built `DENSE_CHUNK_ROWS` texts at a time
+`predict_proba_blocks` does the same for class probabilities (binary logistic regressions are
+scored split; everything else gets dense chunks).
+'''
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.special import expit
+from sentence_transformers import SentenceTransformer
+
+from RAG.utils.metrics import metrics
+
+# Rows densified per predict call for models that cannot take sparse input
+DENSE_CHUNK_ROWS = 256
+
+
+@lru_cache(maxsize=None)
+def load_sbert(model_name: str) -> SentenceTransformer:
+    return SentenceTransformer(model_name)
+
+
+class RouterFeatures:
+    """Per-utterance (or per-batch) feature cache shared by the router classifiers"""
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts: List[str] = list(texts)
+        self._embeddings: Dict[str, np.ndarray] = {}
+        # The graph's QA and topic branches run concurrently; the first to ask encodes, the other waits
+        self._encode_lock = threading.Lock()
+        # id(vectorizer) -> (vectorizer, matrix); the vectorizer is kept so its id is not reused
+        self._tfidf: Dict[int, Tuple[Any, Any]] = {}
+
+    def matches(self, texts: Sequence[str]) -> bool:
+        return self.texts == list(texts)
+
+    def embeddings(self, model_name: str) -> np.ndarray:
+        with self._encode_lock:
+            if model_name not in self._embeddings:
+                self._embeddings[model_name] = load_sbert(model_name).encode(self.texts, show_progress_bar=False)
+                metrics.incr("router_sbert_encode_total", model=model_name)
+            return self._embeddings[model_name]
+
+    def tfidf(self, vectorizer):
+        """Sparse TF-IDF rows of the texts for one fitted vectorizer"""
+        entry = self._tfidf.get(id(vectorizer))
+        if entry is None:
+            entry = self._tfidf[id(vectorizer)] = (vectorizer, vectorizer.transform(self.texts))
+        return entry[1]
+
+
+def is_linear(model) -> bool:
+    """Plain linear classifier (coef_ / intercept_, decision > 0 -> classes_[1])"""
+    return type(model).__name__ in ("LogisticRegression", "LinearSVC", "SGDClassifier", "RidgeClassifier")
+
+
+def linear_decision(model, tfidf, dense: np.ndarray) -> np.ndarray:
+    """`model.decision_function` on [tfidf | dense] without materialising the hstack"""
+    coef = model.coef_
+    n_tfidf = tfidf.shape[1]
+    scores = np.asarray(tfidf @ coef[:, :n_tfidf].T) + dense @ coef[:, n_tfidf:].T + model.intercept_
+    return scores.ravel() if scores.shape[1] == 1 else scores
+
+
+def hybrid_matrix(tfidf, dense: np.ndarray):
+    """Sparse [tfidf | dense] feature matrix (CSR)"""
+    return sparse.hstack([tfidf, sparse.csr_matrix(dense)], format="csr")
+
+
+def predict_blocks(model, tfidf, dense: np.ndarray) -> np.ndarray:
+    """`model.predict` on the [tfidf | dense] features, keeping the TF-IDF block sparse"""
+    if is_linear(model):
+        scores = linear_decision(model, tfidf, dense)
+        if scores.ndim == 1:
+            return model.classes_[(scores > 0).astype(int)]
+        return model.classes_[scores.argmax(axis=1)]
+    return np.concatenate([
+        model.predict(np.hstack([tfidf[i:i + DENSE_CHUNK_ROWS].toarray(), dense[i:i + DENSE_CHUNK_ROWS]]))
+        for i in range(0, tfidf.shape[0], DENSE_CHUNK_ROWS)
+    ])
+
+
+def predict_proba_blocks(model, tfidf, dense: np.ndarray) -> np.ndarray:
+    """`model.predict_proba` on the [tfidf | dense] features, keeping the TF-IDF block sparse"""
+    if type(model).__name__ == "LogisticRegression" and len(model.classes_) == 2:
+        positive = expit(linear_decision(model, tfidf, dense))
+        return np.column_stack([1.0 - positive, positive])
+    return np.vstack([
+        model.predict_proba(np.hstack([tfidf[i:i + DENSE_CHUNK_ROWS].toarray(), dense[i:i + DENSE_CHUNK_ROWS]]))
+        for i in range(0, tfidf.shape[0], DENSE_CHUNK_ROWS)
+    ])
@@ -1,15 +1,18 @@
-from sentence_transformers import SentenceTransformer
-from typing import TypedDict, List, Literal, Optional
+from typing import TypedDict, List, Literal, Optional, Tuple, Dict, Any
 import numpy as np
 import pickle
 import re
 
+from RAG.memory_router.router_bundle import RouterBundle
+from RAG.memory_router.router_features import RouterFeatures, load_sbert, predict_blocks, predict_proba_blocks
+
 
 class ClassificationState(TypedDict):
     text: str
-    flow_type: Literal["online", "offline"]
+    flow_type: Literal["online", "offline", "auto"]
     qa: Optional[str]
     topic: Optional[List[str]]  # now multi-label
+    features: Optional[RouterFeatures]
 
 
 class TopicClassifier:
@@ -29,24 +32,41 @@ class TopicClassifier:
         sbert_name_path: str = "RAG/memory_router/model_weights/topic_sbert_model_name.pkl",
         keywords_path: str = "RAG/memory_router/model_weights/topic_category_keywords.pkl"
     ):
-        # Load OvA models
-        self.models_ova = {}
+        # Load OvA models (pickles; `from_bundle` loads the same from router_bundle.npz)
+        models_ova = {}
         for label, path in ova_models_paths.items():
             with open(path, "rb") as f:
-                self.models_ova[label] = pickle.load(f)
+                models_ova[label] = pickle.load(f)
 
         # Load TF-IDF vectorizer
         with open(tfidf_path, "rb") as f:
-            self.tfidf_vectorizer_topic = pickle.load(f)
+            tfidf_vectorizer_topic = pickle.load(f)
 
-        # Load SBERT model
+        # Load SBERT model name
         with open(sbert_name_path, "rb") as f:
             sbert_model_name = pickle.load(f)
-            self.sbert_model_topic = SentenceTransformer(sbert_model_name)
 
         # Load category keywords
         with open(keywords_path, "rb") as f:
-            self.CATEGORY_KEYWORDS = pickle.load(f)
+            category_keywords = pickle.load(f)
+
+        self._init_components(models_ova, tfidf_vectorizer_topic, sbert_model_name, category_keywords)
+
+    @classmethod
+    def from_bundle(cls, bundle: RouterBundle) -> "TopicClassifier":
+        """Builds the classifier from a pickle-free `RouterBundle` (see router_bundle.py)."""
+        classifier = cls.__new__(cls)
+        classifier._init_components(bundle.topic_models, bundle.topic_tfidf, bundle.topic_sbert_name, bundle.keywords)
+        return classifier
+
+    def _init_components(self, models_ova: Dict[str, Any], tfidf_vectorizer_topic, sbert_model_name: str,
+                         category_keywords: Dict[str, List[str]]) -> None:
+        self.models_ova = models_ova
+        self.tfidf_vectorizer_topic = tfidf_vectorizer_topic
+        self.sbert_model_name = sbert_model_name
+        # Shared with the QA classifier when both use the same model
+        self.sbert_model_topic = load_sbert(self.sbert_model_name)
+        self.CATEGORY_KEYWORDS = category_keywords
 
         # Define question-related words for heuristic features (if needed)
         self.question_words = ['who', 'what', 'where', 'when', 'why', 'how', 'which']
@@ -55,9 +75,12 @@ class TopicClassifier:
         words = re.findall(r'\b\w+\b', text.lower())
         return sum(1 for w in words if w in category_words)
 
-    def prepare_features_topic(self, texts):
-        X_tfidf = self.tfidf_vectorizer_topic.transform(texts).toarray()
-        X_sbert = self.sbert_model_topic.encode(texts, show_progress_bar=False)
+    def feature_blocks_topic(self, texts, features: Optional[RouterFeatures] = None):
+        """Sparse TF-IDF block and dense (SBERT + category word counts) block of the features"""
+        if features is None or not features.matches(texts):
+            features = RouterFeatures(texts)
+        X_tfidf = features.tfidf(self.tfidf_vectorizer_topic)
+        X_sbert = features.embeddings(self.sbert_model_name)
         category_features = np.array([
             [
                 self.count_category_words_topic(t, self.CATEGORY_KEYWORDS['healthcare']),
@@ -66,19 +89,47 @@ class TopicClassifier:
             ]
             for t in texts
         ])
-        return np.hstack([X_tfidf, X_sbert, category_features])
+        return X_tfidf, np.hstack([X_sbert, category_features])
 
-    def classify_text_topic(self, state: ClassificationState) -> ClassificationState:
-        X_features = self.prepare_features_topic([state["text"]])
-        predicted_labels = []
+    def prepare_features_topic(self, texts, features: Optional[RouterFeatures] = None):
+        X_tfidf, X_dense = self.feature_blocks_topic(texts, features)
+        return np.hstack([X_tfidf.toarray(), X_dense])
+
+    def classify_batch_topic(self, texts: List[str], features: Optional[RouterFeatures] = None) -> List[List[str]]:
+        """Topic labels of every text: one feature pass, one predict per OvA model"""
+        if not texts:
+            return []
+        X_tfidf, X_dense = self.feature_blocks_topic(list(texts), features)
+        predicted_labels = [[] for _ in texts]
 
-        # Run all OvA models independently
+        # Run all OvA models independently (split TF-IDF / dense scoring, no dense hstack)
         for label_name, clf in self.models_ova.items():
-            pred = clf.predict(X_features)[0]
-            if pred == 1:
-                predicted_labels.append(label_name)
+            preds = predict_blocks(clf, X_tfidf, X_dense)
+            for labels, pred in zip(predicted_labels, preds):
+                if pred == 1:
+                    labels.append(label_name)
 
-        state["topic"] = predicted_labels  # multi-label output
+        return predicted_labels
+
+    def score_batch_topic(self, texts, features: Optional[RouterFeatures] = None) -> Tuple[List[List[str]], Dict[str, np.ndarray]]:
+        """Topic labels (as `classify_batch_topic`) and each OvA model's positive probability per text"""
+        if not texts:
+            return [], {label_name: np.zeros(0) for label_name in self.models_ova}
+        X_tfidf, X_dense = self.feature_blocks_topic(list(texts), features)
+        predicted_labels = [[] for _ in texts]
+        positive = {}
+
+        for label_name, clf in self.models_ova.items():
+            proba = predict_proba_blocks(clf, X_tfidf, X_dense)
+            positive[label_name] = proba[:, list(clf.classes_).index(1)]
+            for labels, pred in zip(predicted_labels, clf.classes_[proba.argmax(axis=1)]):
+                if pred == 1:
+                    labels.append(label_name)
+
+        return predicted_labels, positive
+
+    def classify_text_topic(self, state: ClassificationState) -> ClassificationState:
+        state["topic"] = self.classify_batch_topic([state["text"]], state.get("features"))[0]  # multi-label output
         return state
 
 '''
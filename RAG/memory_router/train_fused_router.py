@@ -0,0 +1,90 @@
+'''
+Train the fused memory router (`fused_router.py`)
+
+    python -m RAG.memory_router.train_fused_router [--output PATH] [--sbert-model NAME] [--target-accuracy 0.97]
+        [--thresholds-output PATH]
+
+Fits one TF-IDF vectorizer (500 features, 1-2 grams, as in the training notebooks) on the
+training rows of both datasets in `data_augmentation`, builds the shared features with
+`FusedRouter.feature_blocks`, and fits one logistic regression per head (C=1.0, lbfgs, as
+the notebooks): QA on the QA sentences, each topic OvA head on the topic sentences. The
+held-out rows `calibrate_router.py` uses (test_size=0.2, random_state=42, stratified per
+model) are left out of every fit, so `RAG.benchmarks.router_fused` can compare the fused
+model with the current stack on them.
+
+Writes `model_weights/fused_router.npz` and prints each head's held-out accuracy, then
+calibrates the auto flow's confidence gate for the fused router on the same held-out rows
+(`calibrate_router.calibrate`) into `model_weights/fused_router_thresholds.json`.
+'''
+import argparse
+import pickle
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from RAG.memory_router.calibrate_router import (SEED, TOPIC_DATA, calibrate, held_out, qa_rows, read_rows,
+                                               write_thresholds)
+from RAG.memory_router.fused_router import FUSED_PATH, FusedRouter
+from RAG.memory_router.router_confidence import FUSED_THRESHOLDS_PATH
+from RAG.memory_router.router_features import RouterFeatures, hybrid_matrix
+
+KEYWORDS_PATH = "RAG/memory_router/model_weights/topic_category_keywords.pkl"
+SBERT_MODEL = "google/embeddinggemma-300m"
+TOPIC_LABELS = ["healthcare", "long-term", "short-term"]
+
+
+def train_rows(y: np.ndarray) -> np.ndarray:
+    return np.setdiff1d(np.arange(len(y)), held_out(y))
+
+
+def fit_head(X, y: np.ndarray) -> LogisticRegression:
+    return LogisticRegression(C=1.0, penalty="l2", solver="lbfgs", max_iter=2000, random_state=SEED).fit(X, y)
+
+
+def run(output: str, sbert_model: str, target_accuracy: float, thresholds_output: str) -> None:
+    qa_texts, qa_y = qa_rows()
+    topic_texts, topic_labels = read_rows(TOPIC_DATA)
+    topic_y = {label: np.array([int(l == label) for l in topic_labels]) for label in TOPIC_LABELS}
+    with open(KEYWORDS_PATH, "rb") as f:
+        keywords = pickle.load(f)
+
+    # Shared vocabulary from training rows only (a topic row is held out if any head holds it out)
+    qa_train = train_rows(qa_y)
+    topic_train = np.arange(len(topic_texts))
+    for y in topic_y.values():
+        topic_train = np.intersect1d(topic_train, train_rows(y))
+    tfidf = TfidfVectorizer(max_features=500, ngram_range=(1, 2))
+    tfidf.fit([qa_texts[i] for i in qa_train] + [topic_texts[i] for i in topic_train])
+
+    # Untrained router, only to build the features exactly as serving does
+    router = FusedRouter(tfidf, sbert_model, keywords, TOPIC_LABELS, coef=np.zeros(0), intercept=np.zeros(0))
+    qa_X = hybrid_matrix(*router.feature_blocks(qa_texts, RouterFeatures(qa_texts)))
+    topic_X = hybrid_matrix(*router.feature_blocks(topic_texts, RouterFeatures(topic_texts)))
+
+    heads = {"qa": (fit_head(qa_X[qa_train], qa_y[qa_train]), qa_X, qa_y)}
+    for label, y in topic_y.items():
+        rows = train_rows(y)
+        heads[label] = (fit_head(topic_X[rows], y[rows]), topic_X, y)
+
+    router.coef_ = np.vstack([model.coef_ for model, _, _ in heads.values()])
+    router.intercept_ = np.concatenate([model.intercept_ for model, _, _ in heads.values()])
+    router.save(output)
+
+    print(f"wrote {output}: heads {router.heads}, {router.coef_.shape[1]} features "
+          f"({len(tfidf.vocabulary_)} TF-IDF + dense)")
+    for head, (model, X, y) in heads.items():
+        idx = held_out(y)
+        print(f"{head:12} held-out accuracy {float((model.predict(X[idx]) == y[idx]).mean()):.1%}  (n={len(idx)})")
+
+    write_thresholds(calibrate("fused", target_accuracy, output), thresholds_output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=FUSED_PATH)
+    parser.add_argument("--sbert-model", default=SBERT_MODEL)
+    parser.add_argument("--target-accuracy", type=float, default=0.97)
+    parser.add_argument("--thresholds-output", default=FUSED_THRESHOLDS_PATH)
+    args = parser.parse_args()
+    run(args.output, args.sbert_model, args.target_accuracy, args.thresholds_output)
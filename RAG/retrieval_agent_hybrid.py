@@ -1,51 +1,79 @@
 import os
+import asyncio
 import logging
-from typing import List, Dict, Optional, TypedDict, Annotated, Any
-from datetime import datetime
-import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, NamedTuple, Optional, TypedDict, Annotated, Any, Sequence, Tuple
+from datetime import date, datetime, timedelta
 
 # Core dependencies
-from dotenv import load_dotenv
 import psycopg2
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
 # LangChain dependencies
 from langchain_core.messages import AnyMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
-from langchain_core.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tools import StructuredTool
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode, create_react_agent
 from langgraph.graph.message import add_messages
 
 # Import local
-from RAG.utils.embedder import Embedder, CrossEmbedder
-from RAG.utils.recency_score import compute_recency_score
-from RAG.utils.utils import normalize_for_paradedb
+from RAG.utils.embedder import CrossEmbedder
+from RAG.utils.recency_score import SGT, recency_scores
+from RAG.utils.temporal_parser import parse_time_window, sgt_to_utc
+from RAG.utils.utils import normalize_for_paradedb, async_database_url
+from RAG.utils.shared_resources import SharedResources
+from RAG.shared.schemas.schema_ltm import LongTermRow, LTMCategories, RetrieveLongTermSchema
+from RAG.shared.schemas.schema_hcm import HealthOverviewSchema, HealthRecordTypes, HealthRow, RetrieveHealthSchema
+from RAG.shared.schemas.schema_stm import RetrieveShortTermSchema, ShortTermRow
+from RAG.utils.candidates import BUCKET_FIELDS, SCORE_FIELDS, CandidateSet, decode_values
+from RAG.utils.load_controller import DegradationConfig, LoadController, RetrievalTier
+from RAG.utils.metrics import metrics
+from RAG.utils.ltm_key_index import LTMKeyIndex
+from RAG.utils.change_feed import change_feed
+from RAG.utils.healthcare_index import TenantHealthIndex, healthcare_index
+from RAG.utils.context_packer import DEFAULT_SECTION_BUDGETS, pack_section
+from RAG.utils.session_cache import SessionContextCache
+
+
+class RetrievalArtifact(NamedTuple):
+    """`ToolMessage.artifact` of every retrieval tool: the ranked rows the LLM saw as text"""
+    mode: str  # "long-term", "healthcare" or "short-term"
+    tier: str  # degradation tier (or fast path) that served the call
+    rows: List[Dict[str, Any]]  # lowercase column keys, with ranking scores and embeddings
 
 
 class AgentState(TypedDict):
     user_input: str
+    elderly_id: str
+    conversation_id: Optional[str]
     messages: Annotated[List[AnyMessage], add_messages]
     has_context: bool
     final_answer: str
     topic: str
     retrieved_context: List[Dict[str, Any]]
     retrieval_agent_message: AnyMessage
-    retrieved_ltm: List[Dict[str, Any]]
-    retrieved_hcm: List[Dict[str, Any]]
-    retrieved_stm: List[Dict[str, Any]]
+    retrieved_ltm: List[LongTermRow]
+    retrieved_hcm: List[HealthRow]
+    retrieved_stm: List[ShortTermRow]
     mem_used: List[str]
+    context_tokens_saved: int
 
 
 class HybridRetrievalAgent:
     """
     Agent for retrieving relevant information from appropriate memory buckets.
 
+    The agent is tenant-agnostic: the elderly profile travels in the graph state and in
+    the tool call config, so one instance (and one compiled graph) can serve every profile.
+
     Attributes:
-        elderly_id: Default elderly profile ID to use for retrievals
+        elderly_id: Optional default elderly profile ID used when a call does not pass one
         graph: Compiled LangGraph workflow
         embedder: Embedder instance for generating embeddings
         engine: SQLAlchemy database engine
@@ -88,129 +116,281 @@ class HybridRetrievalAgent:
     - retrieve_long_term: for stable profile info (name, preferences, family)
     - retrieve_health: for medical info (allergies, meds, conditions)
     - retrieve_short_term: for recent plans, reminders, temporary info
+    - health_overview: the current medication list and upcoming appointments (no search needed).
+      Prefer it for "what medicine do I take" or "when is my next appointment".
+
+    Narrow the search with the optional tool arguments whenever the question allows it:
+    - retrieve_health: record_type ('medication', 'appointment', ...), date_from / date_to (YYYY-MM-DD)
+    - retrieve_long_term: category ('family', 'lifestyle', ...)
+    - retrieve_short_term: date_from / date_to (YYYY-MM-DD), e.g. yesterday's date for "yesterday"
     """
 
-    def __init__(self, elderly_id: str):
+    # Per-bucket table, selected columns, BM25 predicate and filterable columns used by the hybrid
+    # retrievers. Filters are pushed into both SQL legs and backed by composite
+    # (elderly_id, type, date) b-tree indexes.
+    HYBRID_BUCKETS = {
+        "long-term": {
+            "label": "LTM",
+            "table": "long_term_memory",
+            "columns": "id, category, key, value, last_updated",
+            "type_filter": ("category", LTMCategories),
+            "date_filter": None,
+            "bm25_match": """(
+                category_search @@@ :query OR key @@@ :query OR value @@@ :query
+                OR id @@@ paradedb.match('category_search', :query, distance => :distance)
+                OR id @@@ paradedb.match('key', :query, distance => :distance)
+                OR id @@@ paradedb.match('value', :query, distance => :distance)
+            )""",
+        },
+        "short-term": {
+            "label": "STM",
+            "table": "short_term_memory",
+            "columns": "id, content, created_at",
+            "type_filter": None,
+            "date_filter": ("created_at", datetime),
+            "bm25_match": "(content @@@ :query OR id @@@ paradedb.match('content', :query, distance => :distance))",
+        },
+        "healthcare": {
+            "label": "health",
+            "table": "healthcare_records",
+            "columns": "id, record_type, description, diagnosis_date, last_updated",
+            "type_filter": ("record_type", HealthRecordTypes),
+            "date_filter": ("diagnosis_date", date),
+            "bm25_match": """(
+                record_type_search @@@ :query OR description @@@ :query
+                OR id @@@ paradedb.match('record_type_search', :query, distance => :distance)
+                OR id @@@ paradedb.match('description', :query, distance => :distance)
+            )""",
+        },
+    }
+
+    # Reported instead of a degradation tier when the LTM key-value fast path answered
+    KEY_VALUE_TIER = "key_value"
+
+    # Cascade between fusion and the cross-encoder: keep between top_k_MMR and
+    # CASCADE_FACTOR * top_k_MMR candidates, cut at the largest hybrid-score gap >= CASCADE_MIN_GAP
+    CASCADE_FACTOR = 2
+    CASCADE_MIN_GAP = 0.05
+
+    # Whole-tenant LTM load feeding the key-value fast path
+    LTM_KEY_INDEX_SQL = text("""
+        SELECT id, category, key, value, last_updated, embedding::text AS embedding
+        FROM long_term_memory
+        WHERE elderly_id = :elderly_id;
+    """)
+
+    # Medication / appointment rows behind the `health_overview` fast path; both are served by
+    # the (elderly_id, record_type, diagnosis_date) index
+    HEALTH_INDEX_SQL = text("""
+        SELECT id, record_type, description, diagnosis_date, last_updated
+        FROM healthcare_records
+        WHERE elderly_id = :elderly_id AND record_type IN ('medication', 'appointment');
+    """)
+    HEALTH_INDEX_ROWS_SQL = text("""
+        SELECT id, record_type, description, diagnosis_date, last_updated
+        FROM healthcare_records
+        WHERE elderly_id = :elderly_id AND id = ANY(CAST(:ids AS uuid[]));
+    """)
+    UPCOMING_APPOINTMENTS = 5
+    # Reported as the tier of `health_overview` tool calls
+    HEALTH_INDEX_TIER = "health_index"
+
+    # Speculative preload on session start: a tenant is preloaded at most once per interval,
+    # and the warm-up retrieval runs this generic query through embed -> ANN/BM25 -> cross-encoder
+    PRELOAD_INTERVAL_SECONDS = 300
+    WARMUP_QUERY = "How am I doing today?"
+
+    # Batched multi-tenant retrieval: requests per LATERAL statement, pairs per cross-encoder call
+    BATCH_SQL_SIZE = 256
+    BATCH_CE_SIZE = 128
+
+    def __init__(self, elderly_id: Optional[str] = None, resources: Optional[SharedResources] = None,
+                 degradation: Optional[DegradationConfig] = None,
+                 context_budgets: Optional[Dict[str, int]] = None):
         """
         Initialize the Retrieval Agent
 
         Args:
-            elderly_id: UUID of the elderly profile to use for retrievals
+            elderly_id: Optional default UUID of the elderly profile to use for retrievals
+            resources: Shared engine/models/LLM; a private set is created when omitted
+            degradation: Latency target / tier thresholds for `retrieve_rerank` (read from env when omitted)
+            context_budgets: Prompt tokens per final-template section ("personal", "health", "conversation")
         """
         self.elderly_id = elderly_id
 
-        # Load environment variables
-        load_dotenv()
+        # Heavy resources (DB engine, embedder, cross-encoder, LLM) are shared across agents
+        self.resources = resources if resources is not None else SharedResources()
+        self.connection_string = self.resources.connection_string
+        self.secret_key = self.resources.secret_key
+        self.engine = self.resources.engine
+        self.embedder = self.resources.embedder
+        self.llm = self.resources.llm
+
+        # Async engine (asyncpg) is created lazily by the a* methods
+        self.async_engine = None
+        self.inference_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval-inference")
+
+        # Chooses the reranking tier per request from in-flight load and recent stage latencies
+        self.load_controller = LoadController(degradation or DegradationConfig.from_env())
+
+        # In-memory (category, key) -> value tables answering single-fact LTM questions
+        self.ltm_key_index = LTMKeyIndex()
 
-        # Initialize database connection
-        self._setup_database()
+        # Process-wide medication list / appointment index, also updated by InsertionAgent writes
+        self.healthcare_index = healthcare_index
 
-        # Setup embedding model using Embedder class
-        self.embedder = Embedder(model_name="google/embeddinggemma-300m")
-        self.encoder = CrossEmbedder('BAAI/bge-reranker-base')
+        # Last turn's candidates per conversation, re-ranked for close follow-up questions
+        self.session_cache = SessionContextCache()
 
-        # Initialize LLM
-        self._setup_llm()
+        # Session starts (profile opened in Flask, conversation opened) preload the tenant's memory
+        self.preload_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retrieval-preload")
+        self._preloaded: Dict[str, float] = {}
+        self._models_warm = False
+        change_feed.subscribe_session_start(self.schedule_preload)
+
+        # Token budget per section of the final prompt template
+        self.context_budgets = {**DEFAULT_SECTION_BUDGETS, **(context_budgets or {})}
 
         # Setup tools and workflow
         self._setup_tools()
         self._setup_workflow()
 
-    def _setup_database(self):
-        """Setup database connection and engine"""
-        self.connection_string = os.getenv("DATABASE_URL")
-        self.secret_key = os.getenv("DATABASE_ENCRYPTION_KEY")
-
-        if not self.connection_string:
-            raise ValueError("DATABASE_URL environment variable is required")
-        if not self.secret_key:
-            raise ValueError("DATABASE_ENCRYPTION_KEY environment variable is required")
-
-        self.engine = create_engine(
-            self.connection_string,
-            pool_size=5,
-            max_overflow=10,
-            pool_pre_ping=True,
-            pool_recycle=3600,
-            connect_args={
-                "keepalives": 1,
-                "keepalives_idle": 30,
-                "keepalives_interval": 10,
-                "tcp_user_timeout": 60000,
-            },
-            echo=False
-        )
-
-    def _setup_llm(self):
-        """Setup language model"""
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            temperature=0,
-            max_output_tokens=1000
-        )
+    @property
+    def encoder(self) -> CrossEmbedder:
+        return self.resources.encoder
+
+    def _resolve_elderly_id(self, elderly_id: Optional[str]) -> str:
+        elderly_id = elderly_id or self.elderly_id
+        if not elderly_id:
+            raise ValueError("elderly_id is required (pass it per call or set a default on the agent)")
+        return str(elderly_id)
+
+    @staticmethod
+    def _config_elderly_id(config: Optional[RunnableConfig]) -> Optional[str]:
+        """Elderly profile carried in the tool-call config by the retrieval node"""
+        return ((config or {}).get("configurable") or {}).get("elderly_id")
+
+    @staticmethod
+    def _config_conversation_id(config: Optional[RunnableConfig]) -> Optional[str]:
+        return ((config or {}).get("configurable") or {}).get("conversation_id")
+
+    # One line per row, shared by the tool content the ReAct LLM reads and the final template
+    @staticmethod
+    def _render_long_term(r: Dict[str, Any]) -> str:
+        return f"Category: {r.get('category')}, Key: {r.get('key')}, Value: {r.get('value')}"
+
+    @staticmethod
+    def _render_health(r: Dict[str, Any]) -> str:
+        return f"Type: {r.get('record_type')}, Description: {r.get('description')}, Date: {r.get('diagnosis_date')}"
+
+    @staticmethod
+    def _render_short_term(r: Dict[str, Any]) -> str:
+        created = r.get('created_at')
+        if isinstance(created, datetime):
+            created = created.strftime("%Y-%m-%d %H:%M:%S")
+        return f"Content: {r.get('content')}, Created: {created}"
+
+    # mode -> (renderer, text column packed against the budget, template section, mem_used label, empty reply)
+    TOOL_OUTPUTS = {
+        "long-term": ("_render_long_term", "value", "personal", "long-term-memory",
+                      "No relevant long-term data found"),
+        "healthcare": ("_render_health", "description", "health", "health-data",
+                       "No relevant health data found"),
+        "short-term": ("_render_short_term", "content", "conversation", "short-term-memory",
+                       "No relevant short-term data found"),
+    }
+
+    def _tool_response(self, mode: str, results: List[Dict[str, Any]], tier: str) -> Tuple[str, RetrievalArtifact]:
+        """(content, artifact) of a content_and_artifact tool: compact lines for the LLM, typed rows for the graph"""
+        render, _, _, _, empty = self.TOOL_OUTPUTS[mode]
+        content = "\n".join(getattr(self, render)(r) for r in results) if results else empty
+        return content, RetrievalArtifact(mode, tier, results)
+
+    @staticmethod
+    def _public_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rows without the internal ranking scores and embeddings"""
+        hidden = set(SCORE_FIELDS) | {"embedding"}
+        return [{k: v for k, v in r.items() if k not in hidden} for r in rows]
 
     def _setup_tools(self):
-        """Setup retrieval tools"""
-        @tool
-        def retrieve_long_term(query: str) -> str:
+        """
+        Setup retrieval tools (each with a sync and an async implementation).
+
+        Tools answer the ReAct agent with one compact line per row and attach the ranked rows
+        (scores and embeddings included) as a `RetrievalArtifact`, which the template builder
+        and `process()` read directly.
+        """
+        def retrieve_long_term(query: str, config: RunnableConfig,
+                               category: Optional[LTMCategories] = None):
             """Retrieve long-term profile facts (stable traits, preferences, demographics)"""
-            results = self.retrieve_rerank(query, mode="long-term")
-            formatted = []
-            for r in results:
-                formatted.append(
-                    {"Category": r['category'], "Key": r['key'], "Value": r['value']}
-                )
-            return json.dumps(formatted) if formatted else "No relevant long-term data found"
-            # print(results)
-            # formatted = []
-            # for r in results:
-            #     formatted.append(
-            #         f"Category: {r['category']}, Key: {r['key']}, Value: {r['value']}"
-            #     )
-            # print("long term retrieval was made!")
-            # return "\n".join(formatted) if formatted else "No relevant long-term information found"
-
-
-        @tool
-        def retrieve_health(query: str) -> str:
+            results, tier = self.retrieve_rerank_with_tier(
+                query, mode="long-term", elderly_id=self._config_elderly_id(config),
+                conversation_id=self._config_conversation_id(config),
+                filters={"category": category}, keep_scores=True)
+            return self._tool_response("long-term", results, tier)
+
+        async def aretrieve_long_term(query: str, config: RunnableConfig,
+                                      category: Optional[LTMCategories] = None):
+            results, tier = await self.aretrieve_rerank_with_tier(
+                query, mode="long-term", elderly_id=self._config_elderly_id(config),
+                conversation_id=self._config_conversation_id(config),
+                filters={"category": category}, keep_scores=True)
+            return self._tool_response("long-term", results, tier)
+
+        def retrieve_health(query: str, config: RunnableConfig, record_type: Optional[HealthRecordTypes] = None,
+                            date_from: Optional[str] = None, date_to: Optional[str] = None):
             """Retrieve health-care data (conditions, meds, allergies, appointments)"""
-            results = self.retrieve_rerank(query, mode="healthcare")
-            formatted = []
-            for r in results:
-                formatted.append(
-                    {"Type": r['record_type'], "Description": r['description'], "Date": r['diagnosis_date']}
-                )
-            return json.dumps(formatted) if formatted else "No relevant health data found"
-            # formatted = []
-            # for r in results:
-            #     formatted.append(
-            #         f"Type: {r['record_type']}, Description: {r['description']}, Date: {r['diagnosis_date']}"
-            #     )
-            # print("Health retrieval was made!")
-            # return "\n".join(formatted) if formatted else "No relevant health information found"
-            #return json.dumps(results)
-
-
-        @tool
-        def retrieve_short_term(query: str) -> str:
+            results, tier = self.retrieve_rerank_with_tier(
+                query, mode="healthcare", elderly_id=self._config_elderly_id(config),
+                conversation_id=self._config_conversation_id(config),
+                filters={"record_type": record_type, "date_from": date_from, "date_to": date_to}, keep_scores=True)
+            return self._tool_response("healthcare", results, tier)
+
+        async def aretrieve_health(query: str, config: RunnableConfig, record_type: Optional[HealthRecordTypes] = None,
+                                   date_from: Optional[str] = None, date_to: Optional[str] = None):
+            results, tier = await self.aretrieve_rerank_with_tier(
+                query, mode="healthcare", elderly_id=self._config_elderly_id(config),
+                conversation_id=self._config_conversation_id(config),
+                filters={"record_type": record_type, "date_from": date_from, "date_to": date_to}, keep_scores=True)
+            return self._tool_response("healthcare", results, tier)
+
+        def retrieve_short_term(query: str, config: RunnableConfig,
+                                date_from: Optional[str] = None, date_to: Optional[str] = None):
             """Retrieve short-term conversational details (recent plans, reminders, temporary preferences)"""
-            results = self.retrieve_rerank(query, mode="short-term")
-            formatted = []
-            for r in results:
-                formatted.append(
-                    {"Content": r['content'], "Created": r['created_at'].strftime("%Y-%m-%d %H:%M:%S") if isinstance(r['created_at'], datetime) else r['created_at']}
-                )
-            return json.dumps(formatted) if formatted else "No relevant short-term data found"
-            # formatted = []
-            # for r in results:
-            #     formatted.append(
-            #         f"Content: {r['content']}, Created: {r['created_at']}"
-            #     )
-            # print("short term retrieval was made!")
-            # return "\n".join(formatted) if formatted else "No relevant short-term information found"
-            #return json.dumps(results)
-
-        self.retrieval_tools = [retrieve_long_term, retrieve_health, retrieve_short_term]
+            results, tier = self.retrieve_rerank_with_tier(
+                query, mode="short-term", elderly_id=self._config_elderly_id(config),
+                conversation_id=self._config_conversation_id(config),
+                filters={"date_from": date_from, "date_to": date_to}, keep_scores=True)
+            return self._tool_response("short-term", results, tier)
+
+        async def aretrieve_short_term(query: str, config: RunnableConfig,
+                                       date_from: Optional[str] = None, date_to: Optional[str] = None):
+            results, tier = await self.aretrieve_rerank_with_tier(
+                query, mode="short-term", elderly_id=self._config_elderly_id(config),
+                conversation_id=self._config_conversation_id(config),
+                filters={"date_from": date_from, "date_to": date_to}, keep_scores=True)
+            return self._tool_response("short-term", results, tier)
+
+        def health_overview(config: RunnableConfig, kind: Optional[str] = None):
+            """List the current medications and upcoming appointments (structured lookup, no search)"""
+            results = self.health_overview(elderly_id=self._config_elderly_id(config), kind=kind)
+            return self._tool_response("healthcare", results, self.HEALTH_INDEX_TIER)
+
+        async def ahealth_overview(config: RunnableConfig, kind: Optional[str] = None):
+            results = await self.ahealth_overview(elderly_id=self._config_elderly_id(config), kind=kind)
+            return self._tool_response("healthcare", results, self.HEALTH_INDEX_TIER)
+
+        # Optional structured arguments (record type, category, date range) are pushed down into SQL
+        self.retrieval_tools = [
+            StructuredTool.from_function(func=retrieve_long_term, coroutine=aretrieve_long_term,
+                                         args_schema=RetrieveLongTermSchema, response_format="content_and_artifact"),
+            StructuredTool.from_function(func=retrieve_health, coroutine=aretrieve_health,
+                                         args_schema=RetrieveHealthSchema, response_format="content_and_artifact"),
+            StructuredTool.from_function(func=retrieve_short_term, coroutine=aretrieve_short_term,
+                                         args_schema=RetrieveShortTermSchema, response_format="content_and_artifact"),
+            StructuredTool.from_function(func=health_overview, coroutine=ahealth_overview,
+                                         args_schema=HealthOverviewSchema, response_format="content_and_artifact"),
+        ]
 
     def _setup_workflow(self):
         """Setup the LangGraph workflow"""
@@ -221,10 +401,23 @@ class HybridRetrievalAgent:
         )
 
         # Setup workflow nodes
-        def react_retrieval_node(state: AgentState):
-            system = SystemMessage(content=self.RETRIEVAL_SYSTEM)
+        def tenant_config(state: AgentState, config: RunnableConfig) -> RunnableConfig:
+            # Tools read the elderly profile from the config, not from the agent instance
+            configurable = {**(config.get("configurable") or {}), "elderly_id": state["elderly_id"],
+                            "conversation_id": state.get("conversation_id")}
+            return {**config, "configurable": configurable}
+
+        def system_message() -> SystemMessage:
+            # Date filters are relative to the user's day
+            today = datetime.now(SGT).strftime("%Y-%m-%d (%A)")
+            return SystemMessage(content=f"{self.RETRIEVAL_SYSTEM}\n    Today's date: {today}\n")
+
+        def react_retrieval_node(state: AgentState, config: RunnableConfig):
+            system = system_message()
             input_msg = HumanMessage(content=state["user_input"])
-            react_result = self.react_retrieval_agent.invoke({"messages": [system, input_msg]})
+            react_result = self.react_retrieval_agent.invoke(
+                {"messages": [system, input_msg]}, config=tenant_config(state, config)
+            )
 
             # Pull the final AI answer out of the ReAct messages
             last_ai = next(m for m in reversed(react_result["messages"]) if isinstance(m, AIMessage))
@@ -234,46 +427,50 @@ class HybridRetrievalAgent:
                 "retrieval_agent_message": last_ai
             }
 
+        async def areact_retrieval_node(state: AgentState, config: RunnableConfig):
+            system = system_message()
+            input_msg = HumanMessage(content=state["user_input"])
+            react_result = await self.react_retrieval_agent.ainvoke(
+                {"messages": [system, input_msg]}, config=tenant_config(state, config)
+            )
+
+            last_ai = next(m for m in reversed(react_result["messages"]) if isinstance(m, AIMessage))
+
+            return {
+                "messages": react_result["messages"],
+                "retrieval_agent_message": last_ai
+            }
+
         def build_final_template(state: AgentState) -> AgentState:
             """
             Build the final prompt template using retrieved information.
             If a section is empty we write the literal word 'none'.
             """
-            tool_msgs = [m for m in state["messages"] if isinstance(m, ToolMessage)]
-
-            # Bucket the raw tool returns
-            personal, health, conv = [], [], []
-            retrieved_ltm, retrieved_hcm, retrieved_stm = [], [], []
+            # Ranked rows of every tool call, read from the typed artifacts
+            rows = {mode: [] for mode in self.TOOL_OUTPUTS}
             mem_used = []
-
-            for tm in tool_msgs:
-                # The content is a JSON string, so we parse it.
-                try:
-                    content_data = json.loads(tm.content)
-
-                except json.JSONDecodeError:
-                    # Handle cases where content is not a valid JSON string
-                    # For example, if a tool returns a simple string.
-                    content_data = []
-
-                if tm.name == "retrieve_long_term":
-                    mem_used.append("long-term-memory")
-                    retrieved_ltm.extend(content_data)
-                    print(retrieved_ltm)
-                    for r in content_data:
-                        personal.append(f"Category: {r.get('category')}, Key: {r.get('key')}, Value: {r.get('value')}")
-                elif tm.name == "retrieve_health":
-                    mem_used.append("health-data")
-                    retrieved_hcm.extend(content_data)
-                    print(retrieved_hcm)
-                    for r in content_data:
-                        health.append(f"Type: {r.get('record_type')}, Description: {r.get('description')}, Date: {r.get('diagnosis_date')}")
-                elif tm.name == "retrieve_short_term":
-                    mem_used.append("short-term-memory")
-                    retrieved_stm.extend(content_data)
-                    print(retrieved_stm)
-                    for r in content_data:
-                        conv.append(f"Content: {r.get('content')}, Created: {r.get('created_at')}")
+            for tm in state["messages"]:
+                if isinstance(tm, ToolMessage) and isinstance(tm.artifact, RetrievalArtifact):
+                    mem_used.append(self.TOOL_OUTPUTS[tm.artifact.mode][3])
+                    rows[tm.artifact.mode].extend(tm.artifact.rows)
+
+            # Pack each section into its token budget: best MMR rows first, near-duplicates and
+            # repeats across tool calls dropped, long values truncated
+            packed, stats = {}, {}
+            for mode, (render, text_key, section, _, _) in self.TOOL_OUTPUTS.items():
+                packed[section], stats[section] = pack_section(
+                    rows[mode], getattr(self, render), self.context_budgets[section], text_key=text_key)
+
+            tokens_saved = sum(st.tokens_saved for st in stats.values())
+            for section, st in stats.items():
+                if st.rows_in:
+                    metrics.incr("context_tokens_in_total", st.tokens_in, section=section)
+                    metrics.incr("context_tokens_saved_total", st.tokens_saved, section=section)
+                    metrics.incr("context_rows_deduplicated_total", st.duplicates, section=section)
+            metrics.observe("context_tokens_saved", tokens_saved)
+            if tokens_saved:
+                logging.info(f"Context packing saved ~{tokens_saved} prompt tokens this turn "
+                             f"({', '.join(f'{k}: {v.rows_kept}/{v.rows_in} rows' for k, v in stats.items() if v.rows_in)})")
 
             # Helper: join or fallback
             def sect(data):
@@ -289,21 +486,22 @@ class HybridRetrievalAgent:
             - You listen, encourage, and empower — never patronize or presume.
 
             ## User Information and Profile Context:
-            {sect(personal)}
+            {sect(packed['personal'])}
 
             ## User Healthcare Information:
-            {sect(health)}
+            {sect(packed['health'])}
 
             ## Past Conversational information / History
-            {sect(conv)}
+            {sect(packed['conversation'])}
             """
 
             return {
                 "mem_used" : mem_used,
+                "context_tokens_saved": tokens_saved,
                 "final_answer": template,
-                "retrieved_ltm": retrieved_ltm,
-                "retrieved_hcm": retrieved_hcm,
-                "retrieved_stm": retrieved_stm
+                "retrieved_ltm": self._public_rows(rows["long-term"]),
+                "retrieved_hcm": self._public_rows(rows["healthcare"]),
+                "retrieved_stm": self._public_rows(rows["short-term"])
             }
 
         def route_retrieval(state: AgentState):
@@ -322,7 +520,7 @@ class HybridRetrievalAgent:
         workflow = StateGraph(AgentState)
 
         # Add nodes
-        workflow.add_node("Retrieval_Agent", react_retrieval_node)
+        workflow.add_node("Retrieval_Agent", RunnableLambda(react_retrieval_node, afunc=areact_retrieval_node))
         workflow.add_node("execute_retrieval", retrieval_tool_node)
         workflow.add_node("build_final_template", build_final_template)
 
@@ -344,343 +542,410 @@ class HybridRetrievalAgent:
         # Compile the graph
         self.graph = workflow.compile()
 
-    def retrieve_hybrid_ltm(self, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3,
-                        fuzzy_distance: int = 2, alpha_retrieval: float = 0.5):
-        try:
-            emb = self.embedder.embed(query)
-
-            # --- Embeddings ---
-            sql_emb = text(f"""
-                WITH nearest AS MATERIALIZED (
-                    SELECT id, category, key, value, last_updated, embedding,
-                        embedding <=> (:emb)::vector AS distance
-                    FROM long_term_memory
-                    WHERE elderly_id = :elderly_id
-                    ORDER BY distance
-                    LIMIT :top_k
-                )
-                SELECT id, category, key, value, last_updated, embedding, 1 - distance AS similarity
-                FROM nearest
-                {"WHERE 1 - distance >= :threshold" if sim_threshold is not None else ""}
-                ORDER BY distance
-                LIMIT :top_k;
-            """)
-            params_emb = {"emb": str(emb), "elderly_id": self.elderly_id, "top_k": top_k_retrieval}
-            if sim_threshold is not None:
-                params_emb["threshold"] = sim_threshold
-
-            with self.engine.connect() as conn:
-                rows_emb = conn.execute(sql_emb, params_emb).fetchall()
-
-            emb_results = {
-                r.id: {
-                    "id": r.id,
-                    "category": r.category,
-                    "key": r.key,
-                    "value": r.value,
-                    "last_updated": r.last_updated,
-                    "embedding": r.embedding,  # ✅ Added
-                    "emb_score": float(r.similarity)
-                }
-                for r in rows_emb
-            }
-
-            # --- BM25 ---
-            # query = query.replace("'", "''")
-
-            sql_bm25 = text("""
-                SELECT id, category, key, value, last_updated, embedding, paradedb.score(id) AS bm25_score
-                FROM long_term_memory
-                WHERE elderly_id = :elderly_id
-                AND (
-                    category_search @@@ :query OR key @@@ :query OR value @@@ :query
-                    OR id @@@ paradedb.match('category_search', :query, distance => :distance)
-                    OR id @@@ paradedb.match('key', :query, distance => :distance)
-                    OR id @@@ paradedb.match('value', :query, distance => :distance)
-                )
-                ORDER BY bm25_score DESC
-                LIMIT :top_k;
-            """)
-            params_bm25 = {
-                "elderly_id": self.elderly_id,
-                "query": normalize_for_paradedb(query),
-                "distance": fuzzy_distance,
-                "top_k": top_k_retrieval
-            }
+    @staticmethod
+    def _as_datetime(value) -> datetime:
+        """Filter bound (YYYY-MM-DD / ISO string, date or datetime) -> naive Singapore-time datetime"""
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, datetime.min.time())
+        if value.tzinfo is not None:
+            value = value.astimezone(SGT).replace(tzinfo=None)
+        return value
+
+    @classmethod
+    def _normalize_filters(cls, mode: str, filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Validate structured filters for a memory bucket
 
-            with self.engine.connect() as conn:
-                rows_bm25 = conn.execute(sql_bm25, params_bm25).fetchall()
-
-            max_bm25 = max((float(r.bm25_score) for r in rows_bm25), default=1.0)
-            bm25_results = {
-                r.id: {
-                    "id": r.id,
-                    "category": r.category,
-                    "key": r.key,
-                    "value": r.value,
-                    "last_updated": r.last_updated,
-                    "embedding": r.embedding,  # ✅ Added
-                    "bm25_score": float(r.bm25_score) / max_bm25
-                }
-                for r in rows_bm25
-            }
+        Accepted keys (None values are ignored):
+            record_type: HealthRecordTypes value (healthcare)
+            category: LTMCategories value (long-term)
+            date_from / date_to: inclusive Singapore-time dates, YYYY-MM-DD (short-term created_at, healthcare diagnosis_date)
+            start / end: half-open datetime window on the same columns
 
-            # --- Merge + hybrid ---
-            combined = {}
-            all_ids = set(emb_results.keys()) | set(bm25_results.keys())
-
-            for id_ in all_ids:
-                emb_data = emb_results.get(id_, {
-                    "id": id_,
-                    "category": "",
-                    "key": "",
-                    "value": "",
-                    "last_updated": None,
-                    "embedding": [],  # ✅ Default empty list
-                    "emb_score": 0.0
-                })
-                bm25_data = bm25_results.get(id_, {
-                    "id": id_,
-                    "category": "",
-                    "key": "",
-                    "value": "",
-                    "last_updated": None,
-                    "embedding": [],  # ✅ Default empty list
-                    "bm25_score": 0.0
-                })
-
-                combined[id_] = {
-                    "id": id_,
-                    "category": emb_data["category"] or bm25_data["category"],
-                    "key": emb_data["key"] or bm25_data["key"],
-                    "value": emb_data["value"] or bm25_data["value"],
-                    "last_updated": emb_data["last_updated"] or bm25_data["last_updated"],
-                    "embedding": emb_data["embedding"] or bm25_data["embedding"],  # ✅ Merge embedding
-                    "emb_score": emb_data.get("emb_score", 0.0),
-                    "bm25_score": bm25_data.get("bm25_score", 0.0),
-                    "hybrid_score": round(
-                        alpha_retrieval * bm25_data.get("bm25_score", 0.0) +
-                        (1 - alpha_retrieval) * emb_data.get("emb_score", 0.0),
-                        4
-                    )
-                }
+        Returns:
+            dict with "type", "start", "end" keys for the set filters
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        unknown = set(filters) - {"record_type", "category", "date_from", "date_to", "start", "end"}
+        if unknown:
+            raise ValueError(f"Unsupported retrieval filters: {sorted(unknown)}")
+
+        bucket = cls.HYBRID_BUCKETS[mode]
+        normalized = {}
+        for key in ("record_type", "category"):
+            if key not in filters:
+                continue
+            if bucket["type_filter"] is None or bucket["type_filter"][0] != key:
+                raise ValueError(f"'{key}' filter is not supported for {mode} retrieval")
+            normalized["type"] = bucket["type_filter"][1](filters[key]).value
+
+        if {"date_from", "date_to", "start", "end"} & set(filters) and bucket["date_filter"] is None:
+            raise ValueError(f"Date filters are not supported for {mode} retrieval")
+        if "date_from" in filters:
+            normalized["start"] = cls._as_datetime(filters["date_from"])
+        if "date_to" in filters:
+            normalized["end"] = cls._as_datetime(filters["date_to"]) + timedelta(days=1)
+        if "start" in filters:
+            normalized["start"] = max(cls._as_datetime(filters["start"]), normalized.get("start", datetime.min))
+        if "end" in filters:
+            normalized["end"] = min(cls._as_datetime(filters["end"]), normalized.get("end", datetime.max))
+        return normalized
+
+    @classmethod
+    def _temporal_filters(cls, mode: str, query: str, filters: Optional[Dict[str, Any]],
+                          now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Scope date-filterable buckets to the query's time window ("yesterday", "next appointment")"""
+        bucket = cls.HYBRID_BUCKETS[mode]
+        if bucket["date_filter"] is None:
+            return filters
+        if filters and any(filters.get(k) is not None for k in ("date_from", "date_to", "start", "end")):
+            return filters
+
+        # STM rows are stamped when they were said, so a forward-looking window ("tomorrow",
+        # "later", or open-ended like "next appointment" / "upcoming") cannot select them: the
+        # reminder for it was recorded earlier. Healthcare dates are event dates and can be
+        # upcoming, so a bare "on Monday" means the coming Monday there unless the query is in
+        # the past tense
+        _, column_type = bucket["date_filter"]
+        if now is None:
+            now = datetime.now(SGT).replace(tzinfo=None)
+        window = parse_time_window(query, now=now, upcoming=column_type is date)
+        if window is None:
+            return filters
+
+        if column_type is datetime and (window.end is None or (window.start is not None and window.start >= now)):
+            return filters
+
+        metrics.incr("temporal_window_total", mode=mode)
+        return {**(filters or {}), "start": window.start, "end": window.end}
+
+    @staticmethod
+    def _query_window(filters: Optional[Dict[str, Any]], scoped_filters: Optional[Dict[str, Any]]):
+        """(start, end) of the window `_temporal_filters` took from the query, for recency scoring"""
+        if scoped_filters is filters:
+            return None
+        return scoped_filters["start"], scoped_filters["end"]
+
+    @classmethod
+    def _filter_clause(cls, mode: str, filters: Dict[str, Any]):
+        """
+        SQL predicate (prefixed with AND) and parameters for normalized filters. Windows are
+        Singapore time: whole SGT days for DATE columns, converted to UTC for TIMESTAMP columns
+        (`created_at` is stored as naive UTC)
+        """
+        bucket = cls.HYBRID_BUCKETS[mode]
+        clauses, params = [], {}
+
+        if "type" in filters:
+            clauses.append(f"{bucket['type_filter'][0]} = :type_filter")
+            params["type_filter"] = filters["type"]
+
+        if bucket["date_filter"] is not None:
+            column, column_type = bucket["date_filter"]
+            start, end = filters.get("start"), filters.get("end")
+            if column_type is date:
+                # DATE column: widen the window to whole days
+                start = start.date() if start is not None else None
+                if end is not None:
+                    end = end.date() + timedelta(days=1) if end.time() != datetime.min.time() else end.date()
+            else:
+                start = sgt_to_utc(start) if start is not None else None
+                end = sgt_to_utc(end) if end is not None else None
+            if start is not None:
+                clauses.append(f"{column} >= :start_filter")
+                params["start_filter"] = start
+            if end is not None:
+                clauses.append(f"{column} < :end_filter")
+                params["end_filter"] = end
+
+        return "".join(f" AND {c}" for c in clauses), params
+
+    def _hybrid_statements(
+        self,
+        mode: str,
+        emb: List[float],
+        query: str,
+        elderly_id: str,
+        top_k_retrieval: int,
+        sim_threshold: Optional[float],
+        fuzzy_distance: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ):
+        """Build the (ANN, BM25) statements and parameters for one memory bucket"""
+        bucket = self.HYBRID_BUCKETS[mode]
+        columns = bucket["columns"]
+        filter_sql, filter_params = self._filter_clause(mode, filters or {})
+
+        # --- Embeddings ---
+        sql_emb = text(f"""
+            WITH nearest AS MATERIALIZED (
+                SELECT {columns}, embedding,
+                    embedding <=> (CAST(:emb AS text))::vector AS distance
+                FROM {bucket["table"]}
+                WHERE elderly_id = :elderly_id{filter_sql}
+                ORDER BY distance
+                LIMIT :top_k
+            )
+            SELECT {columns}, embedding::text AS embedding, 1 - distance AS similarity
+            FROM nearest
+            {"WHERE 1 - distance >= :threshold" if sim_threshold is not None else ""}
+            ORDER BY distance
+            LIMIT :top_k;
+        """)
+        params_emb = {"emb": str(emb), "elderly_id": elderly_id, "top_k": top_k_retrieval, **filter_params}
+        if sim_threshold is not None:
+            params_emb["threshold"] = sim_threshold
+
+        # --- BM25 ---
+        sql_bm25 = text(f"""
+            SELECT {columns}, embedding::text AS embedding, paradedb.score(id) AS bm25_score
+            FROM {bucket["table"]}
+            WHERE elderly_id = :elderly_id{filter_sql}
+            AND {bucket["bm25_match"]}
+            ORDER BY bm25_score DESC
+            LIMIT :top_k;
+        """)
+        params_bm25 = {
+            "elderly_id": elderly_id,
+            "query": normalize_for_paradedb(query),
+            "distance": fuzzy_distance,
+            "top_k": top_k_retrieval,
+            **filter_params
+        }
 
-            return sorted(combined.values(), key=lambda x: x["hybrid_score"], reverse=True)[:top_k_retrieval]
+        return (sql_emb, params_emb), (sql_bm25, params_bm25)
 
-        except Exception as e:
-            logging.warning(f"❌ Failed hybrid LTM retrieval: {str(e)}")
-            return []
+    @staticmethod
+    def _decode_row(mode: str, r) -> Dict[str, Any]:
+        """Convert a SQL row of the given bucket into a candidate dict"""
+        return {**dict(zip(BUCKET_FIELDS[mode], decode_values(mode, r))), "embedding": r.embedding}
 
-    def retrieve_hybrid_stm(self, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3, fuzzy_distance: int = 2, alpha_retrieval: float = 0.5):
+    def _retrieve_hybrid(self, mode: str, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3,
+                         fuzzy_distance: int = 2, alpha_retrieval: float = 0.5,
+                         elderly_id: Optional[str] = None, vector_only: bool = False,
+                         filters: Optional[Dict[str, Any]] = None,
+                         query_embedding: Optional[List[float]] = None) -> CandidateSet:
+        filters = self._normalize_filters(mode, filters)
         try:
-            emb = self.embedder.embed(query)
-
-            # --- Embeddings ---
-            sql_emb = text(f"""
-                WITH nearest AS MATERIALIZED (
-                    SELECT
-                        id, content, created_at, embedding,
-                        embedding <=> (:emb)::vector AS distance
-                    FROM short_term_memory
-                    WHERE elderly_id = :elderly_id
-                    ORDER BY distance
-                    LIMIT :top_k
-                )
-                SELECT id, content, created_at, embedding, 1 - distance AS similarity
-                FROM nearest
-                {"WHERE 1 - distance >= :threshold" if sim_threshold is not None else ""}
-                ORDER BY distance
-                LIMIT :top_k;
-            """)
-            params_emb = {"emb": str(emb), "elderly_id": self.elderly_id, "top_k": top_k_retrieval}
-            if sim_threshold is not None:
-                params_emb["threshold"] = sim_threshold
-
-            with self.engine.connect() as conn:
-                rows_emb = conn.execute(sql_emb, params_emb).fetchall()
-
-            emb_results = {
-                r.id: {
-                    "id": r.id,
-                    "content": r.content,
-                    "created_at": r.created_at,
-                    "embedding": r.embedding,
-                    "emb_score": float(r.similarity)
-                }
-                for r in rows_emb
-            }
-
-            # --- BM25 ---
-            # query = query.replace("'", "''")
+            elderly_id = self._resolve_elderly_id(elderly_id)
+            emb = query_embedding
+            if emb is None:
+                with self.load_controller.timed("embed"):
+                    emb = self.embedder.embed(query)
+            (sql_emb, params_emb), (sql_bm25, params_bm25) = self._hybrid_statements(
+                mode, emb, query, elderly_id, top_k_retrieval, sim_threshold, fuzzy_distance, filters
+            )
 
-            sql_bm25 = text("""
-                SELECT id, content, created_at, embedding, paradedb.score(id) AS bm25_score
-                FROM short_term_memory
-                WHERE elderly_id = :elderly_id
-                AND (content @@@ :query OR id @@@ paradedb.match('content', :query, distance => :distance))
-                ORDER BY bm25_score DESC
-                LIMIT :top_k;
-            """)
-            params_bm25 = {"elderly_id": self.elderly_id, "query": normalize_for_paradedb(query), "distance": fuzzy_distance, "top_k": top_k_retrieval}
+            rows_bm25 = []
             with self.engine.connect() as conn:
-                rows_bm25 = conn.execute(sql_bm25, params_bm25).fetchall()
-
-            max_bm25 = max((float(r.bm25_score) for r in rows_bm25), default=1.0)
-            bm25_results = {
-                r.id: {
-                    "id": r.id,
-                    "content": r.content,
-                    "created_at": r.created_at,
-                    "embedding": r.embedding,  # ✅ Added
-                    "bm25_score": float(r.bm25_score) / max_bm25
-                }
-                for r in rows_bm25
-            }
+                with self.load_controller.timed("ann"):
+                    rows_emb = conn.execute(sql_emb, params_emb).fetchall()
+                # The vector-only tier skips the BM25 leg entirely
+                if not vector_only:
+                    with self.load_controller.timed("bm25"):
+                        rows_bm25 = conn.execute(sql_bm25, params_bm25).fetchall()
 
-            # --- Merge + hybrid ---
-            combined = {}
-            for id_, r in {**emb_results, **bm25_results}.items():
-                emb_score = emb_results.get(id_, {}).get("emb_score", 0.0)
-                bm25_score = bm25_results.get(id_, {}).get("bm25_score", 0.0)
-                hybrid = alpha_retrieval * bm25_score + (1 - alpha_retrieval) * emb_score
-                combined[id_] = {
-                    **r,
-                    "emb_score": emb_score,
-                    "bm25_score": bm25_score,
-                    "hybrid_score": round(hybrid, 4)
-                }
-
-            return sorted(combined.values(), key=lambda x: x["hybrid_score"], reverse=True)[:top_k_retrieval]
+            return CandidateSet.from_legs(mode, rows_emb, rows_bm25, top_k_retrieval, alpha_retrieval)
 
         except Exception as e:
-            logging.warning(f"❌ Failed hybrid STM retrieval: {str(e)}")
-            return []
+            logging.warning(f"❌ Failed hybrid {self.HYBRID_BUCKETS[mode]['label']} retrieval: {str(e)}")
+            return CandidateSet.empty(mode)
 
-    def retrieve_hybrid_hcm(self, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3,
-                         fuzzy_distance: int = 2, alpha_retrieval: float = 0.5):
-        try:
-            emb = self.embedder.embed(query)
-
-            # --- Embeddings ---
-            sql_emb = text(f"""
-                WITH nearest AS MATERIALIZED (
-                    SELECT id, record_type, description, diagnosis_date, last_updated, embedding,
-                        embedding <=> (:emb)::vector AS distance
-                    FROM healthcare_records
-                    WHERE elderly_id = :elderly_id
-                    ORDER BY distance
-                    LIMIT :top_k
-                )
-                SELECT id, record_type, description, diagnosis_date, last_updated, embedding, 1 - distance AS similarity
-                FROM nearest
-                {"WHERE 1 - distance >= :threshold" if sim_threshold is not None else ""}
-                ORDER BY distance
-                LIMIT :top_k;
-            """)
-            params_emb = {"emb": str(emb), "elderly_id": self.elderly_id, "top_k": top_k_retrieval}
-            if sim_threshold is not None:
-                params_emb["threshold"] = sim_threshold
-
-            with self.engine.connect() as conn:
-                rows_emb = conn.execute(sql_emb, params_emb).fetchall()
-
-            emb_results = {
-                r.id: {
-                    "id": r.id,
-                    "record_type": r.record_type,
-                    "description": r.description,
-                    "diagnosis_date": r.diagnosis_date.isoformat() if r.diagnosis_date else None,
-                    "last_updated": r.last_updated.isoformat() if r.last_updated else None,
-                    "embedding": r.embedding,  # ✅ Added
-                    "emb_score": float(r.similarity)
-                }
-                for r in rows_emb
-            }
+    def _batch_hybrid_statements(self, mode: str, sim_threshold: Optional[float]):
+        """
+        (ANN, BM25) statements answering many (elderly_id, query) pairs at once: the requests are
+        unnested into a `batch` relation and each leg runs per request in a LATERAL subquery,
+        so every row comes back tagged with its request index `idx`
+        """
+        bucket = self.HYBRID_BUCKETS[mode]
+        columns = bucket["columns"]
+        batch = """
+            WITH batch AS (
+                SELECT * FROM unnest(
+                    CAST(:idx AS int[]), CAST(:elderly_ids AS uuid[]), CAST(:embs AS text[]), CAST(:queries AS text[])
+                ) AS b(idx, elderly_id, emb, query)
+            )
+        """
 
-            # --- BM25 ---
-            # query = query.replace("'", "''")
-
-            sql_bm25 = text("""
-                SELECT id, record_type, description, diagnosis_date, last_updated, embedding, paradedb.score(id) AS bm25_score
-                FROM healthcare_records
-                WHERE elderly_id = :elderly_id
-                AND (
-                    record_type_search @@@ :query OR description @@@ :query
-                    OR id @@@ paradedb.match('record_type_search', :query, distance => :distance)
-                    OR id @@@ paradedb.match('description', :query, distance => :distance)
-                )
+        sql_emb = text(f"""
+            {batch}
+            SELECT b.idx, nearest.*
+            FROM batch b
+            CROSS JOIN LATERAL (
+                SELECT {columns}, embedding::text AS embedding,
+                    1 - (embedding <=> b.emb::vector) AS similarity
+                FROM {bucket["table"]} t
+                WHERE t.elderly_id = b.elderly_id
+                ORDER BY t.embedding <=> b.emb::vector
+                LIMIT :top_k
+            ) nearest
+            {"WHERE nearest.similarity >= :threshold" if sim_threshold is not None else ""}
+            ORDER BY b.idx, nearest.similarity DESC;
+        """)
+
+        sql_bm25 = text(f"""
+            {batch}
+            SELECT b.idx, matched.*
+            FROM batch b
+            CROSS JOIN LATERAL (
+                SELECT {columns}, embedding::text AS embedding, paradedb.score(id) AS bm25_score
+                FROM {bucket["table"]} t
+                WHERE t.elderly_id = b.elderly_id
+                AND {bucket["bm25_match"].replace(":query", "b.query")}
                 ORDER BY bm25_score DESC
-                LIMIT :top_k;
-            """)
-            params_bm25 = {
-                "elderly_id": self.elderly_id,
-                "query": normalize_for_paradedb(query),
-                "distance": fuzzy_distance,
-                "top_k": top_k_retrieval
-            }
+                LIMIT :top_k
+            ) matched
+            ORDER BY b.idx, matched.bm25_score DESC;
+        """)
+        return sql_emb, sql_bm25
+
+    def _retrieve_hybrid_batch(self, mode: str, requests: Sequence[Tuple[str, str]], embeddings: List[List[float]],
+                               top_k_retrieval: int, sim_threshold: Optional[float], fuzzy_distance: int,
+                               alpha_retrieval: float) -> List[CandidateSet]:
+        """Fused candidates for each (elderly_id, query) request, two statements in total"""
+        sql_emb, sql_bm25 = self._batch_hybrid_statements(mode, sim_threshold)
+        params = {
+            "idx": list(range(len(requests))),
+            "elderly_ids": [str(elderly_id) for elderly_id, _ in requests],
+            "embs": [str(emb) for emb in embeddings],
+            "queries": [normalize_for_paradedb(query) for _, query in requests],
+            "top_k": top_k_retrieval,
+            "distance": fuzzy_distance,
+        }
+        if sim_threshold is not None:
+            params["threshold"] = sim_threshold
+
+        rows_emb: List[list] = [[] for _ in requests]
+        rows_bm25: List[list] = [[] for _ in requests]
+        with self.engine.connect() as conn:
+            with self.load_controller.timed("ann_batch"):
+                for r in conn.execute(sql_emb, params).fetchall():
+                    rows_emb[r.idx].append(r)
+            try:
+                with self.load_controller.timed("bm25_batch"):
+                    for r in conn.execute(sql_bm25, params).fetchall():
+                        rows_bm25[r.idx].append(r)
+            except SQLAlchemyError as e:
+                # Some pg_search versions reject a BM25 query string that is not a constant;
+                # fall back to one BM25 statement per request on the same connection
+                conn.rollback()
+                logging.warning(f"❌ Batched BM25 leg failed, running it per request: {str(e)}")
+                for i, ((elderly_id, query), emb) in enumerate(zip(requests, embeddings)):
+                    _, (sql, bm25_params) = self._hybrid_statements(
+                        mode, emb, query, str(elderly_id), top_k_retrieval, sim_threshold, fuzzy_distance
+                    )
+                    rows_bm25[i] = conn.execute(sql, bm25_params).fetchall()
 
-            with self.engine.connect() as conn:
-                rows_bm25 = conn.execute(sql_bm25, params_bm25).fetchall()
-
-            max_bm25 = max((float(r.bm25_score) for r in rows_bm25), default=1.0)
-            bm25_results = {
-                r.id: {
-                    "id": r.id,
-                    "record_type": r.record_type,
-                    "description": r.description,
-                    "diagnosis_date": r.diagnosis_date.isoformat() if r.diagnosis_date else None,
-                    "last_updated": r.last_updated.isoformat() if r.last_updated else None,
-                    "embedding": r.embedding,  # ✅ Added
-                    "bm25_score": float(r.bm25_score) / max_bm25
-                }
-                for r in rows_bm25
-            }
+        return [
+            CandidateSet.from_legs(mode, emb_rows, bm25_rows, top_k_retrieval, alpha_retrieval)
+            for emb_rows, bm25_rows in zip(rows_emb, rows_bm25)
+        ]
 
-            # --- Merge + hybrid ---
-            combined = {}
-            all_ids = set(emb_results.keys()) | set(bm25_results.keys())
-
-            for id_ in all_ids:
-                emb_data = emb_results.get(id_, {
-                    "id": id_,
-                    "record_type": "",
-                    "description": "",
-                    "diagnosis_date": None,
-                    "last_updated": None,
-                    "embedding": [],  # ✅ Default empty list
-                    "emb_score": 0.0
-                })
-                bm25_data = bm25_results.get(id_, {
-                    "id": id_,
-                    "record_type": "",
-                    "description": "",
-                    "diagnosis_date": None,
-                    "last_updated": None,
-                    "embedding": [],  # ✅ Default empty list
-                    "bm25_score": 0.0
-                })
-
-                combined[id_] = {
-                    "id": id_,
-                    "record_type": emb_data["record_type"] or bm25_data["record_type"],
-                    "description": emb_data["description"] or bm25_data["description"],
-                    "diagnosis_date": emb_data["diagnosis_date"] or bm25_data["diagnosis_date"],
-                    "last_updated": emb_data["last_updated"] or bm25_data["last_updated"],
-                    "embedding": emb_data["embedding"] or bm25_data["embedding"],  # ✅ Merge embedding
-                    "emb_score": emb_data.get("emb_score", 0.0),
-                    "bm25_score": bm25_data.get("bm25_score", 0.0),
-                    "hybrid_score": round(
-                        alpha_retrieval * bm25_data.get("bm25_score", 0.0) +
-                        (1 - alpha_retrieval) * emb_data.get("emb_score", 0.0),
-                        4
-                    )
-                }
+    def retrieve_rerank_batch(
+        self,
+        requests: Sequence[Tuple[str, str]],
+        mode: str = "long-term",  # Options: "short-term", "long-term", "healthcare"
+        top_k_retrieval: int = 25,
+        sim_threshold: float = 0.3,
+        fuzzy_distance: int = 2,
+        alpha_retrieval: float = 0.5,
+        cross_encoder: Optional[CrossEmbedder] = None,
+        alpha_MMR: float = 0.75,
+        beta_recency: float = 0.1,
+        top_k_MMR: int = 8,
+        ce_batch_size: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Batched multi-tenant `retrieve_rerank` for offline jobs (nightly caregiver summaries,
+        evaluation runs): one `embed_batch` call for every query, one LATERAL statement per SQL
+        leg per `BATCH_SQL_SIZE` requests, and the cascade heads of all requests cross-encoded
+        together in batches of `ce_batch_size` pairs.
 
-            return sorted(combined.values(), key=lambda x: x["hybrid_score"], reverse=True)[:top_k_retrieval]
+        Args:
+            requests: (elderly_id, query) pairs; elderly ids may repeat
+            mode: Memory bucket to search
 
-        except Exception as e:
-            logging.warning(f"❌ Failed hybrid health retrieval: {str(e)}")
+        Returns:
+            List[List[dict]]: Reranked rows for each request, in request order
+        """
+        if mode not in self.HYBRID_BUCKETS:
+            raise ValueError(f"Unsupported mode: {mode}. Choose from 'short-term', 'long-term', or 'healthcare'.")
+        if not requests:
             return []
+        if cross_encoder is None:
+            cross_encoder = self.encoder
+        ce_batch_size = ce_batch_size or self.BATCH_CE_SIZE
+        started = time.perf_counter()
+
+        # Step 1: every query embedded in one call
+        with self.load_controller.timed("embed_batch"):
+            embeddings = self.embedder.embed_batch([query for _, query in requests])
+
+        # Step 2: both SQL legs for a chunk of requests in one statement each
+        candidates: List[CandidateSet] = []
+        for start in range(0, len(requests), self.BATCH_SQL_SIZE):
+            chunk = slice(start, start + self.BATCH_SQL_SIZE)
+            candidates.extend(self._retrieve_hybrid_batch(
+                mode, requests[chunk], embeddings[chunk], top_k_retrieval, sim_threshold,
+                fuzzy_distance, alpha_retrieval
+            ))
+
+        # Step 3: cascade per request, then cross-encode all heads together
+        heads, pairs, spans = [], [], []
+        for (_, query), cands in zip(requests, candidates):
+            head = cands.cascade(min_keep=top_k_MMR, max_keep=self.CASCADE_FACTOR * top_k_MMR,
+                                 min_gap=self.CASCADE_MIN_GAP)
+            heads.append(head)
+            if len(head) <= top_k_MMR:
+                spans.append(None)  # MMR keeps them all; ordered by fusion score
+                continue
+            spans.append((len(pairs), len(pairs) + len(head)))
+            pairs.extend([query, text] for text in head.texts())
+
+        ce_scores = np.zeros(0, dtype=np.float32)
+        if pairs:
+            with self.load_controller.timed("cross_encoder_batch"):
+                ce_scores = np.concatenate([
+                    np.asarray(cross_encoder.predict(pairs[i:i + ce_batch_size], batch_size=ce_batch_size),
+                               dtype=np.float32)
+                    for i in range(0, len(pairs), ce_batch_size)
+                ])
+            metrics.incr("cross_encoder_pairs_total", len(pairs))
+
+        # Step 4: MMR + recency per request on the precomputed relevance scores
+        results = []
+        for (_, query), head, span in zip(requests, heads, spans):
+            scores = self._fusion_scores(head) if span is None else ce_scores[span[0]:span[1]]
+            reranked = self._rerank_set(
+                query, head, cross_encoder, alpha_MMR=alpha_MMR, beta_recency=beta_recency,
+                top_k_MMR=top_k_MMR, cascade=False, ce_raw_scores=scores,
+                window=self._query_window(None, self._temporal_filters(mode, query, None))
+            )
+            results.append(reranked.to_dicts())
+
+        metrics.incr("batch_retrieval_requests_total", len(requests), mode=mode)
+        metrics.observe("batch_retrieval_latency_ms", (time.perf_counter() - started) * 1000.0, mode=mode)
+        return results
+
+    def retrieve_hybrid_ltm(self, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3,
+                        fuzzy_distance: int = 2, alpha_retrieval: float = 0.5,
+                        elderly_id: Optional[str] = None, filters: Optional[Dict[str, Any]] = None):
+        return self._retrieve_hybrid("long-term", query, top_k_retrieval, sim_threshold, fuzzy_distance, alpha_retrieval,
+                                     elderly_id=elderly_id, filters=filters).to_dicts(keep_scores=True)
+
+    def retrieve_hybrid_stm(self, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3,
+                        fuzzy_distance: int = 2, alpha_retrieval: float = 0.5,
+                        elderly_id: Optional[str] = None, filters: Optional[Dict[str, Any]] = None):
+        return self._retrieve_hybrid("short-term", query, top_k_retrieval, sim_threshold, fuzzy_distance, alpha_retrieval,
+                                     elderly_id=elderly_id, filters=filters).to_dicts(keep_scores=True)
+
+    def retrieve_hybrid_hcm(self, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3,
+                        fuzzy_distance: int = 2, alpha_retrieval: float = 0.5,
+                        elderly_id: Optional[str] = None, filters: Optional[Dict[str, Any]] = None):
+        return self._retrieve_hybrid("healthcare", query, top_k_retrieval, sim_threshold, fuzzy_distance, alpha_retrieval,
+                                     elderly_id=elderly_id, filters=filters).to_dicts(keep_scores=True)
 
     def rerank_with_mmr_and_recency(
         self,
@@ -690,43 +955,91 @@ class HybridRetrievalAgent:
         alpha_MMR: float = 0.7,   # MMR balance: relevance vs diversity
         beta_recency: float = 0.1,    # Small bonus for recency
         top_k_MMR: int = 5,
+        rerank_top_n: Optional[int] = None,  # cascade cap; defaults to CASCADE_FACTOR * top_k_MMR
+        cascade: bool = True,  # False cross-encodes every candidate (benchmark baseline)
+        ce_raw_scores: Optional[np.ndarray] = None,  # precomputed (batched) cross-encoder scores
+        window: Optional[Tuple[Optional[datetime], Optional[datetime]]] = None,  # query time window (SGT)
     ) -> List[Dict[str, Any]]:
+        """Dict-in / dict-out wrapper of `_rerank_set`; results keep their scores and parsed embeddings"""
         if not candidates:
             return []
-        
+        if not isinstance(candidates, CandidateSet):
+            candidates = CandidateSet.from_dicts(candidates)
+        return self._rerank_set(
+            query, candidates, cross_encoder, alpha_MMR, beta_recency, top_k_MMR, rerank_top_n, cascade, ce_raw_scores,
+            window
+        ).to_dicts(keep_scores=True)
+
+    @staticmethod
+    def _fusion_scores(candidates: CandidateSet) -> np.ndarray:
+        if candidates.hybrid_score is None:
+            return np.ones(len(candidates), dtype=np.float32)
+        return candidates.hybrid_score.astype(np.float32)
+
+    def _rerank_set(
+        self,
+        query: str,
+        candidates: CandidateSet,
+        cross_encoder: CrossEmbedder,
+        alpha_MMR: float = 0.7,
+        beta_recency: float = 0.1,
+        top_k_MMR: int = 5,
+        rerank_top_n: Optional[int] = None,
+        cascade: bool = True,
+        ce_raw_scores: Optional[np.ndarray] = None,
+        window: Optional[Tuple[Optional[datetime], Optional[datetime]]] = None,
+    ) -> CandidateSet:
+        """
+        Cascade + cross-encoder + MMR with recency bias; returns the selected candidates in MMR order.
+        `window` is the query's SGT time window as `_temporal_filters` resolved it (`_query_window`)
+        """
+        if not len(candidates):
+            return candidates
+
+        # Cascade: only the adaptive head of the hybrid ranking reaches the cross-encoder
+        if cascade:
+            head = candidates.cascade(min_keep=top_k_MMR, max_keep=self.CASCADE_FACTOR * top_k_MMR,
+                                      min_gap=self.CASCADE_MIN_GAP)
+            if len(head) > top_k_MMR:
+                # Pairs the full tier cross-encodes, measured under the top-N cap too, so the
+                # controller's FULL prediction does not shrink to the capped count
+                self.load_controller.record("cross_encoder_pairs", len(head))
+            if rerank_top_n is not None:
+                head = candidates.cascade(min_keep=top_k_MMR, max_keep=rerank_top_n, min_gap=self.CASCADE_MIN_GAP)
+            candidates = head
+
         #################################################################
         # --- Extracting relevant metadata about information chunks --- #
         #################################################################
 
-        # ensure recency scores exist (already scaled 0–1)
-        candidates = compute_recency_score(candidates, query)
-
-        # extract texts
-        texts = []
-        for r in candidates:
-            text = r.get("content") or r.get("value") or r.get("description")
-            if not isinstance(text, str) or not text.strip():
-                raise ValueError("Each result must have one of 'content', 'value', or 'description' as non-empty string.")
-            texts.append(text)
-
-        # extract embeddings
-        embeddings = []
-        for r in candidates:
-            emb_str = r.pop("embedding", None)
-            emb_list = [float(x) for x in emb_str.strip("[]").split(",")]  # embeddings are saved as strings
-            embeddings.append(emb_list)
-        embeddings = np.array(embeddings, dtype=np.float32)
+        texts = candidates.texts()
+        if not all(isinstance(text, str) and text.strip() for text in texts):
+            raise ValueError("Each result must have one of 'content', 'value', or 'description' as non-empty string.")
+
+        # embeddings are saved as strings; parsed once into an (n, d) matrix
+        embeddings = candidates.embeddings
 
         # recency is already normalized [0,1]
-        recency_normalized = np.array([r.get("recency_score", 0.0) for r in candidates], dtype=np.float32)
+        recency_normalized = np.array(recency_scores(candidates.timestamps(), window), dtype=np.float32)
 
         #################################################################
         # ---               Computing CE Relevance                    --- #
         #################################################################
-        
-        # relevance from cross-encoder
-        pairs = [[query, text] for text in texts]
-        ce_raw_scores = cross_encoder.predict(pairs)
+
+        if ce_raw_scores is not None:
+            ce_raw_scores = np.asarray(ce_raw_scores, dtype=np.float32)
+        elif cascade and rerank_top_n is None and len(candidates) <= top_k_MMR:
+            # MMR keeps every candidate anyway, so the fusion score is enough to order them (the
+            # capped cross_encoder_top_n tier always cross-encodes, or it would be hybrid_only)
+            ce_raw_scores = self._fusion_scores(candidates)
+            metrics.incr("cross_encoder_skipped_total")
+        else:
+            # relevance from cross-encoder
+            pairs = [[query, text] for text in texts]
+            ce_start = time.perf_counter()
+            ce_raw_scores = np.asarray(cross_encoder.predict(pairs), dtype=np.float32)
+            self.load_controller.record("cross_encoder_pair", (time.perf_counter() - ce_start) / len(pairs))
+            metrics.incr("cross_encoder_pairs_total", len(pairs))
 
         # normalize cross_encoder scores [0,1]
         min_score, max_score = ce_raw_scores.min(), ce_raw_scores.max()
@@ -738,46 +1051,227 @@ class HybridRetrievalAgent:
         #################################################################
         # ---                  MMR Greedy Selection                  --- #
         #################################################################
-        cos_sim_matrix = cosine_similarity(embeddings)  # Shape: (n, n)
+        mmr_start = time.perf_counter()
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        unit = embeddings / np.where(norms == 0, 1.0, norms)
+        cos_sim_matrix = unit @ unit.T  # Shape: (n, n)
+
+        # Relevance + recency part of each MMR score; the diversity penalty is the max similarity
+        # to the candidates selected so far, updated after every pick
+        base = alpha_MMR * ce_scores + beta_recency * recency_normalized
+        max_sim = np.zeros(len(candidates), dtype=np.float32)
+        available = np.ones(len(candidates), dtype=bool)
+        mmr_scores = np.zeros(len(candidates), dtype=np.float64)
         selected_indices = []
-        remaining_indices = list(range(len(candidates)))
 
-        while len(selected_indices) < top_k_MMR and remaining_indices:
-            best_score, best_idx = -float("inf"), None
+        while len(selected_indices) < min(top_k_MMR, len(candidates)):
+            scores = np.where(available, base - (1 - alpha_MMR) * max_sim, -np.inf)
+            best_idx = int(np.argmax(scores))  # first of equal scores, as the scalar loop picked
+            selected_indices.append(best_idx)
+            mmr_scores[best_idx] = scores[best_idx]
+            available[best_idx] = False
+            # max over the selected set only: similarities can be negative, so no 0 floor
+            if len(selected_indices) == 1:
+                max_sim = cos_sim_matrix[best_idx]
+            else:
+                max_sim = np.maximum(max_sim, cos_sim_matrix[best_idx])
+        self.load_controller.record("mmr", time.perf_counter() - mmr_start)
 
-            for idx in remaining_indices:
-                ce_score = ce_scores[idx]
-                max_sim = max((cos_sim_matrix[idx][s] for s in selected_indices), default=0.0)
+        #################################################################
+        # ---             Reorder results and add metadata           ---#
+        #################################################################
+        return candidates.take(
+            selected_indices,
+            cross_encoder_score=ce_scores,
+            recency_score=recency_normalized,
+            mmr_score=mmr_scores,
+        )
 
-                # MMR with recency bias
-                mmr_score = alpha_MMR * ce_score - (1 - alpha_MMR) * max_sim
-                mmr_score += beta_recency * recency_normalized[idx]
+    def _rerank_for_tier(self, tier: RetrievalTier, query: str, candidates: CandidateSet,
+                         cross_encoder: CrossEmbedder, alpha_MMR: float, beta_recency: float,
+                         top_k_MMR: int, window=None) -> CandidateSet:
+        # Cheap tiers keep the fusion (or ANN) order
+        if tier == RetrievalTier.VECTOR_ONLY:
+            return candidates.sort_by("emb_score", top_k_MMR)
+        if tier == RetrievalTier.HYBRID_ONLY:
+            return candidates.sort_by("hybrid_score", top_k_MMR)
+        return self._rerank_set(
+            query=query,
+            candidates=candidates,
+            cross_encoder=cross_encoder,
+            alpha_MMR=alpha_MMR,
+            beta_recency=beta_recency,
+            top_k_MMR=top_k_MMR,
+            rerank_top_n=self.load_controller.config.top_n if tier == RetrievalTier.CROSS_ENCODER_TOP_N else None,
+            window=window
+        )
 
-                if mmr_score > best_score:
-                    best_score, best_idx = mmr_score, idx
+    def _record_tier(self, mode: str, tier: RetrievalTier, started: float) -> None:
+        metrics.incr("retrieval_tier_total", mode=mode, tier=tier.value)
+        metrics.observe("retrieval_latency_ms", (time.perf_counter() - started) * 1000.0, mode=mode, tier=tier.value)
+
+    def _ltm_fast_path_lookup(self, table: Dict[str, Any], query: str,
+                              filters: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        rows = LTMKeyIndex.lookup(table, query, category=filters.get("type"))
+
+        metrics.incr("ltm_fast_path_total")
+        if rows is not None:
+            metrics.incr("ltm_fast_path_hits_total")
+        total = int(metrics.counter("ltm_fast_path_total"))
+        if total % 100 == 0:
+            hit_rate = metrics.ratio("ltm_fast_path_hits_total", "ltm_fast_path_total")
+            logging.info(f"LTM key-value fast path hit rate: {hit_rate:.1%} over {total} lookups")
+
+        if rows is None:
+            return None
+        return [{k: v for k, v in r.items() if k != "embedding"} for r in rows]
+
+    def _ltm_key_table(self, elderly_id: str) -> Dict[str, Dict[str, Any]]:
+        """The tenant's LTM key table (all LTM rows with their embeddings), loaded on a miss"""
+        table = self.ltm_key_index.get(elderly_id)
+        if table is None:
+            version = change_feed.data_version(elderly_id)
+            with self.engine.connect() as conn:
+                rows = conn.execute(self.LTM_KEY_INDEX_SQL, {"elderly_id": elderly_id}).fetchall()
+            rows = [self._decode_row("long-term", r) for r in rows]
+            # Only cache what no concurrent write has made stale
+            if change_feed.data_version(elderly_id) == version:
+                table = self.ltm_key_index.set(elderly_id, rows)
+            else:
+                table = LTMKeyIndex.build(rows)
+        return table
+
+    def _ltm_fast_path(self, query: str, elderly_id: Optional[str],
+                       filters: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Answer single-fact LTM questions from the tenant's key table; None falls through to hybrid"""
+        try:
+            elderly_id = self._resolve_elderly_id(elderly_id)
+            return self._ltm_fast_path_lookup(self._ltm_key_table(elderly_id), query, filters)
 
-            if best_idx is None:
-                break
+        except Exception as e:
+            logging.warning(f"❌ LTM key-value fast path failed: {str(e)}")
+            return None
+
+    def _health_overview_rows(self, index: TenantHealthIndex, kind: Optional[str],
+                              today: Optional[date]) -> List[Dict[str, Any]]:
+        today = today or datetime.now(SGT).date()
+        medications, appointments = self.healthcare_index.snapshot(index, today, limit=self.UPCOMING_APPOINTMENTS)
+        records = []
+        if kind in (None, "medications"):
+            records.extend(medications)
+        if kind in (None, "appointments"):
+            records.extend(appointments)
+
+        metrics.incr("health_overview_total", kind=kind or "all")
+        return [
+            {
+                **r,
+                "diagnosis_date": r["diagnosis_date"].isoformat() if r["diagnosis_date"] else None,
+                "last_updated": r["last_updated"].isoformat() if isinstance(r["last_updated"], datetime)
+                else r["last_updated"],
+            }
+            for r in records
+        ]
 
-            selected_indices.append(best_idx)
-            remaining_indices.remove(best_idx)
+    def _health_index(self, elderly_id: str) -> TenantHealthIndex:
+        """The tenant's medication / appointment index, loaded or patched with rows written elsewhere"""
+        index = self.healthcare_index.get(elderly_id)
+        if index is None:
+            version = change_feed.data_version(elderly_id)
+            with self.engine.connect() as conn:
+                rows = conn.execute(self.HEALTH_INDEX_SQL, {"elderly_id": elderly_id}).fetchall()
+            rows = [dict(r._mapping) for r in rows]
+            # Only cache what no concurrent write has made stale
+            if change_feed.data_version(elderly_id) == version:
+                return self.healthcare_index.set(elderly_id, rows)
+            return TenantHealthIndex(rows)
+
+        stale = self.healthcare_index.pop_stale(elderly_id)
+        if stale:
+            with self.engine.connect() as conn:
+                rows = conn.execute(self.HEALTH_INDEX_ROWS_SQL,
+                                    {"elderly_id": elderly_id, "ids": sorted(stale)}).fetchall()
+            self.healthcare_index.refresh(elderly_id, stale, [dict(r._mapping) for r in rows])
+        return index
 
-        #################################################################
-        # ---             Reorder results and add metadata           ---#
-        #################################################################
-        ranked_results = [candidates[i] for i in selected_indices]
-
-        for i, result in enumerate(ranked_results):
-            idx = selected_indices[i]
-            result["cross_encoder_score"] = float(ce_scores[idx])
-            result["recency_score"] = float(recency_normalized[idx])
-            result["mmr_score"] = float(
-                alpha_MMR * ce_scores[idx]
-                - (1 - alpha_MMR) * max((cos_sim_matrix[idx][selected_indices[j]] for j in range(i)), default=0.0)
-                + beta_recency * recency_normalized[idx]
-            )
+    def health_overview(self, elderly_id: Optional[str] = None, kind: Optional[str] = None,
+                        today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        Current medications and upcoming appointments straight from the structured index.
+
+        Args:
+            elderly_id: Elderly profile (defaults to the agent's)
+            kind: "medications", "appointments" or None for both
+            today: Reference day for "upcoming" (defaults to today in Singapore)
+        """
+        try:
+            elderly_id = self._resolve_elderly_id(elderly_id)
+            return self._health_overview_rows(self._health_index(elderly_id), kind, today)
+        except Exception as e:
+            logging.warning(f"❌ Health overview failed: {str(e)}")
+            return []
+
+    def _warm_models(self) -> None:
+        """First embed / cross-encoder calls pay lazy init (weights to device, kernels); pay it here"""
+        if self._models_warm:
+            return
+        self.embedder.embed(self.WARMUP_QUERY)
+        self.encoder.predict([[self.WARMUP_QUERY, self.WARMUP_QUERY]])
+        self._models_warm = True
+
+    def preload(self, elderly_id: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        Load a tenant's stable memory into process memory and warm the query path, so the first
+        question of a session pays no cold-cache cost:
+        - LTM rows with their embeddings (the key-value fast path table)
+        - the medication / appointment index
+        - embedder and cross-encoder, DB pool, and one warm-up retrieval through both SQL legs
+
+        Args:
+            elderly_id: Elderly profile to preload (defaults to the agent's)
+            force: Preload even if the tenant was preloaded within PRELOAD_INTERVAL_SECONDS
+
+        Returns:
+            dict: What was loaded and how long it took
+        """
+        started = time.perf_counter()
+        try:
+            elderly_id = self._resolve_elderly_id(elderly_id)
+            last = self._preloaded.get(elderly_id)
+            if not force and last is not None and time.monotonic() - last < self.PRELOAD_INTERVAL_SECONDS:
+                return {"success": True, "elderly_id": elderly_id, "skipped": True}
+            self._preloaded[elderly_id] = time.monotonic()
+
+            ltm_rows = sum(len(entry["rows"]) for key, entry in self._ltm_key_table(elderly_id).items()
+                           if key == entry["key"])
+            health_rows = len(self._health_index(elderly_id))
+            self._warm_models()
+            # Both SQL legs directly: not user traffic, so no tier / fast-path metrics and no
+            # latency samples for the load controller
+            with self.load_controller.muted():
+                self._retrieve_hybrid("long-term", self.WARMUP_QUERY, top_k_retrieval=25, elderly_id=elderly_id)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            metrics.observe("preload_latency_ms", elapsed_ms)
+            logging.info(f"Preloaded elderly {elderly_id}: {ltm_rows} LTM rows, {health_rows} health rows "
+                         f"in {elapsed_ms:.0f} ms")
+            return {"success": True, "elderly_id": elderly_id, "ltm_rows": ltm_rows,
+                    "health_rows": health_rows, "elapsed_ms": round(elapsed_ms, 1)}
+
+        except Exception as e:
+            logging.warning(f"❌ Preload failed: {str(e)}")
+            return {"success": False, "error": str(e)}
 
-        return ranked_results
+    def schedule_preload(self, elderly_id: str):
+        """Preload a tenant in the background (session-start hook); returns the Future"""
+        metrics.incr("preload_scheduled_total")
+        return self.preload_executor.submit(self.preload, elderly_id)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop preloading on session starts and shut down the preload / inference executors"""
+        change_feed.unsubscribe_session_start(self.schedule_preload)
+        self.preload_executor.shutdown(wait=wait)
+        self.inference_executor.shutdown(wait=wait)
 
     def retrieve_rerank(
         self,
@@ -790,118 +1284,178 @@ class HybridRetrievalAgent:
         cross_encoder: Optional[CrossEmbedder] = None,
         alpha_MMR: float = 0.75,
         beta_recency: float = 0.1,
-        top_k_MMR: int = 8
+        top_k_MMR: int = 8,
+        elderly_id: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
-        
-        # Initialize default cross-encoder if not provided
+        results, _ = self.retrieve_rerank_with_tier(
+            query, mode, top_k_retrieval, sim_threshold, fuzzy_distance, alpha_retrieval,
+            cross_encoder, alpha_MMR, beta_recency, top_k_MMR, elderly_id, filters
+        )
+        return results
+
+    def retrieve_rerank_with_tier(
+        self,
+        query: str,
+        mode: str = "long-term",  # Options: "short-term", "long-term", "healthcare"
+        top_k_retrieval: int = 25,
+        sim_threshold: float = 0.3,
+        fuzzy_distance: int = 2,
+        alpha_retrieval: float = 0.5,
+        cross_encoder: Optional[CrossEmbedder] = None,
+        alpha_MMR: float = 0.75,
+        beta_recency: float = 0.1,
+        top_k_MMR: int = 8,
+        elderly_id: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        keep_scores: bool = False,
+        conversation_id: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        `retrieve_rerank` that also returns the degradation tier the request was served at.
+        `keep_scores` leaves the ranking scores and parsed embeddings on the rows (context packing).
+        With a `conversation_id`, a follow-up close to the previous turn's query re-ranks that
+        turn's candidates instead of querying Postgres again.
+        """
+
+        # Default to the agent's cross-encoder instead of reloading the model per call
         if cross_encoder is None:
-            cross_encoder = CrossEmbedder('BAAI/bge-reranker-base')
+            cross_encoder = self.encoder
+
+        if mode not in self.HYBRID_BUCKETS:
+            raise ValueError(f"Unsupported mode: {mode}. Choose from 'short-term', 'long-term', or 'healthcare'.")
+
+        # Step 0: single-fact LTM questions are answered from the key-value index
+        if mode == "long-term":
+            fast_results = self._ltm_fast_path(query, elderly_id, self._normalize_filters(mode, filters))
+            if fast_results is not None:
+                return fast_results, self.KEY_VALUE_TIER
 
-        # Step 1: Retrieve candidates based on mode
-        if mode == "short-term":
-            candidates = self.retrieve_hybrid_stm(
+        with self.load_controller.track():
+            started = time.perf_counter()
+            tier = self.load_controller.choose_tier()
+
+            # Step 1: Retrieve candidates based on mode, scoped to the query's time window if any
+            retrieve = partial(
+                self._retrieve_hybrid,
+                mode,
                 query=query,
                 top_k_retrieval=top_k_retrieval,
                 sim_threshold=sim_threshold,
                 fuzzy_distance=fuzzy_distance,
-                alpha_retrieval=alpha_retrieval
+                alpha_retrieval=alpha_retrieval,
+                elderly_id=elderly_id,
+                vector_only=tier == RetrievalTier.VECTOR_ONLY
             )
-        elif mode == "long-term":
-            candidates = self.retrieve_hybrid_ltm(
-                query=query,
-                top_k_retrieval=top_k_retrieval,
-                sim_threshold=sim_threshold,
-                fuzzy_distance=fuzzy_distance,
-                alpha_retrieval=alpha_retrieval
+            scoped_filters = self._temporal_filters(mode, query, filters)
+            session_key, query_embedding, candidates = None, None, None
+            if conversation_id:
+                # A close follow-up in the same conversation re-ranks the last turn's candidates
+                elderly_id = self._resolve_elderly_id(elderly_id)
+                session_key = SessionContextCache.key(conversation_id, mode, scoped_filters,
+                                                      vector_only=tier == RetrievalTier.VECTOR_ONLY)
+                with self.load_controller.timed("embed"):
+                    query_embedding = self.embedder.embed(query)
+                candidates = self._session_reuse(session_key, mode, elderly_id, query_embedding, alpha_retrieval)
+
+            if candidates is None:
+                version = change_feed.data_version(elderly_id) if session_key else None
+                candidates = retrieve(filters=scoped_filters, query_embedding=query_embedding)
+                if not len(candidates) and scoped_filters is not filters:
+                    # Nothing in the window: fall back to the unscoped search
+                    metrics.incr("temporal_window_fallback_total", mode=mode)
+                    candidates = retrieve(filters=filters, query_embedding=query_embedding)
+                elif session_key is not None:
+                    # Only what was fetched for the key's own filters (not the unscoped fallback)
+                    self.session_cache.store(session_key, elderly_id, version, query_embedding, candidates)
+
+            # Step 2: Rerank as far as the tier allows (CE + MMR + recency at the full tier)
+            reranked_results = self._rerank_for_tier(
+                tier, query, candidates, cross_encoder, alpha_MMR, beta_recency, top_k_MMR,
+                self._query_window(filters, scoped_filters)
             )
-        elif mode == "healthcare":
-            candidates = self.retrieve_hybrid_hcm(
-                query=query,
-                top_k_retrieval=top_k_retrieval,
-                sim_threshold=sim_threshold,
-                fuzzy_distance=fuzzy_distance,
-                alpha_retrieval=alpha_retrieval
-            )
-        else:
-            raise ValueError(f"Unsupported mode: {mode}. Choose from 'stm', 'ltm', or 'hcm'.")
-
-        # Step 2: Rerank with MMR + recency (assumes candidates have needed fields like 'text', 'timestamp')
-        reranked_results = self.rerank_with_mmr_and_recency(
-            query=query,
-            candidates=candidates,
-            cross_encoder=cross_encoder,
-            alpha_MMR=alpha_MMR,
-            beta_recency=beta_recency,
-            top_k_MMR=top_k_MMR
-        )
-
-        # Step 3: Remove internal score keys
-        score_keys = {
-            'emb_score',
-            'bm25_score',
-            'hybrid_score',
-            'recency_score',
-            'cross_encoder_score',
-            'mmr_score'
+            self._record_tier(mode, tier, started)
+
+        # Step 3: Rows leave the agent as dicts, without internal score keys unless asked for
+        return reranked_results.to_dicts(keep_scores), tier.value
+
+    def end_conversation(self, conversation_id: str) -> None:
+        """Drop a finished conversation's cached candidates (they otherwise expire after the session TTL)"""
+        self.session_cache.end(conversation_id)
+
+    def _session_reuse(self, key, mode: str, elderly_id: str, query_embedding: List[float],
+                       alpha_retrieval: float) -> Optional[CandidateSet]:
+        candidates = self.session_cache.reuse(key, elderly_id, query_embedding, alpha_retrieval)
+        metrics.incr("session_cache_total", mode=mode)
+        if candidates is not None:
+            metrics.incr("session_cache_hits_total", mode=mode)
+        return candidates
+
+    def _initial_state(self, user_input: str, elderly_id: str, conversation_id: Optional[str] = None) -> dict:
+        return {
+            "user_input": user_input,
+            "elderly_id": elderly_id,
+            "conversation_id": conversation_id,
+            "messages": [],
+            "has_context": False,
+            "final_answer": "",
+            "retrieval_agent_message": None
         }
 
-        clean_results = [
-            {k: v for k, v in result.items() if k not in score_keys}
-            for result in reranked_results
-        ]
+    @staticmethod
+    def _run_config(elderly_id: str, conversation_id: Optional[str] = None) -> RunnableConfig:
+        return {"configurable": {"elderly_id": elderly_id, "conversation_id": conversation_id}}
 
-        return clean_results
+    def _format_process_result(self, user_input: str, result: dict) -> dict:
+        # Extract tool calls with the tier that served each one (from the tool artifacts)
+        messages = result.get("messages") or []
+        tiers = {
+            m.tool_call_id: m.artifact.tier
+            for m in messages if isinstance(m, ToolMessage) and isinstance(m.artifact, RetrievalArtifact)
+        }
+        tool_calls = []
+        for message in messages:
+            if isinstance(message, AIMessage) and message.tool_calls:
+                for tool_call in message.tool_calls:
+                    tool_calls.append({
+                        "tool_name": tool_call['name'],
+                        "tool_args": tool_call['args'],
+                        "tier": tiers.get(tool_call.get('id'))
+                    })
+
+        return {
+            "success": True,
+            "mem_used": result.get("mem_used", []),
+            "final_answer": result.get("final_answer", ""),
+            "user_input": user_input,
+            "messages_count": len(messages),
+            "has_context": bool(result.get("final_answer")),
+            "tool_calls": tool_calls,
+            "retrieved_ltm": result.get("retrieved_ltm", []),
+            "retrieved_hcm": result.get("retrieved_hcm", []),
+            "retrieved_stm": result.get("retrieved_stm", []),
+            "context_tokens_saved": result.get("context_tokens_saved", 0),
+        }
 
-    def process(self, user_input: str) -> dict:
+    def process(self, user_input: str, elderly_id: Optional[str] = None, conversation_id: Optional[str] = None) -> dict:
         """
         Process user input and retrieve relevant information
 
         Args:
             user_input: The user's question or request
+            elderly_id: Elderly profile to retrieve for (defaults to the agent's elderly_id)
+            conversation_id: Optional conversation id; consecutive turns reuse each other's candidates
 
         Returns:
             dict: Contains the final answer template and processing information
         """
         try:
-            initial_state = {
-                "user_input": user_input,
-                "messages": [],
-                "has_context": False,
-                "final_answer": "",
-                "retrieval_agent_message": None
-            }
+            elderly_id = self._resolve_elderly_id(elderly_id)
 
             # Process through the workflow
-            result = self.graph.invoke(initial_state)
-
-            # Extract tool calls and retrieved context
-            tool_calls = []
-            retrieved_context = []
-            if result.get("messages"):
-                for message in result["messages"]:
-                    if isinstance(message, AIMessage) and message.tool_calls:
-                        for tool_call in message.tool_calls:
-                            tool_calls.append({
-                                "tool_name": tool_call['name'],
-                                "tool_args": tool_call['args']
-                            })
-                    if isinstance(message, ToolMessage):
-                        retrieved_context.append({
-                            "content": message.content
-                        })
-
-            return {
-                "success": True,
-                "mem_used": result.get("mem_used", []),
-                "final_answer": result.get("final_answer", ""),
-                "user_input": user_input,
-                "messages_count": len(result.get("messages", [])),
-                "has_context": bool(result.get("final_answer")),
-                "tool_calls": tool_calls,
-                "retrieved_ltm": result.get("retrieved_ltm", []),
-                "retrieved_hcm": result.get("retrieved_hcm", []),
-                "retrieved_stm": result.get("retrieved_stm", []),
-            }
+            result = self.graph.invoke(self._initial_state(user_input, elderly_id, conversation_id),
+                                       config=self._run_config(elderly_id, conversation_id))
+            return self._format_process_result(user_input, result)
 
         except Exception as e:
             logging.error(f"Error processing retrieval request: {str(e)}")
@@ -911,7 +1465,8 @@ class HybridRetrievalAgent:
                 "user_input": user_input
             }
 
-    def retrieve_context(self, query: str, categories: Optional[List[str]] = None) -> dict:
+    def retrieve_context(self, query: str, categories: Optional[List[str]] = None,
+                         elderly_id: Optional[str] = None, conversation_id: Optional[str] = None) -> dict:
         """
         Direct retrieval method for getting context without the full workflow
 
@@ -919,6 +1474,8 @@ class HybridRetrievalAgent:
             query: The search query
             categories: List of categories to search in ('ltm', 'stm', 'health')
                        If None, searches all categories
+            elderly_id: Elderly profile to retrieve for (defaults to the agent's elderly_id)
+            conversation_id: Optional conversation id; consecutive turns reuse each other's candidates
 
         Returns:
             dict: Retrieved information organized by category
@@ -933,19 +1490,24 @@ class HybridRetrievalAgent:
             if categories is None:
                 categories = ['ltm', 'stm', 'health']
 
+            tiers = {}
             if 'ltm' in categories:
-                results["ltm"] = self.retrieve_rerank(query, mode="long-term")
+                results["ltm"], tiers["ltm"] = self.retrieve_rerank_with_tier(
+                    query, mode="long-term", elderly_id=elderly_id, conversation_id=conversation_id)
 
             if 'stm' in categories:
-                results["stm"] = self.retrieve_rerank(query, mode="short-term")
+                results["stm"], tiers["stm"] = self.retrieve_rerank_with_tier(
+                    query, mode="short-term", elderly_id=elderly_id, conversation_id=conversation_id)
 
             if 'health' in categories:
-                results["health"] = self.retrieve_rerank(query, mode="healthcare")
+                results["health"], tiers["health"] = self.retrieve_rerank_with_tier(
+                    query, mode="healthcare", elderly_id=elderly_id, conversation_id=conversation_id)
 
             return {
                 "success": True,
                 "query": query,
                 "results": results,
+                "tiers": tiers,
                 "total_results": sum(len(v) for v in results.values())
             }
 
@@ -956,3 +1518,333 @@ class HybridRetrievalAgent:
                 "error": str(e),
                 "query": query
             }
+
+    #################################################################
+    # ---                    Async variants                      --- #
+    #################################################################
+
+    def _get_async_engine(self):
+        """Lazily create the asyncpg engine so sync-only callers never need asyncpg/greenlet installed"""
+        if self.async_engine is None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            url, connect_args = async_database_url(self.connection_string)
+            self.async_engine = create_async_engine(
+                url,
+                pool_size=20,
+                max_overflow=20,
+                pool_pre_ping=True,
+                pool_recycle=3600,
+                connect_args=connect_args,
+                echo=False
+            )
+        return self.async_engine
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run model inference / CPU-bound reranking off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.inference_executor, partial(func, *args, **kwargs))
+
+    async def _afetch(self, statement, params: dict):
+        # asyncpg does not coerce str to uuid the way psycopg2 literals do
+        params = {**params, "elderly_id": uuid.UUID(str(params["elderly_id"]))}
+        async with self._get_async_engine().connect() as conn:
+            result = await conn.execute(statement, params)
+            return result.fetchall()
+
+    async def _aretrieve_hybrid(self, mode: str, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3,
+                                fuzzy_distance: int = 2, alpha_retrieval: float = 0.5,
+                                elderly_id: Optional[str] = None, vector_only: bool = False,
+                                filters: Optional[Dict[str, Any]] = None,
+                                query_embedding: Optional[List[float]] = None) -> CandidateSet:
+        filters = self._normalize_filters(mode, filters)
+        try:
+            elderly_id = self._resolve_elderly_id(elderly_id)
+            emb = query_embedding
+            if emb is None:
+                with self.load_controller.timed("embed"):
+                    emb = await self._run_blocking(self.embedder.embed, query)
+            (sql_emb, params_emb), (sql_bm25, params_bm25) = self._hybrid_statements(
+                mode, emb, query, elderly_id, top_k_retrieval, sim_threshold, fuzzy_distance, filters
+            )
+
+            async def timed_fetch(stage, statement, params):
+                with self.load_controller.timed(stage):
+                    return await self._afetch(statement, params)
+
+            # Both legs run concurrently on separate pooled connections
+            if vector_only:
+                rows_emb, rows_bm25 = await timed_fetch("ann", sql_emb, params_emb), []
+            else:
+                rows_emb, rows_bm25 = await asyncio.gather(
+                    timed_fetch("ann", sql_emb, params_emb),
+                    timed_fetch("bm25", sql_bm25, params_bm25),
+                )
+
+            return CandidateSet.from_legs(mode, rows_emb, rows_bm25, top_k_retrieval, alpha_retrieval)
+
+        except Exception as e:
+            logging.warning(f"❌ Failed async hybrid {self.HYBRID_BUCKETS[mode]['label']} retrieval: {str(e)}")
+            return CandidateSet.empty(mode)
+
+    async def aretrieve_hybrid_ltm(self, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3,
+                                   fuzzy_distance: int = 2, alpha_retrieval: float = 0.5,
+                                   elderly_id: Optional[str] = None, filters: Optional[Dict[str, Any]] = None):
+        candidates = await self._aretrieve_hybrid("long-term", query, top_k_retrieval, sim_threshold, fuzzy_distance,
+                                                  alpha_retrieval, elderly_id=elderly_id, filters=filters)
+        return candidates.to_dicts(keep_scores=True)
+
+    async def aretrieve_hybrid_stm(self, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3,
+                                   fuzzy_distance: int = 2, alpha_retrieval: float = 0.5,
+                                   elderly_id: Optional[str] = None, filters: Optional[Dict[str, Any]] = None):
+        candidates = await self._aretrieve_hybrid("short-term", query, top_k_retrieval, sim_threshold, fuzzy_distance,
+                                                  alpha_retrieval, elderly_id=elderly_id, filters=filters)
+        return candidates.to_dicts(keep_scores=True)
+
+    async def aretrieve_hybrid_hcm(self, query: str, top_k_retrieval: int = 5, sim_threshold: float = 0.3,
+                                   fuzzy_distance: int = 2, alpha_retrieval: float = 0.5,
+                                   elderly_id: Optional[str] = None, filters: Optional[Dict[str, Any]] = None):
+        candidates = await self._aretrieve_hybrid("healthcare", query, top_k_retrieval, sim_threshold, fuzzy_distance,
+                                                  alpha_retrieval, elderly_id=elderly_id, filters=filters)
+        return candidates.to_dicts(keep_scores=True)
+
+    async def _altm_key_table(self, elderly_id: str) -> Dict[str, Dict[str, Any]]:
+        table = self.ltm_key_index.get(elderly_id)
+        if table is None:
+            version = change_feed.data_version(elderly_id)
+            rows = await self._afetch(self.LTM_KEY_INDEX_SQL, {"elderly_id": elderly_id})
+            rows = [self._decode_row("long-term", r) for r in rows]
+            if change_feed.data_version(elderly_id) == version:
+                table = self.ltm_key_index.set(elderly_id, rows)
+            else:
+                table = LTMKeyIndex.build(rows)
+        return table
+
+    async def _altm_fast_path(self, query: str, elderly_id: Optional[str],
+                              filters: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        try:
+            elderly_id = self._resolve_elderly_id(elderly_id)
+            return self._ltm_fast_path_lookup(await self._altm_key_table(elderly_id), query, filters)
+
+        except Exception as e:
+            logging.warning(f"❌ Async LTM key-value fast path failed: {str(e)}")
+            return None
+
+    async def _ahealth_index(self, elderly_id: str) -> TenantHealthIndex:
+        index = self.healthcare_index.get(elderly_id)
+        if index is None:
+            version = change_feed.data_version(elderly_id)
+            rows = [dict(r._mapping) for r in await self._afetch(self.HEALTH_INDEX_SQL, {"elderly_id": elderly_id})]
+            if change_feed.data_version(elderly_id) == version:
+                return self.healthcare_index.set(elderly_id, rows)
+            return TenantHealthIndex(rows)
+
+        stale = self.healthcare_index.pop_stale(elderly_id)
+        if stale:
+            rows = await self._afetch(self.HEALTH_INDEX_ROWS_SQL,
+                                      {"elderly_id": elderly_id, "ids": [uuid.UUID(i) for i in sorted(stale)]})
+            self.healthcare_index.refresh(elderly_id, stale, [dict(r._mapping) for r in rows])
+        return index
+
+    async def ahealth_overview(self, elderly_id: Optional[str] = None, kind: Optional[str] = None,
+                               today: Optional[date] = None) -> List[Dict[str, Any]]:
+        try:
+            elderly_id = self._resolve_elderly_id(elderly_id)
+            return self._health_overview_rows(await self._ahealth_index(elderly_id), kind, today)
+        except Exception as e:
+            logging.warning(f"❌ Async health overview failed: {str(e)}")
+            return []
+
+    async def apreload(self, elderly_id: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """Async `preload`: LTM table and health index loaded concurrently over asyncpg"""
+        started = time.perf_counter()
+        try:
+            elderly_id = self._resolve_elderly_id(elderly_id)
+            last = self._preloaded.get(elderly_id)
+            if not force and last is not None and time.monotonic() - last < self.PRELOAD_INTERVAL_SECONDS:
+                return {"success": True, "elderly_id": elderly_id, "skipped": True}
+            self._preloaded[elderly_id] = time.monotonic()
+
+            table, health_index, _ = await asyncio.gather(
+                self._altm_key_table(elderly_id),
+                self._ahealth_index(elderly_id),
+                self._run_blocking(self._warm_models),
+            )
+            with self.load_controller.muted():
+                await self._aretrieve_hybrid("long-term", self.WARMUP_QUERY, top_k_retrieval=25,
+                                             elderly_id=elderly_id)
+
+            ltm_rows = sum(len(entry["rows"]) for key, entry in table.items() if key == entry["key"])
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            metrics.observe("preload_latency_ms", elapsed_ms)
+            return {"success": True, "elderly_id": elderly_id, "ltm_rows": ltm_rows,
+                    "health_rows": len(health_index), "elapsed_ms": round(elapsed_ms, 1)}
+
+        except Exception as e:
+            logging.warning(f"❌ Async preload failed: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    async def aretrieve_rerank(
+        self,
+        query: str,
+        mode: str = "long-term",  # Options: "short-term", "long-term", "healthcare"
+        top_k_retrieval: int = 25,
+        sim_threshold: float = 0.3,
+        fuzzy_distance: int = 2,
+        alpha_retrieval: float = 0.5,
+        cross_encoder: Optional[CrossEmbedder] = None,
+        alpha_MMR: float = 0.75,
+        beta_recency: float = 0.1,
+        top_k_MMR: int = 8,
+        elderly_id: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Async `retrieve_rerank`: DB I/O on the event loop, embedding and cross-encoder in the executor"""
+        results, _ = await self.aretrieve_rerank_with_tier(
+            query, mode, top_k_retrieval, sim_threshold, fuzzy_distance, alpha_retrieval,
+            cross_encoder, alpha_MMR, beta_recency, top_k_MMR, elderly_id, filters
+        )
+        return results
+
+    async def aretrieve_rerank_with_tier(
+        self,
+        query: str,
+        mode: str = "long-term",  # Options: "short-term", "long-term", "healthcare"
+        top_k_retrieval: int = 25,
+        sim_threshold: float = 0.3,
+        fuzzy_distance: int = 2,
+        alpha_retrieval: float = 0.5,
+        cross_encoder: Optional[CrossEmbedder] = None,
+        alpha_MMR: float = 0.75,
+        beta_recency: float = 0.1,
+        top_k_MMR: int = 8,
+        elderly_id: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        keep_scores: bool = False,
+        conversation_id: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        if cross_encoder is None:
+            cross_encoder = self.encoder
+
+        if mode not in self.HYBRID_BUCKETS:
+            raise ValueError(f"Unsupported mode: {mode}. Choose from 'short-term', 'long-term', or 'healthcare'.")
+
+        if mode == "long-term":
+            fast_results = await self._altm_fast_path(query, elderly_id, self._normalize_filters(mode, filters))
+            if fast_results is not None:
+                return fast_results, self.KEY_VALUE_TIER
+
+        with self.load_controller.track():
+            started = time.perf_counter()
+            tier = self.load_controller.choose_tier()
+
+            retrieve = partial(
+                self._aretrieve_hybrid,
+                mode,
+                query=query,
+                top_k_retrieval=top_k_retrieval,
+                sim_threshold=sim_threshold,
+                fuzzy_distance=fuzzy_distance,
+                alpha_retrieval=alpha_retrieval,
+                elderly_id=elderly_id,
+                vector_only=tier == RetrievalTier.VECTOR_ONLY
+            )
+            scoped_filters = self._temporal_filters(mode, query, filters)
+            session_key, query_embedding, candidates = None, None, None
+            if conversation_id:
+                elderly_id = self._resolve_elderly_id(elderly_id)
+                session_key = SessionContextCache.key(conversation_id, mode, scoped_filters,
+                                                      vector_only=tier == RetrievalTier.VECTOR_ONLY)
+                with self.load_controller.timed("embed"):
+                    query_embedding = await self._run_blocking(self.embedder.embed, query)
+                candidates = self._session_reuse(session_key, mode, elderly_id, query_embedding, alpha_retrieval)
+
+            if candidates is None:
+                version = change_feed.data_version(elderly_id) if session_key else None
+                candidates = await retrieve(filters=scoped_filters, query_embedding=query_embedding)
+                if not len(candidates) and scoped_filters is not filters:
+                    metrics.incr("temporal_window_fallback_total", mode=mode)
+                    candidates = await retrieve(filters=filters, query_embedding=query_embedding)
+                elif session_key is not None:
+                    self.session_cache.store(session_key, elderly_id, version, query_embedding, candidates)
+
+            reranked_results = await self._run_blocking(
+                self._rerank_for_tier, tier, query, candidates, cross_encoder, alpha_MMR, beta_recency, top_k_MMR,
+                self._query_window(filters, scoped_filters)
+            )
+            self._record_tier(mode, tier, started)
+
+        return reranked_results.to_dicts(keep_scores), tier.value
+
+    async def aprocess(self, user_input: str, elderly_id: Optional[str] = None,
+                       conversation_id: Optional[str] = None) -> dict:
+        """
+        Async `process`: many conversations can share one event loop without blocking threads
+
+        Args:
+            user_input: The user's question or request
+            elderly_id: Elderly profile to retrieve for (defaults to the agent's elderly_id)
+            conversation_id: Optional conversation id; consecutive turns reuse each other's candidates
+
+        Returns:
+            dict: Same shape as `process`
+        """
+        try:
+            elderly_id = self._resolve_elderly_id(elderly_id)
+            result = await self.graph.ainvoke(self._initial_state(user_input, elderly_id, conversation_id),
+                                              config=self._run_config(elderly_id, conversation_id))
+            return self._format_process_result(user_input, result)
+
+        except Exception as e:
+            logging.error(f"Error processing async retrieval request: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "user_input": user_input
+            }
+
+    async def aretrieve_context(self, query: str, categories: Optional[List[str]] = None,
+                                elderly_id: Optional[str] = None, conversation_id: Optional[str] = None) -> dict:
+        """
+        Async `retrieve_context`; the requested buckets are retrieved concurrently
+
+        Args:
+            query: The search query
+            categories: List of categories to search in ('ltm', 'stm', 'health')
+                       If None, searches all categories
+            elderly_id: Elderly profile to retrieve for (defaults to the agent's elderly_id)
+            conversation_id: Optional conversation id; consecutive turns reuse each other's candidates
+
+        Returns:
+            dict: Retrieved information organized by category
+        """
+        modes = {"ltm": "long-term", "stm": "short-term", "health": "healthcare"}
+        results = {"ltm": [], "stm": [], "health": []}
+
+        try:
+            if categories is None:
+                categories = ['ltm', 'stm', 'health']
+
+            selected = [c for c in modes if c in categories]
+            retrieved = await asyncio.gather(
+                *(self.aretrieve_rerank_with_tier(query, mode=modes[c], elderly_id=elderly_id,
+                                                  conversation_id=conversation_id)
+                  for c in selected)
+            )
+            results.update((c, rows) for c, (rows, _) in zip(selected, retrieved))
+
+            return {
+                "success": True,
+                "query": query,
+                "results": results,
+                "tiers": {c: tier for c, (_, tier) in zip(selected, retrieved)},
+                "total_results": sum(len(v) for v in results.values())
+            }
+
+        except Exception as e:
+            logging.error(f"Error in async direct retrieval: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "query": query
+            }
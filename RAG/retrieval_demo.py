@@ -6,7 +6,7 @@ import pandas as pd
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from RAG.retrieval_agent_hybrid import HybridRetrievalAgent
+from RAG.agent_factory import AgentFactory
 
 # --- Streamlit App ---
 
@@ -29,17 +29,20 @@ if not elderly_id:
     st.warning("Please enter an Elderly ID to proceed.")
     st.stop()
 
-# Use a session state to initialize the agent only once
-if 'agent' not in st.session_state or st.session_state.agent.elderly_id != elderly_id:
-    try:
-        with st.spinner(f"Initializing Retrieval Agent for Elderly ID: {elderly_id}..."):
-            st.session_state.agent = HybridRetrievalAgent(elderly_id=elderly_id)
-        st.sidebar.success(f"Agent initialized for Elderly ID: {elderly_id}")
-    except Exception as e:
-        st.error(f"Failed to initialize agent: {e}")
-        st.stop()
-
-agent = st.session_state.agent
+# Models, DB engine and the compiled graph are built once per server process;
+# switching the Elderly ID only creates a lightweight per-tenant handle.
+@st.cache_resource
+def get_agent_factory() -> AgentFactory:
+    return AgentFactory()
+
+try:
+    with st.spinner("Initializing Retrieval Agent..."):
+        factory = get_agent_factory()
+        _ = factory.retrieval_agent  # loads models on the first run only
+    agent = factory.for_elderly(elderly_id)
+except Exception as e:
+    st.error(f"Failed to initialize agent: {e}")
+    st.stop()
 
 # --- Retrieval Interface ---
 st.header("🔍 Retrieve Context")
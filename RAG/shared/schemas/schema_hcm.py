@@ -1,6 +1,6 @@
 from enum import Enum
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal, TypedDict
 
 class HealthRecordTypes(str, Enum):
     """Types of healthcare records"""
@@ -22,4 +22,39 @@ class InsertHealthSchema(BaseModel):
     diagnosis_date: Optional[str] = Field(
         None,
         description="Date in YYYY-MM-DD format (optional). When the healthcare event occurred, was diagnosed, or is scheduled. Leave empty if no specific date was mentioned. Examples: '2023-12-15', '2024-03-20', null."
-    )
\ No newline at end of file
+    )
+
+class RetrieveHealthSchema(BaseModel):
+    """Schema for healthcare record retrieval"""
+    query: str = Field(
+        ...,
+        description="Free-text description of the healthcare information needed."
+    )
+    record_type: Optional[HealthRecordTypes] = Field(
+        None,
+        description="Only search records of this type (optional). One of ['condition','procedure','appointment','medication']. Use 'medication' for questions about meds, 'appointment' for check-ups and visits."
+    )
+    date_from: Optional[str] = Field(
+        None,
+        description="Earliest diagnosis/scheduled date in YYYY-MM-DD format, inclusive (optional)."
+    )
+    date_to: Optional[str] = Field(
+        None,
+        description="Latest diagnosis/scheduled date in YYYY-MM-DD format, inclusive (optional)."
+    )
+
+class HealthOverviewSchema(BaseModel):
+    """Schema for the structured medication / appointment lookup"""
+    kind: Optional[Literal["medications", "appointments"]] = Field(
+        None,
+        description="'medications' for the current medication list, 'appointments' for upcoming appointments, or empty for both."
+    )
+
+
+class HealthRow(TypedDict):
+    """Healthcare record returned by retrieval (tool artifact / `retrieved_hcm`); dates as ISO strings"""
+    id: str
+    record_type: str
+    description: str
+    diagnosis_date: Optional[str]
+    last_updated: Optional[str]
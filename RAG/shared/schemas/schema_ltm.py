@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from enum import Enum
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TypedDict
+from datetime import datetime
 
 
 
@@ -27,4 +28,24 @@ class InsertLongTermSchema(BaseModel):
     value: str = Field(
         ...,
         description="The fact/value to store. The actual free form user information long-term memory item. This should be stable information that rarely changes."
-    )
\ No newline at end of file
+    )
+
+class RetrieveLongTermSchema(BaseModel):
+    """Schema for long-term memory retrieval"""
+    query: str = Field(
+        ...,
+        description="Free-text description of the profile fact needed."
+    )
+    category: Optional[LTMCategories] = Field(
+        None,
+        description="Only search facts in this category (optional). One of ['personal','family','education','career','lifestyle','finance','legal']."
+    )
+
+
+class LongTermRow(TypedDict):
+    """Long-term memory row returned by retrieval (tool artifact / `retrieved_ltm`)"""
+    id: str
+    category: str
+    key: str
+    value: str
+    last_updated: Optional[datetime]
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TypedDict
+from datetime import datetime
 from enum import Enum
 
 class InsertShortTermSchema(BaseModel):
@@ -7,4 +8,26 @@ class InsertShortTermSchema(BaseModel):
     content: str = Field(
         ...,
         description="Short-term conversational detail to store. Use for temporary information that's useful in the near future but doesn't belong in long-term or healthcare storage. Examples: reminders, temporary preferences, upcoming appointments, casual mentions."
-    )
\ No newline at end of file
+    )
+
+class RetrieveShortTermSchema(BaseModel):
+    """Schema for short-term memory retrieval"""
+    query: str = Field(
+        ...,
+        description="Free-text description of the recent conversational detail needed."
+    )
+    date_from: Optional[str] = Field(
+        None,
+        description="Earliest date the memory was created, YYYY-MM-DD, inclusive (optional). E.g. yesterday's date for 'what did I do yesterday'."
+    )
+    date_to: Optional[str] = Field(
+        None,
+        description="Latest date the memory was created, YYYY-MM-DD, inclusive (optional)."
+    )
+
+
+class ShortTermRow(TypedDict):
+    """Short-term memory row returned by retrieval (tool artifact / `retrieved_stm`)"""
+    id: str
+    content: str
+    created_at: datetime
@@ -0,0 +1,190 @@
+'''
+Entry class is `CandidateSet`
+
+
+Compact representation of the hybrid candidates of one retrieval, used from the SQL decode to
+the MMR output instead of one dict per row (which the fusion, cascade, recency and MMR steps
+each copied or extended):
+- `fields` / `rows`: the bucket's selected columns once, and one tuple of values per candidate
+- `emb_score`, `bm25_score`, `hybrid_score`, `recency_score`, `cross_encoder_score`,
+  `mmr_score`: float64 arrays aligned with `rows` (None until the step producing them ran)
+- `embeddings`: the pgvector texts are parsed into one float32 (n, d) matrix in a single pass,
+  and only when a step needs them (MMR, session cache, context packing)
+
+Every step returns a new set through `take(indices, **scores)`, which shares the row tuples and
+slices the arrays, so a cached set (`SessionContextCache`) is never mutated by the reranker.
+Dicts are only built at the agent boundary by `to_dicts(keep_scores)`.
+'''
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from RAG.utils.cascade import cascade_cutoff
+
+# Columns each bucket's hybrid SQL selects, in `HYBRID_BUCKETS[mode]["columns"]` order
+BUCKET_FIELDS = {
+    "long-term": ("id", "category", "key", "value", "last_updated"),
+    "short-term": ("id", "content", "created_at"),
+    "healthcare": ("id", "record_type", "description", "diagnosis_date", "last_updated"),
+}
+
+SCORE_FIELDS = ("emb_score", "bm25_score", "hybrid_score", "recency_score", "cross_encoder_score", "mmr_score")
+TEXT_FIELDS = ("content", "value", "description")
+TIME_FIELDS = ("last_updated", "created_at")
+
+
+def decode_values(mode: str, r) -> Tuple[Any, ...]:
+    """SQL row of the given bucket -> candidate values in `BUCKET_FIELDS[mode]` order"""
+    if mode == "long-term":
+        return str(r.id), r.category, r.key, r.value, r.last_updated
+    if mode == "short-term":
+        return str(r.id), r.content, r.created_at
+    return (
+        str(r.id),
+        r.record_type,
+        r.description,
+        r.diagnosis_date.isoformat() if r.diagnosis_date else None,
+        r.last_updated.isoformat() if r.last_updated else None,
+    )
+
+
+def parse_embeddings(texts: Sequence[Any]) -> np.ndarray:
+    """pgvector texts ('[0.1,0.2,...]') or vectors -> float32 (n, d) matrix"""
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    if all(isinstance(t, str) for t in texts):
+        flat = np.fromstring(",".join(t.strip("[]") for t in texts), dtype=np.float32, sep=",")
+        return flat.reshape(len(texts), -1)
+    return np.stack([np.asarray(t, dtype=np.float32) for t in texts])
+
+
+class CandidateSet:
+    __slots__ = ("fields", "rows", "_embedding_texts", "_embeddings") + SCORE_FIELDS
+
+    def __init__(self, fields: Sequence[str], rows: List[Tuple[Any, ...]],
+                 embedding_texts: Optional[Sequence[Any]] = None, embeddings: Optional[np.ndarray] = None,
+                 **scores: Optional[np.ndarray]):
+        self.fields = tuple(fields)
+        self.rows = rows
+        self._embedding_texts = embedding_texts
+        self._embeddings = embeddings
+        for name in SCORE_FIELDS:
+            score = scores.pop(name, None)
+            setattr(self, name, None if score is None else np.asarray(score, dtype=np.float64))
+        if scores:
+            raise TypeError(f"Unknown score arrays: {', '.join(scores)}")
+
+    @classmethod
+    def empty(cls, mode: str) -> "CandidateSet":
+        return cls(BUCKET_FIELDS[mode], [], embedding_texts=[])
+
+    @classmethod
+    def from_legs(cls, mode: str, rows_emb: Iterable, rows_bm25: Iterable, top_k: int,
+                  alpha_retrieval: float) -> "CandidateSet":
+        """Fuse the ANN and BM25 legs, sorted by hybrid score (ANN rows first on ties), top `top_k`"""
+        position: Dict[str, int] = {}
+        rows, texts, emb, bm25 = [], [], [], []
+
+        def add(r) -> int:
+            values = decode_values(mode, r)
+            i = position.get(values[0])
+            if i is None:
+                i = position[values[0]] = len(rows)
+                rows.append(values)
+                texts.append(r.embedding)
+                emb.append(0.0)
+                bm25.append(0.0)
+            return i
+
+        for r in rows_emb:
+            emb[add(r)] = float(r.similarity)
+        rows_bm25 = list(rows_bm25)
+        max_bm25 = max((float(r.bm25_score) for r in rows_bm25), default=1.0)
+        for r in rows_bm25:
+            bm25[add(r)] = float(r.bm25_score) / max_bm25
+
+        emb_score, bm25_score = np.array(emb, dtype=np.float64), np.array(bm25, dtype=np.float64)
+        hybrid = np.round(alpha_retrieval * bm25_score + (1 - alpha_retrieval) * emb_score, 4)
+        fused = cls(BUCKET_FIELDS[mode], rows, embedding_texts=texts,
+                    emb_score=emb_score, bm25_score=bm25_score, hybrid_score=hybrid)
+        return fused.sort_by("hybrid_score", top_k)
+
+    @classmethod
+    def from_dicts(cls, candidates: Sequence[Dict[str, Any]]) -> "CandidateSet":
+        """Candidate dicts (benchmarks, the public `rerank_with_mmr_and_recency`) -> set"""
+        skip = set(SCORE_FIELDS) | {"embedding"}
+        fields: Dict[str, None] = {}
+        for c in candidates:
+            fields.update((k, None) for k in c if k not in skip)
+        scores = {
+            name: [c[name] for c in candidates]
+            for name in SCORE_FIELDS if candidates and all(c.get(name) is not None for c in candidates)
+        }
+        return cls(tuple(fields), [tuple(c.get(f) for f in fields) for c in candidates],
+                   embedding_texts=[c.get("embedding") for c in candidates], **scores)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        if self._embeddings is None:
+            self._embeddings = parse_embeddings(self._embedding_texts or [])
+            self._embedding_texts = None
+        return self._embeddings
+
+    def take(self, indices: Sequence[int], **scores: np.ndarray) -> "CandidateSet":
+        """Subset (and reorder) the candidates; `scores` adds or replaces full-length score arrays"""
+        indices = np.asarray(indices, dtype=np.intp)
+        arrays = {}
+        for name in SCORE_FIELDS:
+            array = scores.get(name, getattr(self, name))
+            arrays[name] = None if array is None else np.asarray(array)[indices]
+        if self._embeddings is not None:
+            embedding = {"embeddings": self._embeddings[indices]}
+        else:
+            embedding = {"embedding_texts": [self._embedding_texts[i] for i in indices]}
+        return CandidateSet(self.fields, [self.rows[i] for i in indices], **embedding, **arrays)
+
+    def sort_by(self, score: str, top_k: Optional[int] = None) -> "CandidateSet":
+        """Highest `score` first (stable), keeping at most `top_k`"""
+        values = getattr(self, score)
+        if values is None:
+            return self if top_k is None else self.take(range(min(top_k, len(self))))
+        return self.take(np.argsort(-values, kind="stable")[:top_k])
+
+    def cascade(self, min_keep: int, max_keep: int, min_gap: float = 0.05) -> "CandidateSet":
+        """Keep the adaptive head by hybrid score (`cascade_cutoff`); sets without them pass through"""
+        if len(self) <= min_keep or self.hybrid_score is None:
+            return self
+        ranked = self.sort_by("hybrid_score")
+        return ranked.take(range(cascade_cutoff(ranked.hybrid_score, min_keep, max_keep, min_gap)))
+
+    def column(self, field: str) -> List[Any]:
+        i = self.fields.index(field)
+        return [row[i] for row in self.rows]
+
+    def texts(self) -> List[Any]:
+        """Text the cross-encoder and MMR rank (`content`, `value` or `description`)"""
+        positions = [self.fields.index(f) for f in TEXT_FIELDS if f in self.fields]
+        return [next((row[i] for i in positions if row[i]), None) for row in self.rows]
+
+    def timestamps(self) -> List[Any]:
+        """`last_updated`, else `created_at`, of every candidate"""
+        positions = [self.fields.index(f) for f in TIME_FIELDS if f in self.fields]
+        return [next((row[i] for i in positions if row[i]), None) for row in self.rows]
+
+    def to_dicts(self, keep_scores: bool = False) -> List[Dict[str, Any]]:
+        """Result rows; `keep_scores` adds the ranking scores and the parsed embedding"""
+        results = [dict(zip(self.fields, row)) for row in self.rows]
+        if keep_scores and results:
+            for name in SCORE_FIELDS:
+                array = getattr(self, name)
+                if array is not None:
+                    for result, value in zip(results, array.tolist()):
+                        result[name] = value
+            embeddings = self.embeddings
+            if len(embeddings) == len(results):
+                for result, embedding in zip(results, embeddings):
+                    result["embedding"] = embedding
+        return results
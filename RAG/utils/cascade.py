@@ -0,0 +1,31 @@
+'''
+Entry function is `cascade_cutoff` (applied by `CandidateSet.cascade`)
+
+
+Cascade stage between hybrid fusion and the cross-encoder:
+- candidates arrive sorted by `hybrid_score` (BM25 + ANN fusion)
+- at least `min_keep` (= `top_k_MMR`) candidates are kept, at most `max_keep`
+- inside that window the list is cut at the largest drop in hybrid score, as long as the drop
+  is at least `min_gap`; a flat score curve keeps the whole window
+- only the kept head is cross-encoded, so bge-reranker cost scales with `max_keep`
+  instead of the up-to-2 x `top_k_retrieval` fused candidates
+'''
+from typing import Sequence
+
+
+def cascade_cutoff(scores: Sequence[float], min_keep: int, max_keep: int, min_gap: float = 0.05) -> int:
+    """Number of leading candidates to keep, given scores sorted in descending order."""
+    n = len(scores)
+    min_keep = max(1, min(min_keep, max_keep))
+    if n <= min_keep:
+        return n
+
+    upper = min(n, max_keep)
+    best_gap, cutoff = 0.0, upper
+    # gap after position i separates the first i + 1 candidates from the rest
+    for i in range(min_keep - 1, upper - 1):
+        gap = scores[i] - scores[i + 1]
+        if gap > best_gap:
+            best_gap, cutoff = gap, i + 1
+    return cutoff if best_gap >= min_gap else upper
+
@@ -0,0 +1,240 @@
+'''
+Entry objects are `change_feed` (process-wide `ChangeFeed`) and `install_change_feed_triggers`
+
+
+Every write to a memory table (Flask handlers, `InsertionAgent.insert_*`, migration scripts,
+manual SQL) fires a Postgres trigger that `pg_notify`s the `memory_changes` channel with a
+JSON payload `{"table", "op", "elderly_id", "id"}`. A background listener thread LISTENs on
+that channel and fans each event out to local subscribers, which drop whatever they cached
+for that tenant. This lets in-process caches keep long TTLs without serving stale memories.
+
+`ChangeFeed`:
+- `subscribe(callback)`: register `callback(table, elderly_id, row_id)` for every change
+- `publish(table, elderly_id, row_id, skip=None)`: dispatch a change locally (writers in this
+  process call this right after commit so they read their own writes without waiting for
+  NOTIFY); `skip` is a subscriber that already applied the write itself
+- `data_version(elderly_id)`: monotonically increasing counter, bumped on every change
+- `start(connection_string)`: start the LISTEN thread (idempotent)
+
+Session starts travel on a second channel, `memory_session_start`, whose payload is just the
+elderly id (the Flask app sends `SELECT pg_notify('memory_session_start', :elderly_id)` when a
+profile is opened). They do not bump data versions; `subscribe_session_start(callback)`
+registers `callback(elderly_id)`, used to preload the tenant's memory speculatively
+(`unsubscribe_session_start` when the owner is closed).
+'''
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "memory_changes"
+SESSION_CHANNEL = "memory_session_start"
+MEMORY_TABLES = ("short_term_memory", "long_term_memory", "healthcare_records")
+
+# Wildcard tenant used when every tenant must be invalidated (e.g. after a reconnect,
+# when notifications may have been missed)
+ALL_TENANTS = "*"
+
+_TRIGGER_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION notify_memory_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'table', TG_TABLE_NAME, 'op', TG_OP, 'elderly_id', OLD.elderly_id, 'id', OLD.id
+        )::text);
+    ELSE
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'table', TG_TABLE_NAME, 'op', TG_OP, 'elderly_id', NEW.elderly_id, 'id', NEW.id
+        )::text);
+        -- A row moved between tenants: the old tenant must be invalidated as well
+        IF TG_OP = 'UPDATE' AND OLD.elderly_id IS DISTINCT FROM NEW.elderly_id THEN
+            PERFORM pg_notify('{CHANNEL}', json_build_object(
+                'table', TG_TABLE_NAME, 'op', TG_OP, 'elderly_id', OLD.elderly_id, 'id', OLD.id
+            )::text);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def change_feed_ddl() -> List[str]:
+    """DDL statements creating the notify function and one AFTER trigger per memory table."""
+    statements = [_TRIGGER_FUNCTION_SQL]
+    for table in MEMORY_TABLES:
+        statements.append(f"DROP TRIGGER IF EXISTS trg_{table}_notify ON {table};")
+        statements.append(f"""
+            CREATE TRIGGER trg_{table}_notify
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION notify_memory_change();
+        """)
+    return statements
+
+
+def install_change_feed_triggers(cur) -> None:
+    """Install the change-feed triggers using an open DB-API cursor (caller commits)."""
+    for statement in change_feed_ddl():
+        cur.execute(statement)
+
+
+class ChangeFeed:
+    """Fans out memory-table changes (local or from Postgres NOTIFY) to cache subscribers."""
+
+    def __init__(self, channel: str = CHANNEL, poll_timeout: float = 5.0, reconnect_delay: float = 2.0,
+                 session_channel: str = SESSION_CHANNEL):
+        self.channel = channel
+        self.session_channel = session_channel
+        self.poll_timeout = poll_timeout
+        self.reconnect_delay = reconnect_delay
+
+        self._subscribers: List[Callable[[str, str, Optional[str]], None]] = []
+        self._session_subscribers: List[Callable[[str], None]] = []
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._global_version = 0
+        self._lock = threading.Lock()
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ------------------------------------------------------------------ #
+    # Subscribers and tenant versions
+    # ------------------------------------------------------------------ #
+    def subscribe(self, callback: Callable[[str, str, Optional[str]], None]) -> None:
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str, str, Optional[str]], None]) -> None:
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def data_version(self, elderly_id: str) -> int:
+        """Version of a tenant's memory; changes whenever any of its rows is written."""
+        with self._lock:
+            return self._versions[str(elderly_id)] + self._global_version
+
+    def publish(self, table: str, elderly_id: str, row_id: Optional[str] = None,
+                skip: Optional[Callable[[str, str, Optional[str]], None]] = None) -> None:
+        """Dispatch a change to every subscriber but `skip`. `elderly_id=ALL_TENANTS` invalidates everyone."""
+        elderly_id = str(elderly_id)
+        with self._lock:
+            if elderly_id == ALL_TENANTS:
+                self._global_version += 1
+            else:
+                self._versions[elderly_id] += 1
+            subscribers = [callback for callback in self._subscribers if callback != skip]
+
+        for callback in subscribers:
+            try:
+                callback(table, elderly_id, row_id)
+            except Exception as e:
+                logger.warning(f"❌ Change-feed subscriber failed: {e}")
+
+    def subscribe_session_start(self, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            if callback not in self._session_subscribers:
+                self._session_subscribers.append(callback)
+
+    def unsubscribe_session_start(self, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            if callback in self._session_subscribers:
+                self._session_subscribers.remove(callback)
+
+    def announce_session_start(self, elderly_id: str) -> None:
+        """Dispatch a session start (a profile or conversation was opened) to every subscriber"""
+        with self._lock:
+            subscribers = list(self._session_subscribers)
+        for callback in subscribers:
+            try:
+                callback(str(elderly_id))
+            except Exception as e:
+                logger.warning(f"❌ Session-start subscriber failed: {e}")
+
+    # ------------------------------------------------------------------ #
+    # LISTEN thread
+    # ------------------------------------------------------------------ #
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, connection_string: str) -> None:
+        """Start the background LISTEN thread. Safe to call from every agent constructor."""
+        with self._lock:
+            if self.running:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(connection_string,), name="memory-change-feed", daemon=True
+            )
+            self._thread.start()
+        logger.info(f"Change feed listening on channel '{self.channel}'")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _handle_payload(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+            table, elderly_id, row_id = event["table"], event["elderly_id"], event.get("id")
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"❌ Ignoring malformed change-feed payload {payload!r}: {e}")
+            return
+        if elderly_id is None:
+            return
+        self.publish(table, elderly_id, row_id)
+
+    def _run(self, connection_string: str) -> None:
+        first_connect = True
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(connection_string)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.channel};")
+                    cur.execute(f"LISTEN {self.session_channel};")
+
+                # Anything written while we were disconnected was never delivered
+                if not first_connect:
+                    self.publish("*", ALL_TENANTS)
+                first_connect = False
+
+                while not self._stop_event.is_set():
+                    if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        if notify.channel == self.session_channel:
+                            if notify.payload:
+                                self.announce_session_start(notify.payload)
+                        else:
+                            self._handle_payload(notify.payload)
+
+            except Exception as e:
+                logger.warning(f"❌ Change feed connection lost: {e}. Reconnecting in {self.reconnect_delay}s")
+                first_connect = False
+                time.sleep(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+# Process-wide change feed shared by every agent and cache
+change_feed = ChangeFeed()
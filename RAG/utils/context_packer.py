@@ -0,0 +1,118 @@
+'''
+Entry function is `pack_section`
+
+
+Token-budgeted packing of retrieved rows into one section of the final prompt template.
+Several tool calls can each return up to `top_k_MMR` rows per bucket, so without a budget the
+prompt (and the downstream LLM latency and cost) grows with every call.
+
+`pack_section`:
+- orders rows by their final ranking score (`mmr_score`, or the fusion / ANN score of the
+  cheaper tiers); rows without a score keep their tool order after the scored ones
+- drops repeats of the same row and near-identical rows, using the embeddings already fetched
+  for MMR (cosine >= `dedup_threshold`); rows without an embedding are compared by text
+- truncates long values to `max_value_chars` at a word boundary
+- keeps rows while the section fits `budget_tokens` (the top row is always kept)
+
+- returns:
+    - the rendered lines and a `PackStats` with the tokens the unpacked section would have used
+
+Token counts are estimated at `CHARS_PER_TOKEN` characters per token; no tokenizer for the
+downstream LLM is loaded in this process.
+'''
+import math
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+CHARS_PER_TOKEN = 4
+
+# Prompt tokens per template section
+DEFAULT_SECTION_BUDGETS = {"personal": 300, "health": 300, "conversation": 400}
+
+DEDUP_THRESHOLD = 0.95
+MAX_VALUE_CHARS = 300
+
+# Ranking keys in order of preference (full tier, hybrid_only, vector_only)
+SCORE_KEYS = ("mmr_score", "hybrid_score", "emb_score")
+
+
+class PackStats(NamedTuple):
+    rows_in: int
+    rows_kept: int
+    duplicates: int
+    tokens_in: int
+    tokens_out: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def truncate(text: Any, max_chars: int) -> Any:
+    if not isinstance(text, str) or len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0] or text[:max_chars]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def _score(row: Dict[str, Any]) -> Optional[float]:
+    for key in SCORE_KEYS:
+        if row.get(key) is not None:
+            return float(row[key])
+    return None
+
+
+def _unit(embedding: Any) -> Optional[np.ndarray]:
+    if embedding is None:
+        return None
+    if isinstance(embedding, str):
+        embedding = [float(x) for x in embedding.strip("[]").split(",")]
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def pack_section(
+    rows: Sequence[Dict[str, Any]],
+    render: Callable[[Dict[str, Any]], str],
+    budget_tokens: int,
+    text_key: Optional[str] = None,
+    dedup_threshold: float = DEDUP_THRESHOLD,
+    max_value_chars: int = MAX_VALUE_CHARS,
+) -> Tuple[List[str], PackStats]:
+    tokens_in = sum(estimate_tokens(render(r)) + 1 for r in rows)
+
+    # Highest final score first; Python's sort is stable, so unscored rows keep their order
+    ordered = sorted(rows, key=lambda r: (_score(r) is not None, _score(r) or 0.0), reverse=True)
+
+    kept_ids, kept_texts, kept_vectors = set(), set(), []
+    lines, duplicates, tokens_out = [], 0, 0
+    for row in ordered:
+        vector = _unit(row.get("embedding"))
+        text = " ".join(str(row.get(text_key, "")).lower().split()) if text_key else render(row)
+        if (row.get("id") is not None and row["id"] in kept_ids) or text in kept_texts or (
+            vector is not None and any(float(vector @ v) >= dedup_threshold for v in kept_vectors)
+        ):
+            duplicates += 1
+            continue
+
+        if text_key is not None:
+            row = {**row, text_key: truncate(row.get(text_key), max_value_chars)}
+        line = render(row)
+        cost = estimate_tokens(line) + 1  # + newline
+        if lines and tokens_out + cost > budget_tokens:
+            continue
+
+        lines.append(line)
+        tokens_out += cost
+        kept_ids.add(row.get("id"))
+        kept_texts.add(text)
+        if vector is not None:
+            kept_vectors.append(vector)
+
+    return lines, PackStats(len(rows), len(lines), duplicates, tokens_in, tokens_out)
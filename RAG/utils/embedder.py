@@ -87,6 +87,6 @@ class CrossEmbedder:
             logging.error(f"❌ Error loading CrossEncoder model: {e}")
             return None
     
-    def predict(self, pairs):
-        ce_raw_scores = self.model.predict(pairs)
+    def predict(self, pairs, batch_size: int = 32):
+        ce_raw_scores = self.model.predict(pairs, batch_size=batch_size)
         return ce_raw_scores
@@ -0,0 +1,236 @@
+'''
+Entry objects are `healthcare_index` (process-wide `HealthcareIndex`) and `TenantHealthIndex`
+
+
+Structured fast path for "what meds do I take" / "when is my next appointment". Instead of
+embedding the question and cross-encoding free-text `healthcare_records` rows, each tenant's
+medication and appointment rows are kept in memory:
+- `medications`: every medication row, most recently prescribed first
+- `upcoming_appointments(today)`: appointments kept sorted by `diagnosis_date`, so the next
+  visits are a bisect away; `previous_appointment(today)` is the last one before today
+
+The whole-tenant load reads only `record_type IN ('medication', 'appointment')`, which is
+served by the `(elderly_id, record_type, diagnosis_date)` index.
+
+`HealthcareIndex` is maintained incrementally:
+- `apply(elderly_id, row)`: writers in this process (`InsertionAgent.insert_health_record`)
+  push the committed row, and `apply` publishes it on the change feed for the other caches;
+  the Postgres NOTIFY echo of that write is then absorbed instead of re-fetching the row
+- any other write (Flask `/api/healthcare`, other processes, manual SQL) arrives through the
+  change feed as `(table, elderly_id, row_id)` and only marks that row stale; the reader
+  re-fetches the stale rows by primary key (`pop_stale` + `refresh`) instead of the tenant
+- tenants expire after `ttl_seconds` and are dropped on ALL_TENANTS events (missed NOTIFYs)
+- a `TenantHealthIndex` is mutated under `HealthcareIndex`'s lock (LISTEN thread, writers), so
+  readers go through `snapshot` rather than iterating it directly
+'''
+import bisect
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from RAG.utils.change_feed import ALL_TENANTS, ChangeFeed, change_feed
+
+TABLE = "healthcare_records"
+INDEXED_TYPES = ("medication", "appointment")
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _record_type(value) -> str:
+    return str(getattr(value, "value", value)).lower()
+
+
+class TenantHealthIndex:
+    """Medication list and date-sorted appointments of one elderly profile (not thread-safe)"""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]] = ()):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # (diagnosis_date, id) of dated appointments, kept sorted
+        self._appointments: List[Tuple[date, str]] = []
+        for row in rows:
+            self.apply(row)
+
+    def apply(self, row: Dict[str, Any]) -> None:
+        """Insert or update one `healthcare_records` row; other record types are dropped"""
+        record_id = str(row["id"])
+        self.remove(record_id)
+
+        record_type = _record_type(row["record_type"])
+        if record_type not in INDEXED_TYPES:
+            return
+
+        record = {
+            "id": record_id,
+            "record_type": record_type,
+            "description": row["description"],
+            "diagnosis_date": _as_date(row.get("diagnosis_date")),
+            "last_updated": row.get("last_updated"),
+        }
+        self._records[record_id] = record
+        if record_type == "appointment" and record["diagnosis_date"] is not None:
+            bisect.insort(self._appointments, (record["diagnosis_date"], record_id))
+
+    def remove(self, record_id: str) -> None:
+        record = self._records.pop(str(record_id), None)
+        if record is None or record["record_type"] != "appointment" or record["diagnosis_date"] is None:
+            return
+        entry = (record["diagnosis_date"], record["id"])
+        i = bisect.bisect_left(self._appointments, entry)
+        if i < len(self._appointments) and self._appointments[i] == entry:
+            del self._appointments[i]
+
+    @property
+    def medications(self) -> List[Dict[str, Any]]:
+        meds = [r for r in self._records.values() if r["record_type"] == "medication"]
+        # Most recently prescribed first, undated last
+        return sorted(meds, key=lambda r: (r["diagnosis_date"] is not None, r["diagnosis_date"] or date.min),
+                      reverse=True)
+
+    def upcoming_appointments(self, today: Optional[date] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Appointments on or after `today`, soonest first"""
+        today = today or date.today()
+        start = bisect.bisect_left(self._appointments, (today, ""))
+        end = len(self._appointments) if limit is None else min(len(self._appointments), start + limit)
+        return [self._records[record_id] for _, record_id in self._appointments[start:end]]
+
+    def previous_appointment(self, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        today = today or date.today()
+        i = bisect.bisect_left(self._appointments, (today, ""))
+        return self._records[self._appointments[i - 1][1]] if i else None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class HealthcareIndex:
+
+    def __init__(self, ttl_seconds: float = 6 * 3600, max_tenants: int = 1024, feed: ChangeFeed = change_feed):
+        self.ttl_seconds = ttl_seconds
+        self.max_tenants = max_tenants
+        self.feed = feed
+
+        # elderly_id -> (expires_at, index), kept in LRU order
+        self._tenants: "OrderedDict[str, Tuple[float, TenantHealthIndex]]" = OrderedDict()
+        # Rows written elsewhere since the tenant was loaded; re-fetched on the next read
+        self._stale: Dict[str, Set[str]] = defaultdict(set)
+        # Local writes already applied whose Postgres NOTIFY echo is still due; the echo
+        # consumes the token instead of marking the row stale (the local publish skips this index)
+        self._applied: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+        feed.subscribe(self._on_change)
+
+    def _on_change(self, table: str, elderly_id: str, row_id: Optional[str]) -> None:
+        if elderly_id == ALL_TENANTS:
+            self.clear()
+            return
+        if table != TABLE:
+            return
+        with self._lock:
+            if elderly_id not in self._tenants:
+                return
+            if row_id is None:
+                self._drop(elderly_id)
+                return
+            key = (elderly_id, str(row_id))
+            if self._applied.get(key):
+                self._applied[key] -= 1
+                if not self._applied[key]:
+                    del self._applied[key]
+                return
+            self._stale[elderly_id].add(str(row_id))
+
+    def _drop(self, elderly_id: str) -> None:
+        self._tenants.pop(elderly_id, None)
+        self._stale.pop(elderly_id, None)
+        for key in [k for k in self._applied if k[0] == elderly_id]:
+            del self._applied[key]
+
+    def get(self, elderly_id: str) -> Optional[TenantHealthIndex]:
+        """The tenant's index, or None when it was never loaded or has expired"""
+        elderly_id = str(elderly_id)
+        with self._lock:
+            entry = self._tenants.get(elderly_id)
+            if entry is None:
+                return None
+            expires_at, index = entry
+            if expires_at < time.monotonic():
+                self._drop(elderly_id)
+                return None
+            self._tenants.move_to_end(elderly_id)
+            return index
+
+    def set(self, elderly_id: str, rows: Iterable[Dict[str, Any]]) -> TenantHealthIndex:
+        """Build a tenant's index from its medication and appointment rows"""
+        elderly_id = str(elderly_id)
+        index = TenantHealthIndex(rows)
+        with self._lock:
+            self._drop(elderly_id)
+            self._tenants[elderly_id] = (time.monotonic() + self.ttl_seconds, index)
+            while len(self._tenants) > self.max_tenants:
+                self._drop(next(iter(self._tenants)))
+        return index
+
+    def apply(self, elderly_id: str, row: Dict[str, Any]) -> None:
+        """
+        Apply a row committed by this process and publish the write on the change feed. The
+        local dispatch skips this index; only the trigger's NOTIFY echo reaches `_on_change`.
+        """
+        elderly_id, record_id = str(elderly_id), str(row["id"])
+        with self._lock:
+            entry = self._tenants.get(elderly_id)
+            if entry is not None:
+                entry[1].apply(row)
+                # The echo only comes through a running LISTEN thread. If it already arrived
+                # (it races the commit), the row is marked stale and simply re-fetched once.
+                if self.feed.running and record_id not in self._stale.get(elderly_id, ()):
+                    self._applied[(elderly_id, record_id)] += 1
+        self.feed.publish(TABLE, elderly_id, record_id, skip=self._on_change)
+
+    def snapshot(self, index: TenantHealthIndex, today: date, limit: Optional[int] = None
+                 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Medications and upcoming appointments of `index`, read under the lock `apply` / `refresh` write under"""
+        with self._lock:
+            return index.medications, index.upcoming_appointments(today, limit)
+
+    def pop_stale(self, elderly_id: str) -> Set[str]:
+        """Ids of rows changed elsewhere since the last read; the caller re-fetches them"""
+        with self._lock:
+            return self._stale.pop(str(elderly_id), set())
+
+    def refresh(self, elderly_id: str, record_ids: Iterable[str], rows: Iterable[Dict[str, Any]]) -> None:
+        """Replace the stale `record_ids` with their fetched `rows`; ids without a row were deleted"""
+        elderly_id = str(elderly_id)
+        with self._lock:
+            entry = self._tenants.get(elderly_id)
+            if entry is None:
+                return
+            index = entry[1]
+            for record_id in record_ids:
+                index.remove(record_id)
+            for row in rows:
+                index.apply(row)
+
+    def invalidate(self, elderly_id: str) -> None:
+        with self._lock:
+            self._drop(str(elderly_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tenants.clear()
+            self._stale.clear()
+            self._applied.clear()
+
+
+# Process-wide index shared by the insertion and retrieval agents
+healthcare_index = HealthcareIndex()
@@ -0,0 +1,176 @@
+'''
+Entry classes are `LoadController`, `DegradationConfig` and `RetrievalTier`
+
+
+`retrieve_rerank` has a degradation ladder so the node keeps its latency SLO under load:
+
+    full                 cross-encoder on the adaptive cascade head (see `RAG.utils.cascade`) + MMR
+    cross_encoder_top_n  cascade capped at the top-N candidates by hybrid score + MMR
+    hybrid_only          BM25 + ANN fusion score, no cross-encoder
+    vector_only          ANN leg only (BM25 query skipped)
+
+`LoadController`:
+- `track()`: context manager counting in-flight retrievals
+- `timed(stage)` / `record(stage, value)`: recent per-stage latencies (embed, ann, bm25,
+  cross_encoder_pair, mmr) and the number of pairs the full tier's cascade keeps
+  (cross_encoder_pairs, also recorded while the top-N cap is active); samples older than `sample_ttl_seconds` are ignored, so a degraded
+  node periodically probes the richer tiers again and recovers once load drops
+- `choose_tier()`: in-flight thresholds set the cheapest tier allowed to run, then the ladder
+  is walked down until the tier's predicted latency fits `latency_target_ms`
+- `muted()`: samples recorded in this context (thread / asyncio task) are dropped, for work
+  that is not user traffic (session-start preload warm-ups)
+
+Thresholds come from `DegradationConfig` (or env via `DegradationConfig.from_env()`):
+    RETRIEVAL_LATENCY_TARGET_MS     default 800
+    RETRIEVAL_INFLIGHT_THRESHOLDS   default "4,8,16" (in-flight counts that force tiers 2/3/4)
+    RETRIEVAL_CE_TOP_N              default 10
+    RETRIEVAL_DEGRADATION           "off" pins every request to the full tier
+'''
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from typing import Deque, Dict, Optional, Tuple
+
+
+# False inside `LoadController.muted()`
+_recording: ContextVar[bool] = ContextVar("load_controller_recording", default=True)
+
+
+class RetrievalTier(str, Enum):
+    FULL = "full"
+    CROSS_ENCODER_TOP_N = "cross_encoder_top_n"
+    HYBRID_ONLY = "hybrid_only"
+    VECTOR_ONLY = "vector_only"
+
+
+# Richest first
+LADDER = (
+    RetrievalTier.FULL,
+    RetrievalTier.CROSS_ENCODER_TOP_N,
+    RetrievalTier.HYBRID_ONLY,
+    RetrievalTier.VECTOR_ONLY,
+)
+
+
+@dataclass
+class DegradationConfig:
+    latency_target_ms: float = 800.0
+    inflight_thresholds: Tuple[int, int, int] = (4, 8, 16)
+    top_n: int = 10
+    window: int = 64
+    sample_ttl_seconds: float = 30.0
+    enabled: bool = True
+
+    @classmethod
+    def from_env(cls) -> "DegradationConfig":
+        config = cls()
+        if os.getenv("RETRIEVAL_LATENCY_TARGET_MS"):
+            config.latency_target_ms = float(os.getenv("RETRIEVAL_LATENCY_TARGET_MS"))
+        if os.getenv("RETRIEVAL_INFLIGHT_THRESHOLDS"):
+            thresholds = tuple(int(x) for x in os.getenv("RETRIEVAL_INFLIGHT_THRESHOLDS").split(","))
+            if len(thresholds) != 3:
+                raise ValueError("RETRIEVAL_INFLIGHT_THRESHOLDS must list three in-flight counts, e.g. '4,8,16'")
+            config.inflight_thresholds = thresholds
+        if os.getenv("RETRIEVAL_CE_TOP_N"):
+            config.top_n = int(os.getenv("RETRIEVAL_CE_TOP_N"))
+            if config.top_n < 1:
+                raise ValueError("RETRIEVAL_CE_TOP_N must be at least 1")
+        if os.getenv("RETRIEVAL_DEGRADATION", "").lower() in ("0", "off", "false", "no"):
+            config.enabled = False
+        return config
+
+
+class LoadController:
+
+    def __init__(self, config: Optional[DegradationConfig] = None):
+        self.config = config or DegradationConfig()
+        self._in_flight = 0
+        # stage -> deque of (timestamp, value)
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = defaultdict(
+            lambda: deque(maxlen=self.config.window)
+        )
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ #
+    # Load signals
+    # ------------------------------------------------------------------ #
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def record(self, stage: str, value: float) -> None:
+        if not _recording.get():
+            return
+        with self._lock:
+            self._samples[stage].append((time.monotonic(), value))
+
+    @contextmanager
+    def muted(self):
+        """Drop the samples recorded in this context, so background work does not steer tier choice"""
+        token = _recording.set(False)
+        try:
+            yield self
+        finally:
+            _recording.reset(token)
+
+    @contextmanager
+    def timed(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def recent(self, stage: str, quantile: float = 0.9) -> Optional[float]:
+        """Quantile of the fresh samples of a stage, or None when there are none."""
+        cutoff = time.monotonic() - self.config.sample_ttl_seconds
+        with self._lock:
+            values = sorted(v for ts, v in self._samples.get(stage, ()) if ts >= cutoff)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(quantile * len(values)))]
+
+    # ------------------------------------------------------------------ #
+    # Tier selection
+    # ------------------------------------------------------------------ #
+    def predicted_latency_ms(self, tier: RetrievalTier) -> float:
+        """Expected latency of one retrieval at `tier`; stages without fresh samples count as free."""
+        def stage(name: str) -> float:
+            return self.recent(name) or 0.0
+
+        seconds = stage("embed") + stage("ann")
+        if tier != RetrievalTier.VECTOR_ONLY:
+            seconds += stage("bm25")
+        if tier == RetrievalTier.FULL:
+            seconds += stage("cross_encoder_pair") * stage("cross_encoder_pairs") + stage("mmr")
+        elif tier == RetrievalTier.CROSS_ENCODER_TOP_N:
+            pairs = min(self.config.top_n, stage("cross_encoder_pairs") or self.config.top_n)
+            seconds += stage("cross_encoder_pair") * pairs + stage("mmr")
+        return seconds * 1000.0
+
+    def choose_tier(self) -> RetrievalTier:
+        if not self.config.enabled:
+            return RetrievalTier.FULL
+
+        # Concurrency sets the floor: beyond each threshold the richer tiers are not attempted
+        level = sum(self._in_flight > t for t in self.config.inflight_thresholds)
+
+        # Latency pressure pushes further down the ladder
+        while level < len(LADDER) - 1 and self.predicted_latency_ms(LADDER[level]) > self.config.latency_target_ms:
+            level += 1
+        return LADDER[level]
@@ -0,0 +1,119 @@
+'''
+Entry class is `LTMKeyIndex`
+
+
+Exact key-value fast path for long-term memory. Many LTM questions ("who is my husband",
+"what do I dislike", "who is my next of kin") resolve to one stored `(category, key)`; those can
+be answered from an in-memory dictionary without embedding, ANN, BM25 or the cross-encoder.
+
+`LTMKeyIndex`:
+- `set(elderly_id, rows)`: build a tenant's phrase table from its `long_term_memory` rows
+- `get(elderly_id)`: the tenant's table, or None when it is not loaded (or was invalidated)
+- `lookup(table, query, category=None)`: rows of the single key the query asks about, or None
+
+Keys are normalized ("closest_kin" -> "closest kin") and expanded with `ALIAS_GROUPS`
+("next of kin", "nok", ...). A lookup is only confident when exactly one key matches and the
+query has no other content words left over; anything else falls through to hybrid retrieval.
+Tables live in a `TenantTTLCache` on `long_term_memory`, so LTM writes invalidate them.
+'''
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from RAG.utils.tenant_cache import TenantTTLCache
+
+# Phrases that name the same long-term fact
+ALIAS_GROUPS = [
+    {"name", "full name", "called"},
+    {"closest kin", "next of kin", "nok", "closest relative", "emergency contact"},
+    {"likes", "like", "enjoy", "favourite things", "favorite things"},
+    {"dislikes", "dislike", "hate", "do not like", "dont like"},
+    {"occupation", "job", "work", "career", "profession", "worked as"},
+    {"husband", "hubby"},
+    {"wife"},
+    {"hobby", "hobbies", "pastime"},
+    {"neighbour", "neighbor", "neighbours", "neighbors"},
+    {"close friend", "best friend", "good friend", "kaki"},
+    {"religion", "faith"},
+    {"dialect", "dialect group"},
+]
+
+# Words that carry no lookup intent: question words, pronouns, auxiliaries, Singlish particles
+STOPWORDS = {
+    "a", "about", "again", "am", "an", "and", "any", "are", "be", "can", "could", "did", "do", "does",
+    "for", "have", "he", "her", "him", "his", "how", "i", "is", "it", "its", "know", "me", "mine", "my",
+    "of", "on", "or", "please", "remember", "remind", "she", "tell", "that", "the", "their", "them",
+    "they", "this", "to", "was", "what", "whats", "when", "where", "which", "who", "whos", "whom",
+    "why", "will", "would", "you", "your", "ah", "hor", "lah", "leh", "lor", "meh", "sia", "ya", "eh",
+}
+
+# Longer questions are rarely single-fact lookups
+MAX_QUERY_WORDS = 15
+
+
+def normalize(text: str) -> str:
+    text = text.lower().replace("'", "").replace("’", "")
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def _phrases_for_key(key: str) -> List[str]:
+    phrases = {key}
+    if " " not in key:
+        phrases.add(key[:-1] if key.endswith("s") else key + "s")
+    for group in ALIAS_GROUPS:
+        if key in group:
+            phrases |= group
+    return sorted(phrases)
+
+
+class LTMKeyIndex:
+
+    def __init__(self, cache: Optional[TenantTTLCache] = None):
+        self.cache = cache or TenantTTLCache(tables=("long_term_memory",))
+
+    @staticmethod
+    def build(rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """phrase -> {"key": normalized key, "rows": [...]} for one tenant"""
+        by_key: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_key.setdefault(normalize(row["key"]), []).append(row)
+
+        table: Dict[str, Dict[str, Any]] = {}
+        for key, key_rows in by_key.items():
+            for phrase in _phrases_for_key(key):
+                # An exact key always wins over another key's alias
+                if phrase not in table or phrase == key:
+                    table[phrase] = {"key": key, "rows": key_rows}
+        return table
+
+    def get(self, elderly_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self.cache.get(elderly_id, "ltm_key_index")
+
+    def set(self, elderly_id: str, rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        table = self.build(rows)
+        self.cache.set(elderly_id, "ltm_key_index", table)
+        return table
+
+    @staticmethod
+    def lookup(table: Dict[str, Dict[str, Any]], query: str,
+               category: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Rows answering `query` when it confidently names exactly one stored key"""
+        words = normalize(query).split()
+        if not words or len(words) > MAX_QUERY_WORDS:
+            return None
+        padded = f" {' '.join(words)} "
+
+        matched = [phrase for phrase in table if f" {phrase} " in padded]
+        # "eldest son" subsumes "son"
+        matched = [p for p in matched if not any(p != other and f" {p} " in f" {other} " for other in matched)]
+        keys = {table[p]["key"] for p in matched}
+        if len(keys) != 1:
+            return None
+
+        covered = {word for phrase in matched for word in phrase.split()}
+        if any(word not in STOPWORDS and word not in covered for word in words):
+            return None
+
+        rows = table[matched[0]]["rows"]
+        if category is not None:
+            rows = [r for r in rows if str(r["category"]).lower() == category]
+        return rows or None
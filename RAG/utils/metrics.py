@@ -0,0 +1,67 @@
+'''
+Entry object is `metrics` (process-wide `Metrics` registry)
+
+
+`Metrics`:
+- `incr(name, value=1, **labels)`: monotonically increasing counter
+- `observe(name, value, **labels)`: summary (count / sum / max) of a measured value
+- `ratio(hit_name, total_name, **labels)`: convenience for hit rates
+- `snapshot()`: plain dict of every series, suitable for logging or a JSON endpoint
+
+Series are keyed Prometheus-style, e.g. `retrieval_tier_total{mode=long-term,tier=full}`.
+'''
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+
+def _series(name: str, labels: Dict[str, Any]) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={labels[k]}" for k in sorted(labels)) + "}"
+
+
+class Metrics:
+
+    def __init__(self):
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._summaries: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        key = _series(name, labels)
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _series(name, labels)
+        with self._lock:
+            summary = self._summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": float("-inf")})
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(_series(name, labels), 0.0)
+
+    def ratio(self, hit_name: str, total_name: str, **labels) -> float:
+        total = self.counter(total_name, **labels)
+        return self.counter(hit_name, **labels) / total if total else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            summaries = {
+                key: {**s, "mean": s["sum"] / s["count"] if s["count"] else 0.0}
+                for key, s in self._summaries.items()
+            }
+            return {"counters": dict(self._counters), "summaries": summaries}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+# Process-wide registry
+metrics = Metrics()
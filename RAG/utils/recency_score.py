@@ -4,15 +4,25 @@ Entry function is `compute_recency_score`
 
 `compute_recency_score`:
 - computes the recency score, scoring higher for chunks nearer to the query
+- when the query names a time scope ("yesterday", "last Sunday", see `RAG.utils.temporal_parser`),
+  chunks inside that window score 1.0 and the decay is measured from the window instead of from now
+
+- timestamps are read as Postgres stores them (`CURRENT_TIMESTAMP` into TIMESTAMP columns, so
+  naive values are UTC) and scored in Singapore time
 
 - Args:
     - `content_list`: the list of chunks (dicts) retrieved where each should contain either the key for `created_at` or `last_updated`
     - `query`: the user query 
 - returns:
     - list of chunks (dicts) with a key (`time_relevance_score`) for the time relevance score
+
+`recency_scores`:
+- the same scores for a plain sequence of timestamps (`CandidateSet` keeps no per-row dicts),
+  given the (start, end) SGT window the caller already resolved (`HybridRetrievalAgent._temporal_filters`)
+  instead of the query; missing or unparseable timestamps score 0.0
 '''
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 import math
 
 # Global parameters
@@ -28,12 +38,17 @@ def _get_content_datetime(content: Dict[str, Any]) -> datetime:
     raw = content.get('last_updated') or content.get('created_at')
     if raw is None:
         raise ValueError("Content must have either 'created_at' or 'last_updated' key")
+    return _to_sgt(raw)
+
+
+def _to_sgt(raw: Any) -> datetime:
+    """datetime or timestamp string -> SGT datetime (naive values are UTC)"""
 
     # Case 1: Already a datetime
     if isinstance(raw, datetime):
         if raw.tzinfo is None:
-            # Treat naive datetimes as SGT
-            return raw.replace(tzinfo=SGT)
+            # Naive datetimes come from TIMESTAMP columns, which hold UTC
+            return raw.replace(tzinfo=timezone.utc).astimezone(SGT)
         return raw.astimezone(SGT)
 
     # Case 2: String timestamp
@@ -43,10 +58,8 @@ def _get_content_datetime(content: Dict[str, Any]) -> datetime:
         except ValueError:
             dt = datetime.strptime(raw, "%Y-%m-%d %H:%M:%S")
         if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=SGT)
-        else:
-            dt = dt.astimezone(SGT)
-        return dt
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(SGT)
 
     raise ValueError(f"Unsupported datetime type: {type(raw)}")
 
@@ -74,16 +87,57 @@ def _calculate_decay_score(content_time: datetime, reference_time: datetime = No
     return _exponential_decay(age_days, HALF_LIFE_DAYS)
 
 
+def _window_score(content_time: datetime, start: Optional[datetime], end: Optional[datetime]) -> float:
+    """1.0 inside the query's time window, decaying with the distance to the nearest edge outside it."""
+    if start is not None and content_time < start:
+        return _calculate_decay_score(content_time, start)
+    if end is not None and content_time >= end:
+        return _calculate_decay_score(end, content_time)
+    return 1.0
+
+
+Window = Tuple[Optional[datetime], Optional[datetime]]
+
+
+def _window_scorer(window: Optional[Window]) -> Callable[[datetime], float]:
+    """Window-based score for a naive SGT (start, end) window, plain decay without one"""
+    if window is None:
+        return _calculate_decay_score
+    start, end = (bound.replace(tzinfo=SGT) if bound else None for bound in window[:2])
+    return lambda content_time: _window_score(content_time, start, end)
+
+
+def _scorer(query: str) -> Callable[[datetime], float]:
+    """Score function for the query: window-based when it names a time scope, plain decay otherwise"""
+    # Imported here: the parser itself imports SGT from this module
+    from RAG.utils.temporal_parser import parse_time_window
+
+    return _window_scorer(parse_time_window(query))
+
+
+def recency_scores(times: Sequence[Any], window: Optional[Window] = None) -> List[float]:
+    """Recency score per timestamp (datetime or string; None scores 0.0) against a naive SGT window"""
+    score = _window_scorer(window)
+    scores = []
+    for raw in times:
+        try:
+            scores.append(round(score(_to_sgt(raw)), 4) if raw is not None else 0.0)
+        except ValueError:
+            scores.append(0.0)
+    return scores
+
+
 def compute_recency_score(content_list: List[Dict[str, Any]], query: str = "") -> List[Dict[str, Any]]:
     """
     Computes and adds a 'recency_score' key directly to each content dict in-place.
-    All times are interpreted as Singapore Time (UTC+8).
+    Naive timestamps are read as UTC; scoring is in Singapore Time (UTC+8).
     """
+    score_fn = _scorer(query)
+
     for content in content_list:
         try:
             content_time = _get_content_datetime(content)
-            score = _calculate_decay_score(content_time)
-            content['recency_score'] = round(score, 4)
+            content['recency_score'] = round(score_fn(content_time), 4)
             content['timezone_used'] = "Asia/Singapore (UTC+8)"
         except ValueError as e:
             content['recency_score'] = 0.0
@@ -0,0 +1,120 @@
+'''
+Entry class is `SessionContextCache`
+
+
+Conversations stay on one topic for several turns ("who is my son" -> "what does he work as"),
+so consecutive queries often land on the same hybrid candidates. The session cache keeps, per
+(conversation id, bucket, filters, vector-only), the last retrieval's query embedding and its
+fused `CandidateSet` (with its parsed embedding matrix); a vector-only set has no BM25 leg, so
+it is never handed to the richer tiers:
+- `reuse(...)`: when the new query embedding is within `similarity_threshold` (cosine) of the
+  cached one, the cached candidates are re-scored against the new query (ANN score from the
+  stored embeddings, BM25 score kept) and handed to the reranker without touching Postgres
+- `store(...)`: remember a fresh retrieval together with the tenant's data version read
+  before the fetch
+- entries whose tenant `change_feed.data_version` moved on are never reused, so a memory
+  written mid-conversation is picked up by the very next turn
+- `end(conversation_id)`: drop a finished conversation's turns (`TenantAgent.end_conversation`)
+'''
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from RAG.utils.candidates import CandidateSet
+from RAG.utils.change_feed import ChangeFeed, change_feed
+
+
+class SessionTurn(NamedTuple):
+    elderly_id: str
+    data_version: int
+    query_embedding: np.ndarray
+    candidates: CandidateSet
+    # Unit-norm candidate embeddings, one row per candidate
+    matrix: np.ndarray
+    expires_at: float
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SessionContextCache:
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.85,
+        ttl_seconds: float = 15 * 60,
+        max_entries: int = 1024,
+        feed: ChangeFeed = change_feed,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.feed = feed
+
+        # (conversation_id, mode, filters, vector_only) -> SessionTurn, kept in LRU order
+        self._entries: "OrderedDict[Tuple[Hashable, ...], SessionTurn]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(conversation_id: str, mode: str, filters: Optional[Dict[str, Any]],
+            vector_only: bool = False) -> Tuple[Hashable, ...]:
+        scope = tuple(sorted((k, str(v)) for k, v in (filters or {}).items() if v is not None))
+        return str(conversation_id), mode, scope, vector_only
+
+    def reuse(self, key: Tuple[Hashable, ...], elderly_id: str, query_embedding: Sequence[float],
+              alpha_retrieval: float = 0.5) -> Optional[CandidateSet]:
+        """Re-scored copies of the cached candidates, or None when the last turn cannot be reused"""
+        with self._lock:
+            turn = self._entries.get(key)
+            if turn is None:
+                return None
+            if (turn.expires_at < time.monotonic() or turn.elderly_id != str(elderly_id)
+                    or turn.data_version != self.feed.data_version(elderly_id)):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        query = _unit(query_embedding)
+        if float(query @ turn.query_embedding) < self.similarity_threshold:
+            return None
+
+        candidates = turn.candidates
+        emb_scores = (turn.matrix @ query).astype(np.float64) if len(candidates) else np.zeros(0)
+        bm25_scores = candidates.bm25_score if candidates.bm25_score is not None else np.zeros(len(candidates))
+        hybrid_scores = np.round(alpha_retrieval * bm25_scores + (1 - alpha_retrieval) * emb_scores, 4)
+        rescored = candidates.take(range(len(candidates)), emb_score=emb_scores, hybrid_score=hybrid_scores)
+        return rescored.sort_by("hybrid_score")
+
+    def store(self, key: Tuple[Hashable, ...], elderly_id: str, data_version: int,
+              query_embedding: Sequence[float], candidates: CandidateSet) -> None:
+        """Remember a fresh retrieval; the set's parsed embeddings are shared with the reranker"""
+        try:
+            matrix = candidates.embeddings
+        except (TypeError, ValueError):
+            return
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True) if len(candidates) else np.ones((0, 1))
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+        turn = SessionTurn(str(elderly_id), data_version, _unit(query_embedding),
+                           candidates, matrix, time.monotonic() + self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = turn
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def end(self, conversation_id: str) -> None:
+        """Forget a finished conversation"""
+        conversation_id = str(conversation_id)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == conversation_id]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
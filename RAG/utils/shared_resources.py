@@ -0,0 +1,86 @@
+'''
+Entry class is `SharedResources`
+
+
+`SharedResources`:
+- owns the heavy, tenant-agnostic objects every agent needs: the SQLAlchemy engine, the
+  embedding model, the cross-encoder and the Gemini client
+- one instance is created per process (see `RAG.agent_factory`) and handed to every
+  `HybridRetrievalAgent` / `InsertionAgent`, so serving another elderly profile never
+  reloads a model or opens a new connection pool
+- the cross-encoder is loaded on first use, so insertion-only processes never pay for it
+'''
+import os
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from RAG.utils.embedder import Embedder, CrossEmbedder
+from RAG.utils.change_feed import change_feed
+
+
+class SharedResources:
+
+    def __init__(
+        self,
+        embedding_model_name: str = "google/embeddinggemma-300m",
+        cross_encoder_model_name: str = "BAAI/bge-reranker-base",
+    ):
+        # Load environment variables
+        load_dotenv()
+
+        self.embedding_model_name = embedding_model_name
+        self.cross_encoder_model_name = cross_encoder_model_name
+        self._encoder: Optional[CrossEmbedder] = None
+        self._lock = threading.Lock()
+
+        self._setup_database()
+        self.embedder = Embedder(model_name=embedding_model_name)
+        self._setup_llm()
+
+    def _setup_database(self):
+        """Setup database connection and engine"""
+        self.connection_string = os.getenv("DATABASE_URL")
+        self.secret_key = os.getenv("DATABASE_ENCRYPTION_KEY")
+
+        if not self.connection_string:
+            raise ValueError("DATABASE_URL environment variable is required")
+        if not self.secret_key:
+            raise ValueError("DATABASE_ENCRYPTION_KEY environment variable is required")
+
+        self.engine = create_engine(
+            self.connection_string,
+            pool_size=5,
+            max_overflow=10,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            connect_args={
+                "keepalives": 1,
+                "keepalives_idle": 30,
+                "keepalives_interval": 10,
+                "tcp_user_timeout": 60000,
+            },
+            echo=False
+        )
+
+        # Listen for writes from other processes so local caches can be invalidated per tenant
+        change_feed.start(self.connection_string)
+
+    def _setup_llm(self):
+        """Setup language model"""
+        self.llm = ChatGoogleGenerativeAI(
+            model="gemini-2.5-flash",
+            temperature=0,
+            max_output_tokens=1000
+        )
+
+    @property
+    def encoder(self) -> CrossEmbedder:
+        if self._encoder is None:
+            with self._lock:
+                if self._encoder is None:
+                    self._encoder = CrossEmbedder(self.cross_encoder_model_name)
+        return self._encoder
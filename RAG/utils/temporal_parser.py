@@ -0,0 +1,196 @@
+'''
+Entry function is `parse_time_window`
+
+
+`parse_time_window`:
+- turns the time scope of an English / Singlish query ("just now", "ytd night", "this morning",
+  "last Sunday", "2 days ago", "next appointment", ...) into a half-open time window
+- rule based (a few regexes), so it costs microseconds and can run on every retrieval
+
+- Args:
+    - `query`: the user query
+    - `now`: reference time (defaults to the current Singapore time)
+    - `upcoming`: how a bare "on Monday" resolves when the query's tense does not settle it:
+      the coming Monday (True, e.g. healthcare events) or the last one (False)
+- returns:
+    - `TimeWindow(start, end, phrase)` with naive Singapore-time datetimes, where `start` or `end`
+      is None for open-ended windows ("upcoming", "previous appointment"), or None when the query
+      has no clear time scope
+
+`sgt_to_utc` converts a window bound for TIMESTAMP columns, which hold naive UTC.
+'''
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from RAG.utils.recency_score import SGT
+
+
+class TimeWindow(NamedTuple):
+    start: Optional[datetime]
+    end: Optional[datetime]
+    phrase: str
+
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+_WEEKDAY = r"(monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+
+# Hours covered by each part of the day; night runs into the next morning
+PARTS_OF_DAY = {"morning": (5, 12), "afternoon": (12, 18), "evening": (17, 22), "night": (18, 30)}
+_PART = r"(morning|afternoon|evening|night)"
+
+NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+                "seven": 7, "couple of": 2, "few": 3}
+_NUMBER = r"(\d+|a|an|one|two|three|four|five|six|seven|couple of|few)"
+
+# Singlish / chat shorthand
+YESTERDAY = r"(?:yesterday|ytd|ystd|yday)"
+TOMORROW = r"(?:tomorrow|tmr|tmrw|tml|tmw)"
+_APPOINTMENT = r"(?:appointments?|appts?|check-?ups?|visits?|reviews?|follow-?ups?)"
+
+# Tense of the query, for a bare "on <weekday>"
+_FUTURE = re.compile(rf"\b(?:will|won't|going to|gonna|shall|have to|need to|must|{_APPOINTMENT})\b", re.IGNORECASE)
+_PAST = re.compile(r"\b(?:did|didn't|was|wasn't|were|went|had|said|told|ago)\b", re.IGNORECASE)
+
+Window = Tuple[Optional[datetime], Optional[datetime]]
+
+
+def _day_start(day: datetime) -> datetime:
+    return day.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _day(day: datetime, part: Optional[str] = None) -> Window:
+    start = _day_start(day)
+    if part is None:
+        return start, start + timedelta(days=1)
+    first, last = PARTS_OF_DAY[part.lower()]
+    return start + timedelta(hours=first), start + timedelta(hours=last)
+
+
+def _number(word: str) -> int:
+    return int(word) if word.isdigit() else NUMBER_WORDS[word.lower()]
+
+
+def _past_weekday(now: datetime, name: str) -> datetime:
+    """Most recent `name` strictly before today"""
+    delta = (now.weekday() - WEEKDAYS.index(name.lower())) % 7 or 7
+    return now - timedelta(days=delta)
+
+
+def _next_weekday(now: datetime, name: str) -> datetime:
+    """First `name` strictly after today"""
+    delta = (WEEKDAYS.index(name.lower()) - now.weekday()) % 7 or 7
+    return now + timedelta(days=delta)
+
+
+def _coming_weekday(now: datetime, name: str) -> datetime:
+    """Today if it is `name`, else the next `name`"""
+    return now + timedelta(days=(WEEKDAYS.index(name.lower()) - now.weekday()) % 7)
+
+
+def _on_weekday(now: datetime, m: re.Match, upcoming: bool) -> Window:
+    """Bare "on <weekday>": by the query's tense, else `upcoming`"""
+    if _PAST.search(m.string):
+        upcoming = False
+    elif _FUTURE.search(m.string):
+        upcoming = True
+    day = _coming_weekday(now, m.group(1)) if upcoming else _past_weekday(now, m.group(1))
+    return _day(day)
+
+
+def _week(now: datetime, offset: int) -> Window:
+    monday = _day_start(now) - timedelta(days=now.weekday()) + timedelta(weeks=offset)
+    return monday, monday + timedelta(weeks=1)
+
+
+def _month(now: datetime, offset: int) -> Window:
+    month_index = now.year * 12 + now.month - 1 + offset
+    start = datetime(month_index // 12, month_index % 12 + 1, 1)
+    end_index = month_index + 1
+    return start, datetime(end_index // 12, end_index % 12 + 1, 1)
+
+
+def _weekend(now: datetime, past: bool) -> Window:
+    if past:
+        saturday = _past_weekday(now, "saturday") if now.weekday() != 6 else now - timedelta(days=8)
+    else:
+        saturday = now - timedelta(days=1) if now.weekday() == 6 else now + timedelta(days=(5 - now.weekday()) % 7)
+    start = _day_start(saturday)
+    return start, start + timedelta(days=2)
+
+
+# (pattern, window builder) in priority order; the first matching rule wins
+RULES: List[Tuple[str, Callable[[datetime, re.Match], Window]]] = [
+    # Open-ended healthcare scopes
+    (rf"\b(?:next|upcoming|coming|future)\s+(?:\w+\s+)?{_APPOINTMENT}",
+     lambda now, m: (_day_start(now), None)),
+    (rf"\b(?:last|previous|most recent|recent)\s+(?:\w+\s+)?{_APPOINTMENT}",
+     lambda now, m: (None, now)),
+    (r"\bupcoming\b", lambda now, m: (_day_start(now), None)),
+
+    # Relative to now
+    (r"\b(?:just now|a while ago|earlier today|just earlier)\b",
+     lambda now, m: (now - timedelta(hours=12), now)),
+    (r"\blast night\b", lambda now, m: _day(now - timedelta(days=1), "night")),
+    (r"\btonight\b", lambda now, m: _day(now, "night")),
+    (r"\b(?:later today|later)\b", lambda now, m: (now, _day_start(now) + timedelta(days=1))),
+    (rf"\b(?:the\s+)?day before {YESTERDAY}\b", lambda now, m: _day(now - timedelta(days=2))),
+    (rf"\b(?:the\s+)?day after {TOMORROW}\b", lambda now, m: _day(now + timedelta(days=2))),
+    (rf"\b{YESTERDAY}(?:\s+{_PART})?\b", lambda now, m: _day(now - timedelta(days=1), m.group(1))),
+    (rf"\b{TOMORROW}(?:\s+{_PART})?\b", lambda now, m: _day(now + timedelta(days=1), m.group(1))),
+    (rf"\bthis\s+{_PART}\b", lambda now, m: _day(now, m.group(1))),
+    (r"\btoday\b", lambda now, m: _day(now)),
+
+    # Named weekdays
+    (rf"\b(?:last|previous|this past)\s+{_WEEKDAY}\b", lambda now, m: _day(_past_weekday(now, m.group(1)))),
+    (rf"\b(?:next|this coming|coming)\s+{_WEEKDAY}\b", lambda now, m: _day(_next_weekday(now, m.group(1)))),
+    (rf"\bon\s+{_WEEKDAY}\b", _on_weekday),
+
+    # Counted spans
+    (rf"\b{_NUMBER}\s+days?\s+ago\b",
+     lambda now, m: _day(now - timedelta(days=_number(m.group(1))))),
+    (rf"\b{_NUMBER}\s+weeks?\s+ago\b",
+     lambda now, m: (now - timedelta(weeks=_number(m.group(1)) + 1), now - timedelta(weeks=max(_number(m.group(1)) - 1, 0)))),
+    (rf"\b(?:past|last|previous)\s+{_NUMBER}\s+days\b",
+     lambda now, m: (now - timedelta(days=_number(m.group(1))), now)),
+    (rf"\b(?:past|last|previous)\s+{_NUMBER}\s+weeks\b",
+     lambda now, m: (now - timedelta(weeks=_number(m.group(1))), now)),
+
+    # Calendar spans
+    (r"\b(?:last|previous)\s+week\b", lambda now, m: _week(now, -1)),
+    (r"\bpast\s+week\b", lambda now, m: (now - timedelta(weeks=1), now)),
+    (r"\bthis\s+week\b", lambda now, m: _week(now, 0)),
+    (r"\bnext\s+week\b", lambda now, m: _week(now, 1)),
+    (r"\b(?:last|this past)\s+weekend\b", lambda now, m: _weekend(now, past=True)),
+    (r"\b(?:this|coming|this coming|next)\s+weekend\b", lambda now, m: _weekend(now, past=False)),
+    (r"\b(?:last|previous)\s+month\b", lambda now, m: _month(now, -1)),
+    (r"\bthis\s+month\b", lambda now, m: _month(now, 0)),
+    (r"\bnext\s+month\b", lambda now, m: _month(now, 1)),
+
+    # Vague recency
+    (r"\bthe other day\b", lambda now, m: (now - timedelta(days=7), _day_start(now))),
+    (r"\b(?:recently|lately|these (?:few )?days)\b", lambda now, m: (now - timedelta(days=7), now)),
+]
+
+_COMPILED = [(re.compile(pattern, re.IGNORECASE), build) for pattern, build in RULES]
+
+
+def sgt_to_utc(value: datetime) -> datetime:
+    """Naive Singapore-time datetime -> naive UTC datetime"""
+    return value.replace(tzinfo=SGT).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_time_window(query: str, now: Optional[datetime] = None, upcoming: bool = False) -> Optional[TimeWindow]:
+    if not query:
+        return None
+    if now is None:
+        now = datetime.now(SGT).replace(tzinfo=None)
+    elif now.tzinfo is not None:
+        now = now.astimezone(SGT).replace(tzinfo=None)
+
+    for pattern, build in _COMPILED:
+        match = pattern.search(query)
+        if match:
+            start, end = build(now, match, upcoming) if build is _on_weekday else build(now, match)
+            return TimeWindow(start, end, match.group(0))
+    return None
@@ -0,0 +1,92 @@
+'''
+Entry class is `TenantTTLCache`
+
+
+`TenantTTLCache`:
+- in-process cache of per-tenant values (embeddings, vector matrices, retrieval results)
+- entries expire after `ttl_seconds`, but are dropped much earlier whenever the change feed
+  reports a write to one of the watched tables for that tenant
+- because invalidation is push-based, `ttl_seconds` can be long (hours) without serving
+  stale memories
+'''
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional, Tuple
+
+from RAG.utils.change_feed import ALL_TENANTS, MEMORY_TABLES, ChangeFeed, change_feed
+
+
+class TenantTTLCache:
+
+    def __init__(
+        self,
+        ttl_seconds: float = 6 * 3600,
+        max_entries: int = 1024,
+        tables: Iterable[str] = MEMORY_TABLES,
+        feed: ChangeFeed = change_feed,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.tables = set(tables)
+        self.feed = feed
+
+        # (elderly_id, key) -> (expires_at, value), kept in LRU order
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.feed.subscribe(self._on_change)
+
+    def _on_change(self, table: str, elderly_id: str, row_id: Optional[str]) -> None:
+        if elderly_id == ALL_TENANTS:
+            self.clear()
+        elif table in self.tables:
+            self.invalidate(elderly_id)
+
+    def get(self, elderly_id: str, key: Hashable, default: Any = None) -> Any:
+        cache_key = (str(elderly_id), key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[cache_key]
+                return default
+            self._entries.move_to_end(cache_key)
+            return value
+
+    def set(self, elderly_id: str, key: Hashable, value: Any) -> None:
+        cache_key = (str(elderly_id), key)
+        with self._lock:
+            self._entries[cache_key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, elderly_id: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value or call `loader()` and cache its result. The loader runs outside
+        the lock, so its result is not cached if the tenant changed while it was loading.
+        """
+        sentinel = object()
+        value = self.get(elderly_id, key, sentinel)
+        if value is sentinel:
+            version = self.feed.data_version(elderly_id)
+            value = loader()
+            if self.feed.data_version(elderly_id) == version:
+                self.set(elderly_id, key, value)
+        return value
+
+    def invalidate(self, elderly_id: str) -> None:
+        elderly_id = str(elderly_id)
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == elderly_id]:
+                del self._entries[cache_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,2 +1,24 @@
+from typing import Dict, Tuple
+
+from sqlalchemy.engine import make_url
+
+
 def normalize_for_paradedb(query: str) -> str:
-    return f"\"{query}\""  # wrap in double quotes
\ No newline at end of file
+    return f"\"{query}\""  # wrap in double quotes
+
+
+def async_database_url(url: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Convert a libpq-style DATABASE_URL into an asyncpg SQLAlchemy URL.
+    asyncpg rejects libpq query options such as `sslmode`/`channel_binding`, so SSL is passed via connect_args.
+    """
+    parsed = make_url(url)
+    query = dict(parsed.query)
+    sslmode = query.pop("sslmode", None)
+    query.pop("channel_binding", None)
+
+    connect_args = {}
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+
+    return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False), connect_args
@@ -4,6 +4,7 @@ from ..db import get_db
 from ..models import HealthcareRecord, RecordTypeEnum, TableNameEnum, ActionEnum
 from ..utils import get_embedding
 from ..services.audit_service import create_audit_log
+from ..services.healthcare_summary_service import get_healthcare_summary, serialize_healthcare_record
 
 healthcare_bp = Blueprint("healthcare", __name__)
 
@@ -26,17 +27,26 @@ def get_healthcare():
     records = query.all()
     db.close()
 
-    result = [
-        {
-            "healthcare_record_id": r.id,
-            "record_type": r.record_type.value if r.record_type else None,
-            "description": r.description,
-            "diagnosis_date": r.diagnosis_date.isoformat() if r.diagnosis_date else None,
-            "last_updated": r.last_updated.isoformat()
-        } for r in records
-    ]
+    result = [serialize_healthcare_record(r) for r in records]
     return jsonify(result), 200
 
+@healthcare_bp.route("/healthcare/summary", methods=["GET"])
+def get_healthcare_summary_route():
+    """
+    Caregiver view: current medication list and upcoming appointments, two range scans of
+    the (elderly_id, record_type, diagnosis_date) index instead of every healthcare record
+    """
+    elderly_id = request.args.get("elderly_id")
+    if not elderly_id:
+        return jsonify({"error": "Missing elderly_id"}), 400
+
+    db: Session = next(get_db())
+    try:
+        summary = get_healthcare_summary(db, elderly_id)
+    finally:
+        db.close()
+    return jsonify(summary), 200
+
 @healthcare_bp.route("/healthcare", methods=["POST"])
 def post_healthcare():
     data = request.json
@@ -4,6 +4,7 @@ from sqlalchemy import text
 from ..db import get_db
 from ..config import Config
 from ..models import ElderlyProfile, user_elderly
+from ..services.session_service import announce_session_start
 
 elderly_bp = Blueprint("elderly", __name__)
 
@@ -47,6 +48,9 @@ def get_elderly():
             if not row:
                 return jsonify({"error": "Elderly not found"}), 404
 
+            # A caregiver/companion session is starting: let the chat process warm its caches
+            announce_session_start(db, elderly_id)
+
             result = {
                 "id": str(row["id"]),
                 "name": row["name"],
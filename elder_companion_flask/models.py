@@ -1,7 +1,7 @@
 import enum
 import uuid
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import Table, Column, String, Date, Enum, ForeignKey, TIMESTAMP, Text, text
+from sqlalchemy import Table, Column, String, Date, Enum, ForeignKey, Index, TIMESTAMP, Text, text
 from sqlalchemy.dialects.postgresql import UUID, BYTEA, JSON
 from sqlalchemy.orm import relationship
 from .db import Base
@@ -97,6 +97,9 @@ class ShortTermMemory(Base):
 
     elderly = relationship("ElderlyProfile", back_populates="stm")
 
+    # Date-range filters pushed down by the retrieval agent
+    __table_args__ = (Index("idx_stm_elderly_created", "elderly_id", "created_at"),)
+
 class LongTermMemory(Base):
     __tablename__ = "long_term_memory"
 
@@ -110,6 +113,8 @@ class LongTermMemory(Base):
 
     elderly = relationship("ElderlyProfile", back_populates="ltm")
 
+    __table_args__ = (Index("idx_ltm_elderly_category", "elderly_id", "category"),)
+
 class HealthcareRecord(Base):
     __tablename__ = "healthcare_records"
 
@@ -123,6 +128,8 @@ class HealthcareRecord(Base):
 
     elderly = relationship("ElderlyProfile", back_populates="healthcare")
 
+    __table_args__ = (Index("idx_health_elderly_type_date", "elderly_id", "record_type", "diagnosis_date"),)
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
@@ -0,0 +1,48 @@
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from ..models import HealthcareRecord, RecordTypeEnum
+
+UPCOMING_LIMIT = 10
+
+# Appointment dates are Singapore calendar days, as on the chat side (RAG/utils/recency_score.py)
+SGT = timezone(timedelta(hours=8))
+
+
+def serialize_healthcare_record(record: HealthcareRecord) -> dict:
+    """JSON shape of a healthcare record in every /healthcare response"""
+    return {
+        "healthcare_record_id": str(record.id),
+        "record_type": record.record_type.value if record.record_type else None,
+        "description": record.description,
+        "diagnosis_date": record.diagnosis_date.isoformat() if record.diagnosis_date else None,
+        "last_updated": record.last_updated.isoformat() if record.last_updated else None,
+    }
+
+
+def get_healthcare_summary(db: Session, elderly_id: str, today: date = None, limit: int = UPCOMING_LIMIT) -> dict:
+    """
+    Current medication list and upcoming appointments of one elderly profile. Both queries are
+    range scans of idx_health_elderly_type_date (elderly_id, record_type, diagnosis_date), so
+    they are read straight from Postgres rather than cached here (the chat process keeps the
+    in-memory index, RAG/utils/healthcare_index.py, kept fresh by the change feed)
+    """
+    today = today or datetime.now(SGT).date()
+    by_type = db.query(HealthcareRecord).filter(HealthcareRecord.elderly_id == elderly_id)
+
+    # Most recently prescribed first, undated last
+    medications = (
+        by_type.filter(HealthcareRecord.record_type == RecordTypeEnum.medication)
+               .order_by(HealthcareRecord.diagnosis_date.desc().nullslast())
+               .all()
+    )
+    upcoming = (
+        by_type.filter(HealthcareRecord.record_type == RecordTypeEnum.appointment)
+               .filter(HealthcareRecord.diagnosis_date >= today)
+               .order_by(HealthcareRecord.diagnosis_date, HealthcareRecord.id)
+               .limit(limit)
+               .all()
+    )
+    return {
+        "medications": [serialize_healthcare_record(r) for r in medications],
+        "upcoming_appointments": [serialize_healthcare_record(r) for r in upcoming],
+    }
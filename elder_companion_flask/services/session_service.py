@@ -0,0 +1,18 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Listened on by the chat (RAG) process, which preloads the elderly's memory into its caches
+SESSION_START_CHANNEL = "memory_session_start"
+
+def announce_session_start(db: Session, elderly_id: str):
+    """
+    Tell the chat process that this elderly's profile was opened, so the first question
+    of the conversation does not pay for cold caches. Best effort: never fails the request.
+    """
+    try:
+        db.execute(text("SELECT pg_notify(:channel, :elderly_id)"),
+                   {"channel": SESSION_START_CHANNEL, "elderly_id": str(elderly_id)})
+        db.commit()  # NOTIFY is delivered on commit
+    except Exception as e:
+        db.rollback()
+        print("Session start notification failed:", e)
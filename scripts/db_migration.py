@@ -5,6 +5,8 @@ from psycopg2.extras import execute_values
 from sentence_transformers import SentenceTransformer
 from huggingface_hub import login
 
+from RAG.utils.change_feed import install_change_feed_triggers
+
 # -----------------------------------------------------------------------
 # 1. Connect to Neon Postgres
 # -----------------------------------------------------------------------
@@ -111,14 +113,30 @@ try:
             CREATE INDEX IF NOT EXISTS idx_health_embedding
             ON healthcare_records
             USING hnsw (embedding vector_cosine_ops);
+
+            -- Composite indexes for the structured filters (record type, category, date ranges)
+            CREATE INDEX IF NOT EXISTS idx_stm_elderly_created
+            ON short_term_memory (elderly_id, created_at);
+
+            CREATE INDEX IF NOT EXISTS idx_ltm_elderly_category
+            ON long_term_memory (elderly_id, category);
+
+            CREATE INDEX IF NOT EXISTS idx_health_elderly_type_date
+            ON healthcare_records (elderly_id, record_type, diagnosis_date);
             """)
 
 # -----------------------------------------------------------------------
-# 7. Insert Sample Data
+# 7. Change-feed triggers (NOTIFY memory_changes on every write)
+# -----------------------------------------------------------------------
+            print("5. Installing change-feed triggers.")
+            install_change_feed_triggers(cur)
+
+# -----------------------------------------------------------------------
+# 8. Insert Sample Data
 # -----------------------------------------------------------------------
             SECRET_KEY = os.getenv("DATABASE_ENCRYPTION_KEY")
 
-            print("5. Inserting synthetic data.")
+            print("6. Inserting synthetic data.")
             # Elderly profile
             cur.execute(f"""
             INSERT INTO elderly_profile (name, date_of_birth, gender, nationality, dialect_group, marital_status, address)
@@ -184,7 +202,7 @@ try:
             """, stm_records)
 
 # -----------------------------------------------------------------------
-# 8. Commit & Close
+# 9. Commit & Close
 # -----------------------------------------------------------------------
             conn.commit()
             print("Migration complete.")
@@ -2,6 +2,7 @@
 To run this file, go to root folder (elder_companion) and run python -m scripts.db_migration
 """
 from elder_companion_flask.db import engine, Base, get_db
+from RAG.utils.change_feed import change_feed_ddl
 
 # Import all models so SQLAlchemy knows about them
 from elder_companion_flask.models import (
@@ -22,5 +23,27 @@ def create_tables():
     Base.metadata.create_all(bind=engine)
     print("Tables created successfully!")
 
+def create_filter_indexes():
+    """
+    create_all only builds indexes together with new tables; this adds the composite
+    filter indexes declared on the memory models to existing databases. Safe to re-run.
+    """
+    for model in (ShortTermMemory, LongTermMemory, HealthcareRecord):
+        for index in model.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+    print("Filter indexes created successfully!")
+
+def create_change_feed_triggers():
+    """
+    Install the NOTIFY triggers on the memory tables so that in-process caches in other
+    services are invalidated on every write. Safe to re-run.
+    """
+    with engine.begin() as conn:
+        for statement in change_feed_ddl():
+            conn.exec_driver_sql(statement)
+    print("Change-feed triggers installed successfully!")
+
 if __name__ == "__main__":
     create_tables()
+    create_filter_indexes()
+    create_change_feed_triggers()